@@ -1,7 +1,7 @@
 """API dependencies for authentication and request processing."""
 
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError
 
@@ -68,6 +68,30 @@ async def get_current_user(
     return user
 
 
+async def get_current_user_from_query(
+    token: Optional[str] = Query(None, description="JWT token, for clients that cannot send headers"),
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> User:
+    """
+    Dependency like get_current_user that also accepts the token as query
+    parameter, for EventSource which cannot set an Authorization header.
+
+    Args:
+        token: JWT token from the query string
+        credentials: HTTP Bearer credentials (preferred if present)
+
+    Returns:
+        User document if authentication successful
+
+    Raises:
+        HTTPException: If token is missing, invalid, expired, or user not found
+    """
+    if credentials is None and token:
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    return await get_current_user(credentials)
+
+
 async def get_current_user_optional(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> Optional[User]:
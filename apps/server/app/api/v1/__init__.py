@@ -2,7 +2,10 @@
 
 from fastapi import APIRouter
 
-from app.api.v1 import auth, collections, admin_collections, photos
+from app.api.v1 import (
+    auth, collections, admin_analytics, admin_collections, admin_events, admin_photos, photos, storage,
+    uploads
+)
 
 # Create API v1 router
 api_router = APIRouter(prefix="/api/v1")
@@ -11,7 +14,12 @@ api_router = APIRouter(prefix="/api/v1")
 api_router.include_router(auth.router)
 api_router.include_router(collections.router)  # Public endpoints
 api_router.include_router(admin_collections.router)  # Admin endpoints
+api_router.include_router(admin_photos.router)  # Admin photo endpoints
+api_router.include_router(admin_analytics.router)  # Admin upload analytics
+api_router.include_router(admin_events.router)  # Admin live upload events
 api_router.include_router(photos.router)  # Photo upload endpoints
+api_router.include_router(uploads.router)  # Resumable upload endpoints
+api_router.include_router(storage.router)  # Signed file delivery
 
 # Export router for main app
 __all__ = ["api_router"]
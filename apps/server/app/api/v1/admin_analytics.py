@@ -0,0 +1,184 @@
+"""Admin analytics API endpoints.
+
+This module provides system statistics and upload statistics over time,
+read from materialized documents rather than computed from photos. All
+endpoints require authentication via JWT token.
+"""
+
+from datetime import datetime, timedelta
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+
+from app.api.deps import get_current_user
+from app.models.collection import get_collection_by_code
+from app.models.system_statistics import (
+    SystemStatisticsResponse,
+    get_system_statistics,
+    reconcile_system_statistics,
+)
+from app.models.upload_rollup import (
+    GLOBAL_SCOPE,
+    GRANULARITIES,
+    UploadAnalyticsResponse,
+    UploadBucket,
+    get_upload_rollups,
+)
+from app.models.user import User
+
+router = APIRouter(prefix="/admin/analytics", tags=["admin-analytics"])
+
+# Largest number of buckets one request may span
+MAX_BUCKETS = 1500
+
+# Range returned when no start is given
+DEFAULT_RANGE = {
+    "minute": timedelta(hours=1),
+    "hour": timedelta(days=2),
+    "day": timedelta(days=30),
+}
+
+
+@router.get(
+    "/statistics",
+    response_model=SystemStatisticsResponse,
+    summary="Get system statistics",
+    description="Get photo counts and bytes per state and collection counts per status."
+)
+async def get_statistics(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get system-wide statistics.
+
+    Read from one document that uploads, deletions and status changes keep
+    up to date, so the cost does not depend on the number of photos.
+    `total_photos` and `total_bytes` count processed photos that are not
+    deleted. Drift is repaired every `STATISTICS_RECONCILE_MINUTES`
+    (`reconciled_at`).
+
+    ## Response
+    ```json
+    {
+      "total_photos": 120400,
+      "total_bytes": 410000000000,
+      "photos": {"pending": 3, "processed": 120400, "failed": 12, "deleted": 2210},
+      "bytes": {"pending": 9000000, "processed": 410000000000, "failed": 30000000, "deleted": 7000000000},
+      "collections": {"active": 310, "archived": 1200, "closed": 45, "deleted": 20},
+      "updated_at": "2024-05-01T14:03:22",
+      "reconciled_at": "2024-05-01T14:00:00"
+    }
+    ```
+    """
+    stats = await get_system_statistics()
+
+    return SystemStatisticsResponse(
+        total_photos=stats.photos.get("processed", 0),
+        total_bytes=stats.bytes.get("processed", 0),
+        photos=stats.photos,
+        bytes=stats.bytes,
+        collections=stats.collections,
+        updated_at=stats.updated_at,
+        reconciled_at=stats.reconciled_at
+    )
+
+
+@router.post(
+    "/statistics/reconcile",
+    summary="Reconcile system statistics",
+    description="Recompute system statistics from all photos and collections and repair drift."
+)
+async def reconcile_statistics(
+    dry_run: bool = Query(False, description="Only report the drift"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Recompute system statistics now.
+
+    Scans all photos and collections. Returns the drift found per counter
+    (actual minus stored; empty if none) and whether it was repaired.
+
+    ## Response
+    ```json
+    {"drift": {"photos": {"processed": -1}, "bytes": {"processed": -2400000}, "collections": {}}, "repaired": true}
+    ```
+    """
+    return await reconcile_system_statistics(dry_run=dry_run)
+
+
+@router.get(
+    "/uploads",
+    response_model=UploadAnalyticsResponse,
+    summary="Get upload analytics",
+    description="Get uploads, bytes and distinct uploaders per minute, hour or day."
+)
+async def get_upload_analytics(
+    granularity: Literal["minute", "hour", "day"] = Query("hour", description="Bucket length"),
+    start: Optional[datetime] = Query(None, description="Range start (default: a window before end)"),
+    end: Optional[datetime] = Query(None, description="Range end, exclusive (default: now)"),
+    collection: Optional[str] = Query(None, description="Collection code (default: all collections)"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get upload statistics over time.
+
+    Counters are kept per bucket when photos are stored, for each collection
+    and for all collections together; deletions do not lower them. Minute
+    buckets are kept for 2 days and hour buckets for 90 days. Buckets
+    without uploads are omitted. Uploaders are told apart by IP address and
+    user agent; their count is distinct within each bucket.
+
+    ## Example
+    ```bash
+    curl -X GET "http://localhost:8000/api/v1/admin/analytics/uploads?granularity=day&collection=ABC123" \\
+      -H "Authorization: Bearer YOUR_TOKEN"
+    ```
+
+    ## Response
+    ```json
+    {
+      "scope": "ABC123",
+      "granularity": "day",
+      "start": "2024-04-01T00:00:00",
+      "end": "2024-05-01T00:00:00",
+      "total_uploads": 412,
+      "total_bytes": 1650000000,
+      "buckets": [{"bucket": "2024-04-27T00:00:00", "uploads": 398, "bytes": 1600000000, "uploaders": 37}]
+    }
+    ```
+    """
+    end = end or datetime.now()
+    start = start or end - DEFAULT_RANGE[granularity]
+
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
+        )
+
+    if (end - start) / GRANULARITIES[granularity] > MAX_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range too long: at most {MAX_BUCKETS} buckets per request"
+        )
+
+    scope = GLOBAL_SCOPE
+    if collection:
+        found = await get_collection_by_code(collection)
+        if not found:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Collection not found"
+            )
+        scope = found.code
+
+    buckets = await get_upload_rollups(scope, granularity, start, end)
+
+    return UploadAnalyticsResponse(
+        scope=scope,
+        granularity=granularity,
+        start=start,
+        end=end,
+        total_uploads=sum(b["uploads"] for b in buckets),
+        total_bytes=sum(b["bytes"] for b in buckets),
+        buckets=[UploadBucket(**b) for b in buckets]
+    )
@@ -4,7 +4,7 @@ This module provides endpoints for managing collections (CRUD operations).
 All endpoints require authentication via JWT token.
 """
 
-from typing import List, Optional
+from typing import List, Literal, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from app.models.collection import (
     Collection,
@@ -14,6 +14,7 @@ from app.models.collection import (
     get_collection_by_code,
     create_collection,
     list_collections,
+    search_collections,
     update_collection,
     delete_collection,
     count_collections
@@ -139,6 +140,60 @@ async def list_collections_endpoint(
     ]
 
 
+@router.get(
+    "/search",
+    response_model=List[CollectionResponse],
+    summary="Search collections",
+    description="Find collections by name, code or description (autocomplete or word search)."
+)
+async def search_collections_endpoint(
+    q: str = Query(..., min_length=1, max_length=100, description="Search text"),
+    mode: Literal["prefix", "text"] = Query("prefix", description="prefix (autocomplete) or text (word search)"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of results"),
+    status_filter: Optional[Literal["active", "archived", "closed"]] = Query(
+        None, alias="status", description="Filter by status"
+    ),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Search collections.
+
+    ## Query Parameters
+    - q: Search text
+    - mode: `prefix` (default) matches words of the name or code starting
+      with each word of `q`, ignoring case and accents, for search-as-you-type;
+      `text` runs a word search over name, code and description, best
+      matches first (supports `"exact phrases"` and `-excluded` words)
+    - limit: Maximum number of results (default: 20, max: 100)
+    - status: Optional status filter
+
+    ## Example
+    ```bash
+    curl -X GET "http://localhost:8000/api/v1/admin/collections/search?q=wed%20jan" \
+      -H "Authorization: Bearer YOUR_TOKEN"
+    ```
+
+    ## Response
+    Returns array of matching collections.
+    """
+    collections = await search_collections(q, mode=mode, limit=limit, status_filter=status_filter)
+
+    return [
+        CollectionResponse(
+            id=str(c.id),
+            code=c.code,
+            name=c.name,
+            description=c.description,
+            status=c.status,
+            settings=c.settings,
+            statistics=c.statistics,
+            created_at=c.created_at,
+            created_by=c.created_by
+        )
+        for c in collections
+    ]
+
+
 @router.get(
     "/{code}",
     response_model=CollectionResponse,
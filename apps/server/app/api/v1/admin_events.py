@@ -0,0 +1,80 @@
+"""Admin live events API endpoints.
+
+This module streams new photos and collection statistics to the admin
+dashboard as server-sent events, replacing polling during an event.
+"""
+
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import get_current_user_from_query
+from app.core.config import settings
+from app.models.collection import get_collection_by_code
+from app.models.user import User
+from app.services.event_service import event_service
+
+router = APIRouter(prefix="/admin/events", tags=["admin-events"])
+
+
+@router.get(
+    "",
+    summary="Stream live upload events",
+    description="Server-sent events for new photos and collection statistics."
+)
+async def stream_events(
+    collection: Optional[str] = Query(None, description="Collection code (default: all collections)"),
+    current_user: User = Depends(get_current_user_from_query)
+):
+    """
+    Stream new photos and statistics changes as server-sent events.
+
+    The token may be passed as `token` query parameter, since `EventSource`
+    cannot send an Authorization header. Events are coalesced and sent at
+    most every `LIVE_EVENTS_INTERVAL_MS`:
+
+    - `photos`: photos processed since the previous event. Only the latest
+      `LIVE_EVENTS_MAX_PHOTOS` are included; `dropped` counts older ones.
+    - `statistics`: latest statistics of a changed collection. When
+      following one collection, its current statistics are sent first.
+
+    A comment line is sent every 15 seconds without events.
+
+    ## Example
+    ```javascript
+    const events = new EventSource(`${API}/api/v1/admin/events?collection=ABC123&token=${token}`)
+    events.addEventListener('statistics', e => update(JSON.parse(e.data)))
+    ```
+
+    ## Response
+    ```text
+    event: photos
+    data: {"photos": [{"photo_id": "507f1f77bcf86cd799439011", "collection_code": "ABC123", "filename": "IMG_0001.jpg", "file_size": 2400000, "dimensions": {"width": 4000, "height": 3000}, "dominant_color": "#8a6f4e", "uploaded_at": "2024-05-01T14:03:22"}], "dropped": 0}
+
+    event: statistics
+    data: {"collection_code": "ABC123", "total_photos": 412, "total_size_bytes": 1650000000, "last_upload_at": "2024-05-01T14:03:22"}
+    ```
+    """
+    initial = []
+    if collection:
+        found = await get_collection_by_code(collection)
+        if not found:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Collection not found"
+            )
+        collection = found.code
+        initial.append(("statistics", {"collection_code": found.code, **found.statistics}))
+
+    if event_service.client_count >= settings.live_events_max_clients:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many live event clients",
+            headers={"Retry-After": "30"}
+        )
+
+    return StreamingResponse(
+        event_service.stream(collection, initial),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,634 @@
+"""Admin photo API endpoints.
+
+This module provides endpoints for browsing a collection's photos and
+delivering their files. All endpoints require authentication via JWT token.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Literal, Optional, Tuple
+from beanie import PydanticObjectId
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+
+from app.models.collection import get_collection_by_code
+from app.models.blob import get_dedup_report
+from app.models.photo import (
+    Photo, PhotoCluster, PhotoClusterResponse, PhotoResponse, PhotoSearchResponse,
+    cluster_photo_locations, get_photo_by_id, list_photos, search_photos
+)
+from app.models.photo_exif import get_raw_exif
+from app.models.sprite_sheet import SpriteCell, SpriteSheetResponse
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.models.user import User
+from app.services.delivery_service import delivery_service
+from app.services.export_service import export_service
+from app.services.image_service import image_service
+from app.services.photo_service import photo_service
+from app.services.similarity_service import similarity_service
+from app.services.sprite_service import sprite_service
+from app.services.storage_service import storage_service
+
+router = APIRouter(prefix="/admin", tags=["admin-photos"])
+
+
+async def _photo_response(photo: Photo) -> PhotoResponse:
+    """Build a photo response including signed file URLs."""
+    original = await delivery_service.get_signed_url(photo.file_path)
+    thumbnail = await delivery_service.get_signed_url(photo.thumbnail_path) if photo.thumbnail_path else None
+
+    return PhotoResponse(
+        id=str(photo.id),
+        collection_code=photo.collection_code,
+        filename=photo.filename,
+        file_path=photo.file_path,
+        thumbnail_path=photo.thumbnail_path,
+        file_size=photo.file_size,
+        mime_type=photo.mime_type,
+        dimensions=photo.dimensions,
+        blurhash=photo.blurhash,
+        dominant_color=photo.dominant_color,
+        uploaded_at=photo.uploaded_at,
+        uploader_info=photo.uploader_info,
+        metadata=photo.metadata,
+        location=photo.location,
+        processing_status=photo.processing_status,
+        file_url=original['url'],
+        thumbnail_url=thumbnail['url'] if thumbnail else None,
+        urls_expire_at=original['expires_at']
+    )
+
+
+def _encode_cursor(photo: Photo, sort: str) -> str:
+    """Encode the position after a photo in search order."""
+    value = photo.metadata.get("captured_at") if sort == "captured_at" else photo.uploaded_at
+    data = [value.isoformat() if value else None, str(photo.id)]
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[Optional[datetime], Any]:
+    """Decode a search cursor into (sort value, photo ID)."""
+    try:
+        value, photo_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (datetime.fromisoformat(value) if value else None), PydanticObjectId(photo_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+@router.get(
+    "/collections/{code}/photos",
+    response_model=List[PhotoResponse],
+    summary="List collection photos",
+    description="Get paginated list of photos in a collection with signed file URLs."
+)
+async def list_collection_photos(
+    code: str,
+    page: int = Query(1, ge=1, description="Page number (starts from 1)"),
+    limit: int = Query(50, ge=1, le=200, description="Items per page"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    List photos of a collection.
+
+    Each photo includes signed, expiring URLs for the original and thumbnail,
+    which can be used directly in `<img>` tags without an Authorization header,
+    and placeholders to paint until the thumbnail has loaded: a BlurHash
+    string (`blurhash`) and a dominant color (`dominant_color`, "#rrggbb").
+
+    ## Example
+    ```bash
+    curl -X GET "http://localhost:8000/api/v1/admin/collections/ABC123/photos?page=1" \
+      -H "Authorization: Bearer YOUR_TOKEN"
+    ```
+    """
+    collection = await get_collection_by_code(code)
+
+    if not collection:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Collection not found"
+        )
+
+    skip = (page - 1) * limit
+    photos = await list_photos(collection.code, skip=skip, limit=limit)
+
+    return [await _photo_response(p) for p in photos]
+
+
+@router.get(
+    "/collections/{code}/photos/search",
+    response_model=PhotoSearchResponse,
+    summary="Search collection photos",
+    description="Filter photos of a collection by capture time, camera, orientation and size."
+)
+async def search_collection_photos(
+    code: str,
+    captured_after: Optional[datetime] = Query(None, description="Captured at or after"),
+    captured_before: Optional[datetime] = Query(None, description="Captured before"),
+    camera_make: Optional[str] = Query(None, description="Exact camera make"),
+    camera_model: Optional[str] = Query(None, description="Exact camera model"),
+    orientation: Optional[Literal["landscape", "portrait", "square"]] = Query(None, description="As displayed"),
+    min_megapixels: Optional[float] = Query(None, ge=0, description="Minimum size in megapixels"),
+    max_megapixels: Optional[float] = Query(None, ge=0, description="Maximum size in megapixels"),
+    sort: Literal["captured_at", "uploaded_at"] = Query("captured_at", description="Sort key, newest first"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(50, ge=1, le=200, description="Items per page"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Search photos of a collection.
+
+    All filters are optional and combined. Capture time and camera come
+    from the typed EXIF fields; photos without them only match searches
+    that do not filter on them, and come last when sorting by capture
+    time. Pages are continued with `next_cursor`, which is `null` on the
+    last page.
+
+    ## Example
+    ```bash
+    curl -X GET "http://localhost:8000/api/v1/admin/collections/ABC123/photos/search?camera_make=Canon&captured_after=2024-05-01T00:00:00&orientation=portrait" \
+      -H "Authorization: Bearer YOUR_TOKEN"
+    ```
+
+    ## Response
+    ```json
+    {"photos": [{"id": "65a...", "metadata": {"camera_make": "Canon", "captured_at": "2024-05-01T14:03:22"}}], "next_cursor": "WyIyMDI0..."}
+    ```
+    """
+    collection = await get_collection_by_code(code)
+
+    if not collection:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Collection not found"
+        )
+
+    photos = await search_photos(
+        collection_code=collection.code,
+        captured_after=captured_after,
+        captured_before=captured_before,
+        camera_make=camera_make,
+        camera_model=camera_model,
+        orientation=orientation,
+        min_megapixels=min_megapixels,
+        max_megapixels=max_megapixels,
+        sort=sort,
+        after=_decode_cursor(cursor) if cursor else None,
+        limit=limit
+    )
+
+    return PhotoSearchResponse(
+        photos=[await _photo_response(p) for p in photos],
+        next_cursor=_encode_cursor(photos[-1], sort) if len(photos) == limit else None
+    )
+
+
+@router.get(
+    "/collections/{code}/photos/sprite",
+    response_model=SpriteSheetResponse,
+    summary="Get page sprite sheet",
+    description="Get the thumbnails of a page of photos as one image with a coordinate map."
+)
+async def get_collection_sprite(
+    code: str,
+    page: int = Query(1, ge=1, description="Page number (starts from 1)"),
+    limit: int = Query(50, ge=1, le=200, description="Items per page"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get a sprite sheet for a page of the photo list.
+
+    Covers the same photos, in the same order, as the photo list with the
+    same `page` and `limit`. Thumbnails are cropped to square cells of
+    `SPRITE_CELL_SIZE` pixels; a grid view loads the sheet from `url` once
+    and shows each photo as the region `x, y, width, height` (for example
+    with CSS `background-position`). Sheets are cached until photos of the
+    collection are added or deleted.
+
+    ## Example
+    ```bash
+    curl -X GET "http://localhost:8000/api/v1/admin/collections/ABC123/photos/sprite?page=1&limit=100" \
+      -H "Authorization: Bearer YOUR_TOKEN"
+    ```
+    """
+    collection = await get_collection_by_code(code)
+
+    if not collection:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Collection not found"
+        )
+
+    skip = (page - 1) * limit
+    photos = await list_photos(collection.code, skip=skip, limit=limit)
+
+    if not photos:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No photos on this page"
+        )
+
+    sheet = await sprite_service.get_sheet(collection.code, photos)
+    signed = await delivery_service.get_signed_url(sheet.file_path)
+
+    return SpriteSheetResponse(
+        key=sheet.key,
+        url=signed['url'],
+        expires_at=signed['expires_at'],
+        width=sheet.width,
+        height=sheet.height,
+        cell_size=sheet.cell_size,
+        columns=sheet.columns,
+        photos=[SpriteCell(**cell) for cell in sheet.cells]
+    )
+
+
+@router.get(
+    "/collections/{code}/photos/map",
+    response_model=PhotoClusterResponse,
+    summary="Get clustered map markers",
+    description="Group photos with a GPS position inside a bounding box into map clusters."
+)
+async def get_collection_map(
+    code: str,
+    bbox: str = Query(..., description="west,south,east,north in degrees"),
+    zoom: int = Query(..., ge=0, le=22, description="Map zoom level (Web Mercator)"),
+    limit: int = Query(500, ge=1, le=5000, description="Maximum number of clusters"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get map markers for the photos of a collection.
+
+    Photos are grouped on a grid whose cells are `MAP_CLUSTER_CELL_PIXELS`
+    wide at the given zoom level, so a viewport gets a few hundred clusters
+    however many photos it covers. Each cluster has the mean position of
+    its photos, their count and bounds (to zoom in on a click); a cluster
+    of one photo carries its `photo_id`. Boxes crossing the antimeridian
+    have `west > east`. Largest clusters come first.
+
+    ## Example
+    ```bash
+    curl -X GET "http://localhost:8000/api/v1/admin/collections/ABC123/photos/map?bbox=-10.5,35.2,30.1,60.8&zoom=5" \
+      -H "Authorization: Bearer YOUR_TOKEN"
+    ```
+
+    ## Response
+    ```json
+    {
+      "zoom": 5,
+      "cell_degrees": 2.8125,
+      "total_photos": 1834,
+      "clusters": [
+        {"latitude": 48.85, "longitude": 2.35, "count": 412, "bounds": [1.6, 48.1, 4.2, 50.3], "photo_id": null},
+        {"latitude": 41.39, "longitude": 2.17, "count": 1, "bounds": [2.17, 41.39, 2.17, 41.39], "photo_id": "65a..."}
+      ]
+    }
+    ```
+    """
+    try:
+        west, south, east, north = (float(value) for value in bbox.split(","))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox must be west,south,east,north"
+        )
+
+    if not (-180 <= west <= 180 and -180 <= east <= 180 and -90 <= south < north <= 90):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox is out of range"
+        )
+
+    collection = await get_collection_by_code(code)
+
+    if not collection:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Collection not found"
+        )
+
+    # A 256-pixel tile spans 360 / 2^zoom degrees of longitude
+    cell_degrees = 360 / 2 ** zoom * settings.map_cluster_cell_pixels / 256
+
+    clusters = await cluster_photo_locations(
+        collection.code,
+        (west, south, east, north),
+        cell_degrees,
+        limit=limit
+    )
+
+    return PhotoClusterResponse(
+        zoom=zoom,
+        cell_degrees=cell_degrees,
+        total_photos=sum(cluster["count"] for cluster in clusters),
+        clusters=[PhotoCluster(**cluster) for cluster in clusters]
+    )
+
+
+@router.get(
+    "/photos/{photo_id}/file",
+    summary="Download original photo",
+    description="Deliver the original file of a photo."
+)
+async def get_photo_file(
+    photo_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Deliver the original photo file.
+
+    Depending on `FILE_DELIVERY_MODE` the file is streamed by the API or
+    offloaded to the front proxy via `X-Accel-Redirect` / `X-Sendfile`.
+    """
+    photo = await get_photo_by_id(photo_id)
+
+    if not photo:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Photo not found"
+        )
+
+    response = await delivery_service.build_response(
+        photo.file_path,
+        media_type=photo.mime_type,
+        filename=photo.filename
+    )
+
+    if response is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Photo file not found"
+        )
+
+    return response
+
+
+@router.get(
+    "/photos/{photo_id}/thumbnail",
+    summary="Download photo thumbnail",
+    description="Deliver the thumbnail of a photo."
+)
+async def get_photo_thumbnail(
+    photo_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Deliver the photo thumbnail (JPEG)."""
+    photo = await get_photo_by_id(photo_id)
+
+    if not photo or not photo.thumbnail_path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Thumbnail not found"
+        )
+
+    response = await delivery_service.build_response(photo.thumbnail_path, media_type='image/jpeg')
+
+    if response is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Thumbnail not found"
+        )
+
+    return response
+
+
+@router.get(
+    "/photos/{photo_id}/exif",
+    summary="Get photo EXIF data",
+    description="Get the typed EXIF fields and, if stored, all raw EXIF tags of a photo."
+)
+async def get_photo_exif(
+    photo_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the EXIF data of a photo.
+
+    `metadata` holds the typed fields kept on the photo. `raw` lists every
+    tag of the original EXIF block when `STORE_RAW_EXIF` was enabled at
+    upload time, `null` otherwise.
+
+    ## Response
+    ```json
+    {
+      "metadata": {"camera_make": "Canon", "captured_at": "2024-05-01T14:03:22", "f_number": 2.8},
+      "raw": {"Make": "Canon", "ExposureTime": 0.004, "MakerNote": "<9472 bytes>"}
+    }
+    ```
+    """
+    photo = await get_photo_by_id(photo_id)
+
+    if not photo:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Photo not found"
+        )
+
+    raw = await get_raw_exif(photo.content_hash) if photo.content_hash else None
+
+    return {
+        "metadata": photo.metadata,
+        "raw": image_service.decode_raw_exif(raw) if raw else None
+    }
+
+
+@router.delete(
+    "/photos/{photo_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Delete photo",
+    description="Soft delete a photo and release its stored content."
+)
+async def delete_photo_endpoint(
+    photo_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Delete a photo (soft delete).
+
+    The photo record is kept for audit purposes. The stored file and
+    thumbnail are removed once no other photo shares the same content.
+    """
+    photo = await get_photo_by_id(photo_id)
+
+    if not photo:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Photo not found"
+        )
+
+    await photo_service.delete_photo(photo)
+    return None
+
+
+@router.get(
+    "/storage/dedup",
+    summary="Get deduplication report",
+    description="Get bytes saved by content-addressed storage."
+)
+async def get_dedup_report_endpoint(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get deduplication statistics.
+
+    ## Response
+    ```json
+    {
+      "blobs": 1200,
+      "references": 1500,
+      "physical_bytes": 3400000000,
+      "logical_bytes": 4100000000,
+      "bytes_saved": 700000000
+    }
+    ```
+    """
+    return await get_dedup_report()
+
+
+@router.get(
+    "/storage/volumes",
+    summary="Get storage volumes",
+    description="Get disk usage of each local storage volume."
+)
+async def get_storage_volumes(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get disk usage per storage volume.
+
+    Volumes with less than `STORAGE_VOLUME_MIN_FREE_MB` free space are not
+    accepting new files (`accepting: false`). Empty for object storage.
+
+    ## Response
+    ```json
+    [
+      {
+        "volume_id": "disk1",
+        "path": "/mnt/disk1",
+        "total_bytes": 2000000000000,
+        "used_bytes": 1500000000000,
+        "free_bytes": 500000000000,
+        "accepting": true
+      }
+    ]
+    ```
+    """
+    return storage_service.get_volume_stats()
+
+
+@router.get(
+    "/photos/{photo_id}/similar",
+    summary="Find similar photos",
+    description="Find near-duplicates of a photo by perceptual hash distance."
+)
+async def get_similar_photos(
+    photo_id: str,
+    max_distance: int = Query(8, ge=0, le=64, description="Maximum Hamming distance"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Find photos in the same collection that look like the given photo.
+
+    Distances are Hamming distances between 64-bit perceptual hashes:
+    0-4 is usually the same image re-encoded, up to ~10 catches burst shots.
+
+    ## Response
+    ```json
+    [{"photo_id": "65a...", "distance": 2}]
+    ```
+    """
+    photo = await get_photo_by_id(photo_id)
+
+    if not photo:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Photo not found"
+        )
+
+    return await similarity_service.find_similar(photo, max_distance)
+
+
+@router.get(
+    "/collections/{code}/duplicates",
+    summary="Find near-duplicate groups",
+    description="Group near-duplicate photos of a collection by perceptual hash distance."
+)
+async def get_duplicate_groups(
+    code: str,
+    max_distance: int = Query(4, ge=0, le=64, description="Maximum Hamming distance"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Group near-duplicate photos of a collection.
+
+    ## Response
+    ```json
+    {"groups": [["65a...", "65b...", "65c..."]], "total_groups": 1}
+    ```
+    """
+    collection = await get_collection_by_code(code)
+
+    if not collection:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Collection not found"
+        )
+
+    groups = await similarity_service.find_duplicate_groups(collection.code, max_distance)
+    return {"groups": groups, "total_groups": len(groups)}
+
+
+@router.get(
+    "/collections/{code}/export",
+    summary="Export collection as ZIP",
+    description="Stream a ZIP archive of all original photos in a collection."
+)
+async def export_collection(
+    code: str,
+    after: Optional[str] = Query(None, description="Resume after this photo ID"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Download all originals of a collection as a ZIP archive.
+
+    The archive is streamed while it is built. Entries are named
+    `{photo_id}_{filename}` and ordered by photo ID, so an interrupted
+    download can be continued by passing the ID of the last complete
+    entry as `after`, which returns a ZIP of the remaining photos.
+
+    ## Example
+    ```bash
+    curl -o ABC123.zip "http://localhost:8000/api/v1/admin/collections/ABC123/export" \
+      -H "Authorization: Bearer YOUR_TOKEN"
+    ```
+    """
+    collection = await get_collection_by_code(code)
+
+    if not collection:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Collection not found"
+        )
+
+    after_id = None
+    if after:
+        try:
+            after_id = PydanticObjectId(after)
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid photo ID for 'after'"
+            )
+
+    filename = f"{collection.code}-after-{after}.zip" if after else f"{collection.code}.zip"
+
+    return StreamingResponse(
+        export_service.stream_collection_zip(collection.code, after=after_id),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -1,13 +1,19 @@
 """Photo upload API endpoints."""
 
-from typing import List
-from fastapi import APIRouter, UploadFile, File, Request, HTTPException
-from pydantic import BaseModel
+from typing import List, Optional
+from fastapi import APIRouter, UploadFile, File, Form, Header, Request, HTTPException
+from pydantic import BaseModel, Field
 
+from app.models.collection import get_collection_by_code
+from app.models.photo import find_existing_hashes
+from app.services.idempotency_service import IdempotencyKeyMismatch, idempotency_service
 from app.services.photo_service import photo_service
 
 router = APIRouter()
 
+# Longest accepted idempotency key
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
 
 class UploadResult(BaseModel):
     """Result of photo upload operation."""
@@ -15,6 +21,8 @@ class UploadResult(BaseModel):
     filename: str
     photo_id: str | None = None
     file_size: int | None = None
+    deduplicated: bool = False
+    replayed: bool = False  # result of an earlier request with the same idempotency key
     error: str | None = None
 
 
@@ -27,6 +35,56 @@ class UploadResponse(BaseModel):
     failed_count: int
 
 
+class HashCheckItem(BaseModel):
+    """Content hash of a file the client intends to upload."""
+    sha256: str = Field(..., pattern=r"^[0-9a-fA-F]{64}$", description="SHA-256 hex digest")
+    size: int = Field(..., ge=0, description="File size in bytes")
+
+
+class HashCheckRequest(BaseModel):
+    """Request for the hash pre-check endpoint."""
+    files: List[HashCheckItem] = Field(..., min_length=1, max_length=500)
+
+
+class HashCheckResponse(BaseModel):
+    """Response for the hash pre-check endpoint."""
+    existing: List[str]
+    missing: List[str]
+
+
+@router.post(
+    "/collections/{code}/photos/check",
+    response_model=HashCheckResponse,
+    summary="Check for already uploaded photos",
+    description="Check which files (by SHA-256 and size) already exist in a collection"
+)
+async def check_photo_hashes(code: str, request: HashCheckRequest):
+    """
+    Check which files already exist in a collection.
+
+    Clients hash files locally and skip uploading those reported as existing.
+    A file only counts as existing if both hash and size match.
+
+    Args:
+        code: Collection access code
+        request: Up to 500 content hashes with sizes
+
+    Returns:
+        Hashes split into existing and missing
+    """
+    collection = await get_collection_by_code(code)
+    if not collection:
+        raise HTTPException(status_code=404, detail="Collection not found")
+
+    requested = {item.sha256.lower(): item.size for item in request.files}
+    found = await find_existing_hashes(collection.code, list(requested))
+
+    existing = [h for h, size in requested.items() if found.get(h) == size]
+    missing = [h for h, size in requested.items() if found.get(h) != size]
+
+    return HashCheckResponse(existing=existing, missing=missing)
+
+
 @router.post(
     "/collections/{code}/photos",
     response_model=UploadResponse,
@@ -36,15 +94,27 @@ class UploadResponse(BaseModel):
 async def upload_photos(
     code: str,
     request: Request,
-    files: List[UploadFile] = File(...)
+    files: List[UploadFile] = File(...),
+    idempotency_keys: Optional[List[str]] = Form(None, description="One key per file, in file order"),
+    idempotency_key: Optional[str] = Header(None, description="Key of the request")
 ):
     """
     Upload photos to a collection.
 
+    Retries are made safe with idempotency keys, either one per file
+    (`idempotency_keys` form fields, in file order) or one per request
+    (`Idempotency-Key` header, file i then uses "{key}:{i}"). A file whose
+    key already stored a photo in this collection is not processed again:
+    its original result is returned with `replayed` set. A duplicate sent
+    while the first attempt is still running waits for it. Failed files do
+    not use up their key. Keys are kept for `IDEMPOTENCY_KEY_HOURS`.
+
     Args:
         code: Collection access code
         request: FastAPI request object
         files: List of uploaded files
+        idempotency_keys: Optional key per file
+        idempotency_key: Optional key of the request
 
     Returns:
         Upload results with success/failure details
@@ -52,6 +122,15 @@ async def upload_photos(
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
 
+    if idempotency_keys is not None and len(idempotency_keys) != len(files):
+        raise HTTPException(status_code=400, detail="Expected one idempotency key per file")
+
+    keys = idempotency_keys or (
+        [f"{idempotency_key}:{i}" for i in range(len(files))] if idempotency_key else [None] * len(files)
+    )
+    if any(key is not None and not 0 < len(key) <= MAX_IDEMPOTENCY_KEY_LENGTH for key in keys):
+        raise HTTPException(status_code=400, detail="Invalid idempotency key")
+
     # Get uploader info
     uploader_info = {
         'ip_address': request.client.host if request.client else None,
@@ -60,12 +139,28 @@ async def upload_photos(
 
     # Process uploads
     results = []
-    for file in files:
-        result = await photo_service.upload_photo(
+    for file, key in zip(files, keys):
+        upload = lambda file=file: photo_service.upload_photo(
             file=file,
             collection_code=code,
             uploader_info=uploader_info
         )
+
+        if key is None:
+            result = await upload()
+        else:
+            try:
+                result, replayed = await idempotency_service.run(
+                    code.strip().upper(), key, f"{file.filename}|{file.size}", upload
+                )
+                result = {**result, 'replayed': replayed}
+            except IdempotencyKeyMismatch:
+                result = {
+                    'success': False,
+                    'filename': file.filename,
+                    'error': 'Idempotency key was already used for a different file'
+                }
+
         results.append(UploadResult(**result))
 
     # Separate successful and failed uploads
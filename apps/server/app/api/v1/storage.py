@@ -0,0 +1,116 @@
+"""Signed storage API endpoints.
+
+This module serves stored files through signed, expiring URLs. Validation
+needs no database lookup, and the same HMAC scheme can be checked by the
+front proxy so that it never has to call back into the API.
+
+With local storage it also accepts signed direct uploads, standing in for
+the presigned PUT URLs of an object store.
+"""
+
+import uuid
+
+import aiofiles
+from fastapi import APIRouter, HTTPException, Request, status, Query
+
+from app.core.security import verify_storage_signature
+from app.services.delivery_service import delivery_service
+from app.services.storage_service import storage_service
+
+router = APIRouter(prefix="/storage", tags=["storage"])
+
+
+@router.get(
+    "/{file_path:path}",
+    summary="Get stored file",
+    description="Deliver a stored file using a signed, expiring URL."
+)
+async def get_stored_file(
+    file_path: str,
+    expires: int = Query(..., description="Expiry as Unix timestamp"),
+    signature: str = Query(..., description="HMAC-SHA256 signature")
+):
+    """
+    Deliver a stored file.
+
+    Signed URLs are issued by the admin photo endpoints. The signature is
+    `HMAC-SHA256(secret, "{expires}:{file_path}")` in hex.
+    """
+    if not verify_storage_signature(file_path, expires, signature):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid or expired signature"
+        )
+
+    response = await delivery_service.build_response(file_path)
+
+    if response is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+
+    return response
+
+
+@router.put(
+    "/{file_path:path}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Upload file to storage",
+    description="Store a file using a signed, expiring upload URL."
+)
+async def put_stored_file(
+    file_path: str,
+    request: Request,
+    expires: int = Query(..., description="Expiry as Unix timestamp"),
+    size: int = Query(..., ge=0, description="Exact body size in bytes"),
+    signature: str = Query(..., description="HMAC-SHA256 signature")
+):
+    """
+    Upload a file with a signed URL.
+
+    Signed upload URLs are issued by the presign endpoint for direct uploads.
+    The signature is `HMAC-SHA256(secret, "PUT:{expires}:{size}:{file_path}")`
+    in hex, and the body must be exactly `size` bytes.
+
+    ## Example
+    ```bash
+    curl -X PUT "http://localhost:8000/api/v1/storage/incoming/UPLOAD_ID?expires=...&size=...&signature=..." \
+      -H "Content-Type: image/jpeg" \
+      --data-binary @IMG_0001.jpg
+    ```
+    """
+    if not verify_storage_signature(file_path, expires, signature, "PUT", size):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid or expired signature"
+        )
+
+    storage_service.tmp_path.mkdir(parents=True, exist_ok=True)
+    temp_path = storage_service.tmp_path / f"{uuid.uuid4().hex}.part"
+    received = 0
+
+    try:
+        async with aiofiles.open(temp_path, 'wb') as f:
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > size:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="Body exceeds signed size"
+                    )
+                await f.write(chunk)
+
+        if received != size:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Body size {received} does not match signed size {size}"
+            )
+
+        # A retried upload replaces the previous object
+        await storage_service.delete_file(file_path)
+        await storage_service.commit_temp_file(temp_path, file_path, request.headers.get('content-type'))
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+    return None
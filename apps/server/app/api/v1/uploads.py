@@ -0,0 +1,236 @@
+"""Resumable and direct upload API endpoints.
+
+Large files can be sent in chunks: create a session, PATCH bytes at the
+current offset, and complete the session once all bytes are received. After
+a dropped connection, GET the session to learn the offset to resume from.
+
+Alternatively, clients request presigned URLs, PUT files straight to
+storage and finalize each upload; processing then runs in the background.
+"""
+
+from typing import List
+
+from fastapi import APIRouter, Header, HTTPException, Request, status
+
+from app.api.v1.photos import UploadResult
+from app.core.config import settings
+from app.models.upload_session import (
+    DirectUploadRequest,
+    DirectUploadTarget,
+    UploadSession,
+    UploadSessionCreate,
+    UploadSessionResponse,
+    get_upload_session
+)
+from app.services.upload_session_service import upload_session_service
+
+router = APIRouter(prefix="/collections/{code}/uploads", tags=["uploads"])
+
+
+def _session_response(session: UploadSession) -> UploadSessionResponse:
+    """Build an upload session response."""
+    return UploadSessionResponse(
+        upload_id=str(session.id),
+        filename=session.filename,
+        size=session.total_size,
+        offset=session.offset,
+        status=session.status,
+        chunk_size=settings.upload_chunk_size,
+        expires_at=session.expires_at,
+        photo_id=session.photo_id or (session.result or {}).get('photo_id'),
+        error=(session.result or {}).get('error')
+    )
+
+
+def _uploader_info(request: Request) -> dict:
+    """Collect uploader information from the request."""
+    return {
+        'ip_address': request.client.host if request.client else None,
+        'user_agent': request.headers.get('user-agent')
+    }
+
+
+async def _get_session_or_404(code: str, upload_id: str) -> UploadSession:
+    """Load an upload session or raise 404."""
+    session = await get_upload_session(upload_id, code)
+
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found"
+        )
+
+    return session
+
+
+@router.post(
+    "",
+    response_model=UploadSessionResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Start resumable upload",
+    description="Create an upload session for a single large file."
+)
+async def create_upload_session(
+    code: str,
+    data: UploadSessionCreate,
+    request: Request
+):
+    """
+    Start a resumable upload.
+
+    ## Example
+    ```bash
+    curl -X POST http://localhost:8000/api/v1/collections/ABC123/uploads \
+      -H "Content-Type: application/json" \
+      -d '{"filename": "IMG_0001.HEIC", "size": 41943040}'
+    ```
+    """
+    session = await upload_session_service.create_session(
+        collection_code=code,
+        filename=data.filename,
+        size=data.size,
+        uploader_info=_uploader_info(request)
+    )
+
+    return _session_response(session)
+
+
+@router.post(
+    "/presign",
+    response_model=List[DirectUploadTarget],
+    status_code=status.HTTP_201_CREATED,
+    summary="Start direct uploads",
+    description="Get presigned URLs to upload files directly to storage."
+)
+async def create_direct_uploads(
+    code: str,
+    data: DirectUploadRequest,
+    request: Request
+):
+    """
+    Start direct uploads.
+
+    Returns one target per file. PUT the file to `url` with the listed
+    `headers` and a body of exactly the declared size, then call
+    `/{upload_id}/finalize`. Rejected files have `error` set instead.
+
+    ## Example
+    ```bash
+    curl -X POST http://localhost:8000/api/v1/collections/ABC123/uploads/presign \
+      -H "Content-Type: application/json" \
+      -d '{"files": [{"filename": "IMG_0001.jpg", "size": 2048576, "content_type": "image/jpeg"}]}'
+    ```
+    """
+    targets = await upload_session_service.create_direct_uploads(
+        collection_code=code,
+        files=data.files,
+        uploader_info=_uploader_info(request)
+    )
+
+    return [DirectUploadTarget(**target) for target in targets]
+
+
+@router.get(
+    "/{upload_id}",
+    response_model=UploadSessionResponse,
+    summary="Get upload status",
+    description="Get the current offset of an upload session to resume from."
+)
+async def get_upload_session_status(code: str, upload_id: str):
+    """Get the number of bytes received so far."""
+    session = await _get_session_or_404(code, upload_id)
+    return _session_response(session)
+
+
+@router.patch(
+    "/{upload_id}",
+    response_model=UploadSessionResponse,
+    summary="Upload chunk",
+    description="Append raw bytes to an upload session at the given offset."
+)
+async def upload_chunk(
+    code: str,
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., ge=0, alias="Upload-Offset")
+):
+    """
+    Append a chunk of bytes.
+
+    The request body is the raw chunk (`Content-Type: application/offset+octet-stream`).
+    `Upload-Offset` must equal the current session offset, otherwise 409 is
+    returned with the expected offset in the `Upload-Offset` response header.
+
+    ## Example
+    ```bash
+    curl -X PATCH http://localhost:8000/api/v1/collections/ABC123/uploads/UPLOAD_ID \
+      -H "Upload-Offset: 0" \
+      -H "Content-Type: application/offset+octet-stream" \
+      --data-binary @chunk-0
+    ```
+    """
+    session = await _get_session_or_404(code, upload_id)
+
+    session = await upload_session_service.append_chunk(
+        session,
+        offset=upload_offset,
+        chunks=request.stream()
+    )
+
+    return _session_response(session)
+
+
+@router.post(
+    "/{upload_id}/complete",
+    response_model=UploadResult,
+    summary="Complete upload",
+    description="Validate and process a fully received file."
+)
+async def complete_upload(code: str, upload_id: str):
+    """
+    Complete an upload.
+
+    The assembled file goes through the same validation and processing as
+    regular uploads. Repeated calls return the original result.
+    """
+    session = await _get_session_or_404(code, upload_id)
+    result = await upload_session_service.complete_session(session)
+    return UploadResult(**result)
+
+
+@router.post(
+    "/{upload_id}/finalize",
+    response_model=UploadSessionResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Finalize direct upload",
+    description="Register the photo of a direct upload and queue its processing."
+)
+async def finalize_direct_upload(code: str, upload_id: str):
+    """
+    Finalize a direct upload.
+
+    The photo is registered immediately (`photo_id`, status `processing`).
+    Poll `GET /{upload_id}` until the status is `completed` or `failed`.
+    Repeated calls return the same session.
+
+    ## Example
+    ```bash
+    curl -X POST http://localhost:8000/api/v1/collections/ABC123/uploads/UPLOAD_ID/finalize
+    ```
+    """
+    session = await _get_session_or_404(code, upload_id)
+    session = await upload_session_service.finalize_direct_upload(session)
+    return _session_response(session)
+
+
+@router.delete(
+    "/{upload_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Abort upload",
+    description="Abort an upload session and discard received bytes."
+)
+async def abort_upload(code: str, upload_id: str):
+    """Abort an upload session."""
+    session = await _get_session_or_404(code, upload_id)
+    await upload_session_service.abort_session(session)
+    return None
@@ -0,0 +1,274 @@
+"""Admission control for upload requests.
+
+Upload bodies are admitted or rejected from their headers, before any of
+the body is read or parsed:
+
+- 413 if Content-Length exceeds upload_max_request_mb (411 without it)
+- 503 if the request would exceed the global budget of in-flight upload
+  requests or bytes, so the server sheds load instead of buffering
+  unlimited bodies into memory and temporary files
+- 429 if the client's IP address or the target collection has used up
+  its token bucket
+
+Rejections carry Retry-After and close the connection.
+"""
+
+import json
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+
+from app.core.config import settings
+from app.core.metrics import CallbackCounter, Gauge, registry
+
+# Upload routes: (method, path pattern with an optional "code" group)
+UPLOAD_ROUTES: List[Tuple[str, Pattern]] = [
+    ("POST", re.compile(r"^/api/v1/collections/(?P<code>[^/]+)/photos$")),
+    ("PATCH", re.compile(r"^/api/v1/collections/(?P<code>[^/]+)/uploads/[^/]+$")),
+    ("PUT", re.compile(r"^/api/v1/storage/.+$")),
+]
+
+# Token buckets kept per key type; the least recently used are dropped
+MAX_BUCKETS = 10000
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a fixed rate."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate  # tokens per second
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self, now: float) -> float:
+        """
+        Take one token.
+
+        Args:
+            now: time.monotonic()
+
+        Returns:
+            0 if a token was taken, otherwise seconds until one is available
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class TokenBuckets:
+    """Token buckets by key (IP address or collection code), LRU-bounded."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def wait(self, key: str, now: float) -> float:
+        """Seconds until the bucket has a token for the key (0 if taken)."""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            if len(self._buckets) > MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+
+        return bucket.take(now)
+
+
+class AdmissionController:
+    """
+    Budgets and token buckets of upload requests.
+
+    Counters live in this process: with several workers each enforces its
+    own share, so limits are per worker.
+    """
+
+    def __init__(self):
+        self.inflight_requests = 0
+        self.inflight_bytes = 0
+        self.rejected: Dict[int, int] = {}  # status -> count
+        self._ip_buckets = (
+            TokenBuckets(settings.upload_rate_per_ip, settings.upload_burst_per_ip)
+            if settings.upload_rate_per_ip > 0 else None
+        )
+        self._collection_buckets = (
+            TokenBuckets(settings.upload_rate_per_collection, settings.upload_burst_per_collection)
+            if settings.upload_rate_per_collection > 0 else None
+        )
+
+    def admit(
+        self,
+        client_ip: str,
+        collection_code: Optional[str],
+        length: Optional[int]
+    ) -> Optional[Tuple[int, str, Optional[int]]]:
+        """
+        Decide on an upload request; admitted requests must be released.
+
+        Args:
+            client_ip: Client IP address
+            collection_code: Target collection, if known from the path
+            length: Declared body size (Content-Length)
+
+        Returns:
+            None if admitted, otherwise (status, detail, retry_after)
+        """
+        rejection = self._check(client_ip, collection_code, length)
+        if rejection:
+            self.rejected[rejection[0]] = self.rejected.get(rejection[0], 0) + 1
+            return rejection
+
+        self.inflight_requests += 1
+        self.inflight_bytes += length
+        return None
+
+    def release(self, length: int) -> None:
+        """Return the budget of a finished request."""
+        self.inflight_requests -= 1
+        self.inflight_bytes -= length
+
+    def _check(
+        self,
+        client_ip: str,
+        collection_code: Optional[str],
+        length: Optional[int]
+    ) -> Optional[Tuple[int, str, Optional[int]]]:
+        if length is None:
+            return 411, "Content-Length required", None
+
+        if length > settings.upload_max_request_mb * 1024 * 1024:
+            return 413, f"Request exceeds {settings.upload_max_request_mb} MB", None
+
+        # Global budget first: shedding must not use up the clients' tokens.
+        # A single request is always admitted by bytes, however large.
+        max_requests = settings.upload_max_inflight_requests
+        max_bytes = settings.upload_max_inflight_mb * 1024 * 1024
+        if (max_requests and self.inflight_requests >= max_requests) or (
+            max_bytes and self.inflight_requests and self.inflight_bytes + length > max_bytes
+        ):
+            return 503, "Server busy, retry later", settings.upload_retry_after_seconds
+
+        now = time.monotonic()
+        if self._ip_buckets:
+            wait = self._ip_buckets.wait(client_ip, now)
+            if wait:
+                return 429, "Too many uploads from this address", math.ceil(wait)
+
+        if self._collection_buckets and collection_code:
+            wait = self._collection_buckets.wait(collection_code.strip().upper(), now)
+            if wait:
+                return 429, "Too many uploads to this collection", math.ceil(wait)
+
+        return None
+
+
+class AdmissionMiddleware:
+    """ASGI middleware passing upload requests through the admission controller."""
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        match = _match_upload(scope["method"], scope["path"])
+        if match is None:
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        length = _content_length(scope)
+        rejection = admission_controller.admit(
+            client[0] if client else "", match.groupdict().get("code"), length
+        )
+        if rejection:
+            await _reject(send, *rejection)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission_controller.release(length)
+
+
+def check_upload_routes(paths: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Check that every upload pattern matches a route of the API.
+
+    Args:
+        paths: The "paths" of the OpenAPI schema
+
+    Raises:
+        RuntimeError: If a pattern matches no route with its method, so
+            that its uploads would bypass admission control
+    """
+    for method, pattern in UPLOAD_ROUTES:
+        if not any(
+            method.lower() in operations and pattern.match(re.sub(r"\{[^}]+\}", "x", path))
+            for path, operations in paths.items()
+        ):
+            raise RuntimeError(f"Upload route {method} {pattern.pattern} matches no API route")
+
+
+def _match_upload(method: str, path: str) -> Optional["re.Match"]:
+    """Match an upload route."""
+    for route_method, pattern in UPLOAD_ROUTES:
+        if method == route_method:
+            match = pattern.match(path)
+            if match:
+                return match
+    return None
+
+
+def _content_length(scope: Dict[str, Any]) -> Optional[int]:
+    """Declared body size, or None if absent or invalid."""
+    for name, value in scope["headers"]:
+        if name == b"content-length":
+            try:
+                length = int(value)
+            except ValueError:
+                return None
+            return length if length >= 0 else None
+    return None
+
+
+async def _reject(send: Callable, status: int, detail: str, retry_after: Optional[int]) -> None:
+    """Send an error response without reading the request body."""
+    body = json.dumps({"detail": detail}).encode()
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"connection", b"close"),
+    ]
+    if retry_after is not None:
+        headers.append((b"retry-after", str(retry_after).encode()))
+
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+# Global admission controller instance
+admission_controller = AdmissionController()
+
+registry.register(Gauge(
+    "upload_admission_inflight_requests", "Upload requests admitted and not finished",
+    callback=lambda: admission_controller.inflight_requests
+))
+registry.register(Gauge(
+    "upload_admission_inflight_bytes", "Declared bytes of upload requests in flight",
+    callback=lambda: admission_controller.inflight_bytes
+))
+registry.register(CallbackCounter(
+    "upload_admission_rejections_total", "Upload requests rejected by admission control", ["status"],
+    callback=lambda: {(str(status),): count for status, count in admission_controller.rejected.items()}
+))
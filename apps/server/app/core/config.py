@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List, Optional
 import json
 
 
@@ -16,7 +16,85 @@ class Settings(BaseSettings):
 
     # Storage
     storage_type: str = "local"
-    storage_path: str = "./storage"
+    storage_path: str = "./storage"  # local files and temporary uploads
+
+    # Directory fan-out of stored files: uploads/{h[0:w]}/{h[w:2w]}/.../{h}
+    storage_fanout_depth: int = 2  # directory levels
+    storage_fanout_width: int = 2  # hex characters per level (16^w directories each)
+
+    # Local storage volumes as JSON {"id": "/mount/path"}; empty = storage_path only
+    storage_volumes: str = ""
+    storage_volume_min_free_mb: int = 1024  # volumes below this take no new files
+
+    # Thumbnails: "files" (one file each, any backend) or "segments" (packed
+    # append-only segment files under storage_path/segments, local only)
+    thumbnail_store: str = "files"
+    thumbnail_segment_max_mb: int = 1024
+
+    # S3-compatible object storage (storage_type = "s3")
+    s3_endpoint_url: Optional[str] = None  # e.g. http://minio:9000, None for AWS
+    s3_bucket: str = "photos"
+    s3_region: str = "us-east-1"
+    s3_access_key_id: Optional[str] = None
+    s3_secret_access_key: Optional[str] = None
+    s3_max_pool_connections: int = 20
+    s3_multipart_threshold: int = 16 * 1024 * 1024  # bytes
+    s3_multipart_chunk_size: int = 8 * 1024 * 1024  # bytes, S3 minimum is 5 MB
+    s3_max_concurrency: int = 4  # parallel parts per multipart upload
+
+    # Images with more pixels are rejected from their header, before any decode
+    max_image_megapixels: int = 100
+
+    # EXIF: typed fields kept on photos as JSON list (empty = all supported,
+    # see image_service.EXIF_FIELDS); raw EXIF blocks are only kept when
+    # store_raw_exif is set, in a separate collection
+    exif_fields: str = ""
+    store_raw_exif: bool = False
+
+    # Gallery sprite sheets (one JPEG per page of thumbnails)
+    sprite_cell_size: int = 160  # pixels, thumbnails are cropped to square cells
+    sprite_columns: int = 10
+    sprite_unused_days: int = 7  # removed by scripts/cleanup_sprite_sheets when not served for this long
+
+    # Map clustering: grid cell size on screen (256-pixel Web Mercator tiles)
+    map_cluster_cell_pixels: int = 64
+
+    # Resumable uploads
+    upload_session_expires_hours: int = 24
+    upload_chunk_size: int = 8 * 1024 * 1024  # recommended chunk size in bytes
+    upload_complete_lease_seconds: int = 300  # an unfinished completion is taken over after this
+
+    # Idempotency keys of photo uploads: results are replayed for this long
+    idempotency_key_hours: int = 24
+    idempotency_lock_seconds: int = 300  # an unfinished attempt is taken over after this
+
+    # Upload admission control: upload bodies are admitted from their headers
+    upload_max_request_mb: int = 500  # larger requests are rejected (413)
+    upload_max_inflight_requests: int = 32  # over budget: 503 (0 = unlimited)
+    upload_max_inflight_mb: int = 1024
+    upload_retry_after_seconds: int = 2
+    upload_rate_per_ip: float = 2.0  # requests per second, 429 when exceeded (0 = off)
+    upload_burst_per_ip: int = 30
+    upload_rate_per_collection: float = 50.0
+    upload_burst_per_collection: int = 500
+
+    # Background processing of direct uploads
+    processing_workers: int = 2
+
+    # Recompute system statistics to repair drift every N minutes (0 = off)
+    statistics_reconcile_minutes: int = 60
+
+    # Live upload events (server-sent events on /admin/events)
+    live_events_source: str = "local"  # local (this process) or change_stream (replica set)
+    live_events_interval_ms: int = 1000  # events are coalesced and sent at most this often
+    live_events_max_photos: int = 100  # new photos kept per client between sends
+    live_events_max_clients: int = 200
+
+    # File delivery
+    file_delivery_mode: str = "direct"  # direct, x-accel-redirect, x-sendfile
+    file_delivery_internal_prefix: str = "/protected"  # nginx internal location
+    signed_url_secret: Optional[str] = None  # defaults to jwt_secret
+    signed_url_expires_minutes: int = 60
 
     # Security
     jwt_secret: str
@@ -31,6 +109,16 @@ class Settings(BaseSettings):
         """Parse CORS origins from JSON string."""
         return json.loads(self.cors_origins)
 
+    @property
+    def exif_fields_list(self) -> List[str]:
+        """Parse EXIF field whitelist from JSON string."""
+        return json.loads(self.exif_fields) if self.exif_fields else []
+
+    @property
+    def storage_volumes_map(self) -> Dict[str, str]:
+        """Parse storage volumes from JSON string."""
+        return json.loads(self.storage_volumes) if self.storage_volumes else {}
+
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -47,6 +47,13 @@ async def init_db():
         from app.models.user import User
         from app.models.collection import Collection
         from app.models.photo import Photo
+        from app.models.blob import Blob
+        from app.models.upload_session import UploadSession
+        from app.models.sprite_sheet import SpriteSheet
+        from app.models.photo_exif import PhotoExif
+        from app.models.upload_rollup import UploadRollup, UploadRollupUploader
+        from app.models.system_statistics import SystemStatistics
+        from app.models.idempotency_key import IdempotencyKey
 
         database = mongo_client[settings.mongodb_db_name]
 
@@ -57,6 +64,14 @@ async def init_db():
                 User,
                 Collection,
                 Photo,
+                Blob,
+                UploadSession,
+                SpriteSheet,
+                PhotoExif,
+                UploadRollup,
+                UploadRollupUploader,
+                SystemStatistics,
+                IdempotencyKey,
             ]
         )
 
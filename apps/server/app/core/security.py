@@ -1,5 +1,8 @@
 """Security utilities for JWT token management and password hashing."""
 
+import hashlib
+import hmac
+import time
 from datetime import datetime, timedelta
 from typing import Any, Dict, Optional
 
@@ -110,3 +113,72 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         >>> is_valid = verify_password("my_password", hashed_password)
     """
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def sign_storage_path(
+    path: str,
+    expires: int,
+    method: str = "GET",
+    size: Optional[int] = None
+) -> str:
+    """
+    Sign a storage path for time-limited access.
+
+    Read access is signed as HMAC-SHA256 over "{expires}:{path}" (hex encoded),
+    so a front proxy holding the same secret can validate it without calling
+    the API. Write access is bound to the method and the exact body size:
+    "{method}:{expires}:{size}:{path}".
+
+    Args:
+        path: Storage path relative to the storage root (e.g. "uploads/ABC123/a.jpg")
+        expires: Expiry as a Unix timestamp (seconds)
+        method: HTTP method the signature is valid for
+        size: Exact body size in bytes (for uploads)
+
+    Returns:
+        Hex-encoded signature string
+
+    Example:
+        >>> signature = sign_storage_path("uploads/ABC123/a.jpg", 1735689600)
+        >>> upload_signature = sign_storage_path("incoming/abc", 1735689600, "PUT", 1048576)
+    """
+    secret = settings.signed_url_secret or settings.jwt_secret
+
+    if method == "GET":
+        message = f"{expires}:{path}"
+    else:
+        message = f"{method}:{expires}:{size}:{path}"
+
+    return hmac.new(secret.encode("utf-8"), message.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def verify_storage_signature(
+    path: str,
+    expires: int,
+    signature: str,
+    method: str = "GET",
+    size: Optional[int] = None
+) -> bool:
+    """
+    Verify a signature produced by sign_storage_path.
+
+    Args:
+        path: Storage path the signature was issued for
+        expires: Expiry Unix timestamp from the signed URL
+        signature: Hex-encoded signature from the signed URL
+        method: HTTP method of the request
+        size: Body size from the signed URL (for uploads)
+
+    Returns:
+        True if the signature matches and has not expired, False otherwise
+    """
+    if expires < int(time.time()):
+        return False
+
+    # compare_digest raises TypeError on non-ASCII strings; such a
+    # signature cannot match a hex digest anyway
+    if not signature.isascii():
+        return False
+
+    expected = sign_storage_path(path, expires, method, size)
+    return hmac.compare_digest(expected, signature)
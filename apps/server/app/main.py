@@ -1,10 +1,18 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 import logging
 
+from app.core.admission import AdmissionMiddleware, check_upload_routes
 from app.core.config import settings
+from app.core.metrics import CONTENT_TYPE, registry
 from app.core.database import connect_to_mongo, init_db, close_mongo_connection
 from app.api.v1 import api_router
+from app.services.event_service import event_service
+from app.services.processing_service import processing_service
+from app.services.statistics_service import statistics_service
+from app.services.storage_service import storage_service
+from app.services.upload_session_service import upload_session_service
 
 # Configure logging
 logging.basicConfig(
@@ -21,6 +29,9 @@ app = FastAPI(
     description="Photo Collection Management System API"
 )
 
+# Admit upload bodies within budgets (inside CORS, so rejections carry its headers)
+app.add_middleware(AdmissionMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -33,6 +44,9 @@ app.add_middleware(
 # Include API v1 router
 app.include_router(api_router)
 
+# Fail fast if an upload route moved without its admission pattern
+check_upload_routes(app.openapi()["paths"])
+
 
 @app.on_event("startup")
 async def startup_event():
@@ -40,6 +54,24 @@ async def startup_event():
     logger.info("Starting up...")
     await connect_to_mongo()
     await init_db()
+
+    # Remove temporary files of expired resumable uploads
+    removed = upload_session_service.cleanup_stale_files()
+    if removed:
+        logger.info(f"Removed {removed} stale upload files")
+
+    # Background processing of direct uploads
+    processing_service.start()
+    requeued = await upload_session_service.requeue_direct_uploads()
+    if requeued:
+        logger.info(f"Requeued {requeued} direct uploads for processing")
+
+    # Periodic repair of dashboard statistics
+    statistics_service.start()
+
+    # Live upload events from MongoDB change streams (if configured)
+    event_service.start()
+
     logger.info("Startup complete")
 
 
@@ -47,6 +79,10 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown."""
     logger.info("Shutting down...")
+    await processing_service.stop()
+    await statistics_service.stop()
+    await event_service.stop()
+    await storage_service.close()
     await close_mongo_connection()
     logger.info("Shutdown complete")
 
@@ -65,3 +101,9 @@ async def root():
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics of this worker process."""
+    return Response(registry.render(), media_type=CONTENT_TYPE)
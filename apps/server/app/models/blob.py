@@ -0,0 +1,250 @@
+"""Blob model for content-addressed file storage.
+
+Each stored original is identified by the SHA-256 of its bytes. Photos with
+identical content share one Blob, which is reference-counted so the file and
+its thumbnail are only removed when the last photo referencing them goes away.
+
+A blob whose last reference was released is kept as a tombstone (status
+"deleting") until its files are removed, so that a concurrent upload of the
+same content waits instead of writing a file that is about to be deleted.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any
+
+from beanie import Document, Indexed, UpdateResponse
+from beanie.operators import Inc, Set
+from pydantic import Field
+from pymongo.errors import DuplicateKeyError
+
+from app.models.photo import Photo
+
+# A tombstone older than this was abandoned (process stopped while deleting
+# the files) and is taken over by the next upload of its content
+DELETE_TIMEOUT = timedelta(seconds=60)
+
+# Polling of a tombstone by an upload of the same content (seconds)
+DELETE_POLL = 0.05
+
+
+class Blob(Document):
+    """
+    Blob document model for MongoDB.
+
+    Represents one physical file in storage, shared by every photo with the
+    same content hash.
+    """
+
+    # SHA-256 of the file content (hex)
+    sha256: Indexed(str, unique=True)
+
+    # File information
+    size: int  # in bytes
+    file_path: str
+    thumbnail_path: Optional[str] = None
+    volume_id: Optional[str] = None  # local storage volume holding the files
+
+    # Number of photos referencing this blob
+    ref_count: int = 0
+
+    status: str = "active"  # active, deleting (files being removed)
+    deleting_since: Optional[datetime] = None
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        # The unique index on sha256 is declared by Indexed(): listing the
+        # field here as well would replace it with a non-unique one
+        name = "blobs"
+
+
+# Database Operations
+
+async def acquire_blob(sha256: str, size: int, file_path: str) -> Blob:
+    """
+    Add a reference to a blob, creating it if it does not exist.
+
+    The unique index on sha256 guarantees that concurrent uploads of the same
+    content end up sharing a single blob. While the blob is a tombstone, the
+    call waits until its files are removed (or takes it over once abandoned).
+
+    Args:
+        sha256: Content hash
+        size: File size in bytes
+        file_path: Relative storage path of the file
+
+    Returns:
+        Blob document after the reference was added (ref_count == 1 means new)
+    """
+    while True:
+        try:
+            return await Blob.find_one(Blob.sha256 == sha256, Blob.status != "deleting").upsert(
+                Inc({Blob.ref_count: 1}),
+                on_insert=Blob(sha256=sha256, size=size, file_path=file_path, ref_count=1),
+                response_type=UpdateResponse.NEW_DOCUMENT
+            )
+        except DuplicateKeyError:
+            pass
+
+        # Inserted concurrently by another upload of the same content
+        blob = await Blob.find_one(Blob.sha256 == sha256, Blob.status != "deleting").update(
+            Inc({Blob.ref_count: 1}),
+            response_type=UpdateResponse.NEW_DOCUMENT
+        )
+        if blob:
+            return blob
+
+        # A tombstone: its files may be gone, so it is reset like a new blob
+        blob = await Blob.find_one(
+            Blob.sha256 == sha256,
+            Blob.status == "deleting",
+            Blob.deleting_since < datetime.utcnow() - DELETE_TIMEOUT
+        ).update(
+            Set({
+                Blob.status: "active",
+                Blob.deleting_since: None,
+                Blob.ref_count: 1,
+                Blob.size: size,
+                Blob.file_path: file_path,
+                Blob.thumbnail_path: None
+            }),
+            response_type=UpdateResponse.NEW_DOCUMENT
+        )
+        if blob:
+            return blob
+
+        await asyncio.sleep(DELETE_POLL)
+
+
+async def release_blob(sha256: str) -> Optional[Blob]:
+    """
+    Drop a reference to a blob, making it a tombstone when none remain.
+
+    The caller removes the files of a returned tombstone, checking
+    is_blob_deleting before each, and then calls remove_blob.
+
+    Args:
+        sha256: Content hash
+
+    Returns:
+        The tombstone if this was the last reference, None otherwise
+    """
+    blob = await Blob.find_one(Blob.sha256 == sha256).update(
+        Inc({Blob.ref_count: -1}),
+        response_type=UpdateResponse.NEW_DOCUMENT
+    )
+
+    if blob is None or blob.ref_count > 0:
+        return None
+
+    # None if re-acquired concurrently
+    return await Blob.find_one(
+        Blob.sha256 == sha256,
+        Blob.ref_count <= 0,
+        Blob.status != "deleting"
+    ).update(
+        Set({Blob.status: "deleting", Blob.deleting_since: datetime.utcnow()}),
+        response_type=UpdateResponse.NEW_DOCUMENT
+    )
+
+
+async def is_blob_deleting(blob: Blob) -> bool:
+    """
+    Check that a tombstone was not taken over by an upload meanwhile.
+
+    Args:
+        blob: Tombstone returned by release_blob
+
+    Returns:
+        True if its files may still be removed
+    """
+    return await Blob.find_one(
+        Blob.sha256 == blob.sha256,
+        Blob.status == "deleting",
+        Blob.deleting_since == blob.deleting_since
+    ) is not None
+
+
+async def remove_blob(blob: Blob) -> None:
+    """
+    Delete a tombstone once its files are removed.
+
+    Args:
+        blob: Tombstone returned by release_blob
+    """
+    await Blob.find_one(
+        Blob.sha256 == blob.sha256,
+        Blob.status == "deleting",
+        Blob.deleting_since == blob.deleting_since
+    ).delete()
+
+
+async def set_blob_thumbnail(sha256: str, thumbnail_path: str) -> None:
+    """
+    Record the thumbnail generated for a blob.
+
+    Args:
+        sha256: Content hash
+        thumbnail_path: Relative storage path of the thumbnail
+    """
+    await Blob.find_one(Blob.sha256 == sha256).update(
+        Set({Blob.thumbnail_path: thumbnail_path})
+    )
+
+
+async def set_blob_volume(sha256: str, volume_id: Optional[str]) -> None:
+    """
+    Record the storage volume holding a blob's files.
+
+    Photos referencing the blob are updated as well.
+
+    Args:
+        sha256: Content hash
+        volume_id: Volume ID
+    """
+    await Blob.find_one(Blob.sha256 == sha256).update(
+        Set({Blob.volume_id: volume_id})
+    )
+    await Photo.find(Photo.content_hash == sha256).update(
+        Set({Photo.volume_id: volume_id})
+    )
+
+
+async def get_dedup_report() -> Dict[str, Any]:
+    """
+    Summarize storage savings from deduplication.
+
+    Returns:
+        Dictionary with blob count, logical bytes (as uploaded), physical bytes
+        (as stored) and bytes saved
+    """
+    pipeline = [
+        {"$match": {"ref_count": {"$gt": 0}}},
+        {"$group": {
+            "_id": None,
+            "blobs": {"$sum": 1},
+            "references": {"$sum": "$ref_count"},
+            "physical_bytes": {"$sum": "$size"},
+            "logical_bytes": {"$sum": {"$multiply": ["$size", "$ref_count"]}}
+        }}
+    ]
+    results = await Blob.aggregate(pipeline).to_list()
+
+    if not results:
+        return {
+            "blobs": 0,
+            "references": 0,
+            "physical_bytes": 0,
+            "logical_bytes": 0,
+            "bytes_saved": 0
+        }
+
+    report = results[0]
+    return {
+        "blobs": report["blobs"],
+        "references": report["references"],
+        "physical_bytes": report["physical_bytes"],
+        "logical_bytes": report["logical_bytes"],
+        "bytes_saved": report["logical_bytes"] - report["physical_bytes"]
+    }
@@ -9,6 +9,9 @@ from typing import Optional, List
 
 from beanie import Document, Indexed
 from pydantic import BaseModel, Field, validator
+from pymongo import ASCENDING, TEXT, IndexModel, ReturnDocument
+
+from app.utils.search_terms import prefix_pattern, search_terms, words
 
 
 class Collection(Document):
@@ -47,11 +50,18 @@ class Collection(Document):
         }
     )
 
+    # Incremented whenever a photo is added to or removed from the
+    # statistics, so in-memory indexes of the photos can tell they are stale
+    photos_version: int = 0
+
     # Metadata
     created_at: datetime = Field(default_factory=datetime.utcnow)
     created_by: str  # Username of creator
     is_deleted: bool = False  # Soft delete flag
 
+    # Normalized words of name and code for prefix search (see search_terms)
+    search_terms: List[str] = Field(default_factory=list)
+
     class Settings:
         """Beanie ODM settings."""
         name = "collections"
@@ -60,6 +70,19 @@ class Collection(Document):
             "created_at",
             "status",
             "is_deleted",
+            # Autocomplete: anchored prefix regex on normalized words
+            IndexModel(
+                [("search_terms", ASCENDING)],
+                name="search_terms",
+                partialFilterExpression={"is_deleted": False}
+            ),
+            # Word search over name, code and description
+            IndexModel(
+                [("name", TEXT), ("code", TEXT), ("description", TEXT)],
+                name="collection_text",
+                weights={"name": 10, "code": 10, "description": 1},
+                default_language="none"
+            ),
         ]
 
     class Config:
@@ -242,10 +265,15 @@ async def create_collection(
         description=data.description,
         status=data.status,
         settings=final_settings,
-        created_by=created_by
+        created_by=created_by,
+        search_terms=search_terms(data.name, code)
     )
 
     await collection.insert()
+
+    from app.models.system_statistics import record_collection_change
+    await record_collection_change(None, collection.status)
+
     return collection
 
 
@@ -281,6 +309,54 @@ async def list_collections(
     return await query.sort("-created_at").skip(skip).limit(limit).to_list()
 
 
+async def search_collections(
+    query: str,
+    mode: str = "prefix",
+    limit: int = 20,
+    status_filter: Optional[str] = None
+) -> List[Collection]:
+    """
+    Search collections by name, code or description.
+
+    In "prefix" mode (autocomplete) every word of the query must begin a
+    word of the name or code, ignoring case and accents; matches come in
+    order of the matched word. In "text" mode the query is a MongoDB text
+    search over name, code and description, best matches first.
+
+    Args:
+        query: Search text
+        mode: prefix or text
+        limit: Maximum number of results
+        status_filter: Optional status filter (active/archived/closed)
+
+    Returns:
+        List of Collection documents
+
+    Example:
+        >>> # Autocomplete while typing "hochzeit mül"
+        >>> found = await search_collections("hochzeit mül")
+    """
+    filters = {"is_deleted": False}
+    if status_filter:
+        filters["status"] = status_filter
+
+    if mode == "text":
+        filters["$text"] = {"$search": query}
+        return await Collection.find(filters).sort(
+            ("score", {"$meta": "textScore"})
+        ).limit(limit).to_list()
+
+    prefixes = words(query)
+    if not prefixes:
+        return []
+
+    # Longest prefix first: the most selective index range
+    prefixes.sort(key=len, reverse=True)
+    filters["$and"] = [{"search_terms": {"$regex": prefix_pattern(p)}} for p in prefixes]
+
+    return await Collection.find(filters).limit(limit).to_list()
+
+
 async def update_collection(
     code: str,
     data: CollectionUpdate
@@ -304,12 +380,21 @@ async def update_collection(
     if not collection:
         return None
 
-    # Update only provided fields
+    old_status = collection.status
+
+    # Update only provided fields ($set, as a full save would overwrite the
+    # counters uploads change concurrently)
     update_data = data.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(collection, field, value)
+    if "name" in update_data:
+        update_data["search_terms"] = search_terms(update_data["name"], collection.code)
+
+    if update_data:
+        await collection.set(update_data)
+
+    if collection.status != old_status:
+        from app.models.system_statistics import record_collection_change
+        await record_collection_change(old_status, collection.status)
 
-    await collection.save()
     return collection
 
 
@@ -334,39 +419,73 @@ async def delete_collection(code: str) -> bool:
         return False
 
     # Soft delete: mark as deleted instead of removing
-    collection.is_deleted = True
-    await collection.save()
+    await collection.set({Collection.is_deleted: True})
+
+    from app.models.system_statistics import record_collection_change
+    await record_collection_change(collection.status, "deleted")
+
     return True
 
 
 async def update_statistics(
     code: str,
-    photo_size: int
-) -> Optional[Collection]:
+    photo_size: int,
+    photo_delta: int = 1
+) -> Optional[dict]:
     """
-    Update collection statistics after a photo upload.
+    Update collection statistics after a photo upload or deletion.
+
+    Counters are changed with one atomic $inc, so concurrent uploads and
+    edits of the collection do not overwrite each other. The photos_version
+    is incremented with them.
 
     Args:
         code: Collection code
-        photo_size: Size of uploaded photo in bytes
+        photo_size: Size of the photo in bytes (negative on deletion)
+        photo_delta: Change in photo count (-1 on deletion)
 
     Returns:
-        Updated Collection document, or None if not found
+        Dictionary with the updated statistics and photos_version, or None
+        if the collection was not found
 
     Example:
-        >>> collection = await update_statistics("ABC123", photo_size=1024000)
+        >>> updated = await update_statistics("ABC123", photo_size=1024000)
+        >>> updated["statistics"]["total_photos"]
     """
-    collection = await get_collection_by_code(code)
+    update = {
+        "$inc": {
+            "statistics.total_photos": photo_delta,
+            "statistics.total_size_bytes": photo_size,
+            "photos_version": 1
+        }
+    }
+    if photo_delta > 0:
+        update["$max"] = {"statistics.last_upload_at": datetime.now()}
+
+    updated = await Collection.get_motor_collection().find_one_and_update(
+        {"code": code.strip().upper()},
+        update,
+        projection={"_id": 0, "statistics": 1, "photos_version": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    return updated
 
-    if not collection:
-        return None
 
-    collection.statistics["total_photos"] += 1
-    collection.statistics["total_size_bytes"] += photo_size
-    collection.statistics["last_upload_at"] = datetime.utcnow()
+async def get_photos_version(code: str) -> int:
+    """
+    Get the photos_version of a collection (0 if not found).
 
-    await collection.save()
-    return collection
+    Args:
+        code: Collection code
+
+    Returns:
+        Current photos_version
+    """
+    doc = await Collection.get_motor_collection().find_one(
+        {"code": code.strip().upper()},
+        projection={"_id": 0, "photos_version": 1}
+    )
+    return doc.get("photos_version", 0) if doc else 0
 
 
 async def count_collections(status_filter: Optional[str] = None) -> int:
@@ -0,0 +1,158 @@
+"""Idempotency key model for replaying retried uploads.
+
+Clients send a key with each file they upload (or one per request, see
+photos.upload_photos). The first attempt claims the key; once the photo is
+stored its result is recorded, so a retry with the same key gets the
+original result back without the file being processed or stored again.
+Records are removed by a TTL index after settings.idempotency_key_hours.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from beanie import Document
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import settings
+
+
+class IdempotencyKey(Document):
+    """Claim and result of one client-supplied idempotency key."""
+
+    scope: str  # collection code the key was used with
+    key: str
+
+    # Identifies the file sent with the key (filename and size), so a key
+    # reused for a different file is not answered with the wrong result
+    fingerprint: str
+
+    status: str = "in_progress"  # in_progress, completed
+    result: Optional[Dict[str, Any]] = None  # UploadResult of the completed attempt
+
+    # An in-progress claim older than this was abandoned (process stopped)
+    locked_until: datetime
+    # Identifies the current claimant: only it may complete or release the
+    # key, not an attempt whose claim expired and was taken over
+    claim_token: Optional[str] = None
+    expires_at: datetime  # removed by the TTL index
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "idempotency_keys"
+        indexes = [
+            IndexModel([("scope", ASCENDING), ("key", ASCENDING)], name="scope_key", unique=True),
+            IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+        ]
+
+
+# Database Operations
+
+async def claim_idempotency_key(
+    scope: str,
+    key: str,
+    fingerprint: str
+) -> Tuple[bool, Optional[IdempotencyKey]]:
+    """
+    Claim a key for a new attempt.
+
+    An in-progress claim whose lock has expired is taken over.
+
+    Args:
+        scope: Collection code
+        key: Client-supplied key
+        fingerprint: Identity of the file sent with the key
+
+    Returns:
+        (claimed, record): record is the claimed one (with its claim_token)
+        or the existing one if not claimed, or None if it disappeared
+        meanwhile (claim again)
+    """
+    now = datetime.utcnow()
+    locked_until = now + timedelta(seconds=settings.idempotency_lock_seconds)
+    claim_token = uuid.uuid4().hex
+
+    try:
+        record = IdempotencyKey(
+            scope=scope,
+            key=key,
+            fingerprint=fingerprint,
+            locked_until=locked_until,
+            claim_token=claim_token,
+            expires_at=now + timedelta(hours=settings.idempotency_key_hours)
+        )
+        await record.insert()
+        return True, record
+    except DuplicateKeyError:
+        pass
+
+    taken = await IdempotencyKey.get_motor_collection().find_one_and_update(
+        {
+            "scope": scope,
+            "key": key,
+            "fingerprint": fingerprint,
+            "status": "in_progress",
+            "locked_until": {"$lt": now}
+        },
+        {"$set": {"locked_until": locked_until, "claim_token": claim_token}},
+        return_document=ReturnDocument.AFTER
+    )
+    if taken:
+        return True, IdempotencyKey.model_validate(taken)
+
+    return False, await get_idempotency_key(scope, key)
+
+
+async def get_idempotency_key(scope: str, key: str) -> Optional[IdempotencyKey]:
+    """
+    Get the record of a key.
+
+    Args:
+        scope: Collection code
+        key: Client-supplied key
+
+    Returns:
+        IdempotencyKey if found, None otherwise
+    """
+    return await IdempotencyKey.find_one(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+
+
+async def complete_idempotency_key(
+    scope: str,
+    key: str,
+    claim_token: str,
+    result: Dict[str, Any]
+) -> bool:
+    """
+    Record the result of a claimed key.
+
+    Args:
+        scope: Collection code
+        key: Client-supplied key
+        claim_token: Token of the claim (see claim_idempotency_key)
+        result: UploadResult to replay
+
+    Returns:
+        False if the claim was taken over meanwhile (nothing recorded)
+    """
+    updated = await IdempotencyKey.get_motor_collection().update_one(
+        {"scope": scope, "key": key, "status": "in_progress", "claim_token": claim_token},
+        {"$set": {"status": "completed", "result": result}}
+    )
+    return updated.modified_count > 0
+
+
+async def release_idempotency_key(scope: str, key: str, claim_token: str) -> None:
+    """
+    Drop an unfinished claim so that a retry is processed again.
+
+    Args:
+        scope: Collection code
+        key: Client-supplied key
+        claim_token: Token of the claim (see claim_idempotency_key)
+    """
+    await IdempotencyKey.get_motor_collection().delete_one(
+        {"scope": scope, "key": key, "status": "in_progress", "claim_token": claim_token}
+    )
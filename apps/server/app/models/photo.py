@@ -5,10 +5,11 @@ for creating and managing uploaded photos.
 """
 
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 
 from beanie import Document, Indexed
 from pydantic import BaseModel, Field
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, IndexModel
 
 
 class Photo(Document):
@@ -27,28 +28,84 @@ class Photo(Document):
     thumbnail_path: Optional[str] = None
     file_size: int  # in bytes
     mime_type: str
+    content_hash: Optional[str] = None  # SHA-256 of the content (see Blob)
+    volume_id: Optional[str] = None  # local storage volume holding the file
 
     # Image dimensions
     dimensions: Dict[str, int] = Field(default_factory=dict)  # {width, height}
 
+    # 64-bit perceptual hash (16 hex chars) for near-duplicate detection
+    perceptual_hash: Optional[str] = None
+
+    # Placeholders shown before the thumbnail loads
+    blurhash: Optional[str] = None
+    dominant_color: Optional[str] = None  # "#rrggbb"
+
     # Upload information
     uploaded_at: Indexed(datetime) = Field(default_factory=datetime.now)
     uploader_info: Dict[str, Optional[str]] = Field(default_factory=dict)  # {ip_address, user_agent}
 
-    # EXIF metadata
-    metadata: Dict[str, Any] = Field(default_factory=dict)  # {camera_make, camera_model, exif_data}
+    # Typed EXIF fields present in the image (see image_service.EXIF_FIELDS):
+    # {camera_make, camera_model, captured_at, exposure_time, f_number, iso,
+    #  focal_length, orientation, gps_latitude, gps_longitude, ...}
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+    # GPS position as GeoJSON point {type: "Point", coordinates: [longitude, latitude]}
+    location: Optional[Dict[str, Any]] = None
 
     # Processing status
     processing_status: str = "pending"  # pending, processed, failed
 
     # Soft delete
     is_deleted: bool = False
+    deleted_at: Optional[datetime] = None
 
     class Settings:
         name = "photos"
         indexes = [
             "collection_code",
             "uploaded_at",
+            "content_hash",
+            # Incremental statistics reconciliation: photos deleted since a watermark
+            IndexModel(
+                [("deleted_at", ASCENDING)],
+                name="deleted_at",
+                partialFilterExpression={"deleted_at": {"$type": "date"}}
+            ),
+            # Hash pre-check: one indexed $in query per batch
+            IndexModel(
+                [("collection_code", ASCENDING), ("content_hash", ASCENDING)],
+                name="collection_code_content_hash"
+            ),
+            # Map queries: photos of a collection within a bounding box
+            IndexModel(
+                [("collection_code", ASCENDING), ("location", GEOSPHERE)],
+                name="collection_code_location"
+            ),
+            # Search and listing (see build_search_query): equality fields
+            # first, then the sort key, which also serves range filters on
+            # it. Only live photos are indexed.
+            IndexModel(
+                [("collection_code", ASCENDING), ("uploaded_at", DESCENDING), ("_id", DESCENDING)],
+                name="search_uploaded",
+                partialFilterExpression={"is_deleted": False}
+            ),
+            IndexModel(
+                [("collection_code", ASCENDING), ("metadata.captured_at", DESCENDING), ("_id", DESCENDING)],
+                name="search_captured",
+                partialFilterExpression={"is_deleted": False}
+            ),
+            IndexModel(
+                [
+                    ("collection_code", ASCENDING),
+                    ("metadata.camera_make", ASCENDING),
+                    ("metadata.camera_model", ASCENDING),
+                    ("metadata.captured_at", DESCENDING),
+                    ("_id", DESCENDING),
+                ],
+                name="search_camera",
+                partialFilterExpression={"is_deleted": False}
+            ),
         ]
 
 
@@ -61,9 +118,15 @@ class PhotoCreate(BaseModel):
     thumbnail_path: Optional[str] = None
     file_size: int
     mime_type: str
+    content_hash: Optional[str] = None
+    volume_id: Optional[str] = None
+    perceptual_hash: Optional[str] = None
+    blurhash: Optional[str] = None
+    dominant_color: Optional[str] = None
     dimensions: Dict[str, int] = Field(default_factory=dict)
     uploader_info: Dict[str, Optional[str]] = Field(default_factory=dict)
     metadata: Dict[str, Any] = Field(default_factory=dict)
+    location: Optional[Dict[str, Any]] = None
 
 
 class PhotoResponse(BaseModel):
@@ -77,10 +140,354 @@ class PhotoResponse(BaseModel):
     file_size: int
     mime_type: str
     dimensions: Dict[str, int]
+    perceptual_hash: Optional[str] = None
+    blurhash: Optional[str] = None
+    dominant_color: Optional[str] = None
     uploaded_at: datetime
     uploader_info: Dict[str, Optional[str]]
     metadata: Dict[str, Any]
+    location: Optional[Dict[str, Any]] = None
     processing_status: str
+    file_url: Optional[str] = None  # Signed URL for the original
+    thumbnail_url: Optional[str] = None  # Signed URL for the thumbnail
+    urls_expire_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
+
+
+class PhotoSearchResponse(BaseModel):
+    """Schema for a page of photo search results."""
+
+    photos: List[PhotoResponse]
+    next_cursor: Optional[str] = None  # pass as cursor for the next page
+
+
+class PhotoCluster(BaseModel):
+    """Photos of one map grid cell."""
+
+    latitude: float  # mean position of the photos
+    longitude: float
+    count: int
+    bounds: List[float]  # [west, south, east, north] of the photos
+    photo_id: Optional[str] = None  # set if the cluster is a single photo
+
+
+class PhotoClusterResponse(BaseModel):
+    """Schema for clustered map markers."""
+
+    zoom: int
+    cell_degrees: float
+    total_photos: int
+    clusters: List[PhotoCluster]
+
+
+# Database Operations
+
+async def get_photo_by_id(photo_id: str) -> Optional[Photo]:
+    """
+    Retrieve a photo by its MongoDB ID.
+
+    Args:
+        photo_id: MongoDB ObjectId as string
+
+    Returns:
+        Photo document if found and not deleted, None otherwise
+    """
+    try:
+        photo = await Photo.get(photo_id)
+    except Exception:
+        # Malformed ObjectId
+        return None
+
+    if photo is None or photo.is_deleted:
+        return None
+
+    return photo
+
+
+async def get_photo_by_content_hash(content_hash: str) -> Optional[Photo]:
+    """
+    Retrieve any processed photo with the given content hash.
+
+    Used to reuse metadata when identical bytes are uploaded again.
+
+    Args:
+        content_hash: SHA-256 hex digest
+
+    Returns:
+        Photo document if found, None otherwise
+    """
+    return await Photo.find_one(
+        Photo.content_hash == content_hash,
+        Photo.processing_status == "processed"
+    )
+
+
+async def find_existing_hashes(
+    collection_code: str,
+    content_hashes: List[str]
+) -> Dict[str, int]:
+    """
+    Find which content hashes already exist in a collection.
+
+    Args:
+        collection_code: Collection code (case-insensitive)
+        content_hashes: SHA-256 hex digests to look up
+
+    Returns:
+        Mapping of existing content hash to file size
+    """
+    cursor = Photo.get_motor_collection().find(
+        {
+            "collection_code": collection_code.strip().upper(),
+            "content_hash": {"$in": content_hashes},
+            "is_deleted": False
+        },
+        projection={"_id": 0, "content_hash": 1, "file_size": 1}
+    )
+    return {doc["content_hash"]: doc["file_size"] async for doc in cursor}
+
+
+async def list_photos(
+    collection_code: str,
+    skip: int = 0,
+    limit: int = 50
+) -> List[Photo]:
+    """
+    List photos of a collection with pagination.
+
+    Args:
+        collection_code: Collection code (case-insensitive)
+        skip: Number of documents to skip
+        limit: Maximum number of documents to return
+
+    Returns:
+        List of Photo documents, newest first
+    """
+    query = Photo.find(
+        Photo.collection_code == collection_code.strip().upper(),
+        Photo.is_deleted == False
+    )
+    return await query.sort("-uploaded_at").skip(skip).limit(limit).to_list()
+
+
+# Widest longitude span of one polygon of a bounding box query. Polygon
+# edges are great circles, which bulge poleward of the box's parallels;
+# narrow strips keep the bulge below BBOX_MARGIN_DEGREES.
+BBOX_STRIP_DEGREES = 10.0
+BBOX_MARGIN_DEGREES = 0.25
+
+
+def _bbox_geometry(west: float, south: float, east: float, north: float) -> Dict[str, Any]:
+    """
+    Build a GeoJSON MultiPolygon covering a bounding box.
+
+    The box is split into strips of at most BBOX_STRIP_DEGREES and widened
+    by BBOX_MARGIN_DEGREES of latitude, so it contains every point of the
+    box (and a little more). Boxes crossing the antimeridian have west > east.
+    """
+    south = max(south - BBOX_MARGIN_DEGREES, -89.9)
+    north = min(north + BBOX_MARGIN_DEGREES, 89.9)
+
+    spans = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+    polygons = []
+
+    for start, end in spans:
+        while start < end:
+            stop = min(start + BBOX_STRIP_DEGREES, end)
+            polygons.append([[
+                [start, south], [stop, south], [stop, north], [start, north], [start, south]
+            ]])
+            start = stop
+
+    return {"type": "MultiPolygon", "coordinates": polygons}
+
+
+async def cluster_photo_locations(
+    collection_code: str,
+    bbox: Tuple[float, float, float, float],
+    cell_degrees: float,
+    limit: int = 500
+) -> List[Dict[str, Any]]:
+    """
+    Group photos with a location inside a bounding box into grid cells.
+
+    Cells are squares of cell_degrees aligned to longitude -180 and
+    latitude -90, so a cell keeps its photos while the map is panned.
+    The 2dsphere index narrows the candidates, the exact box is checked
+    on the coordinates.
+
+    Args:
+        collection_code: Collection code (case-insensitive)
+        bbox: (west, south, east, north) in degrees; west > east crosses the antimeridian
+        cell_degrees: Grid cell size in degrees
+        limit: Maximum number of clusters, largest first
+
+    Returns:
+        List of clusters: latitude, longitude (mean), count, bounds and
+        photo_id for single-photo clusters
+    """
+    west, south, east, north = bbox
+
+    if west <= east:
+        in_longitude = {"longitude": {"$gte": west, "$lte": east}}
+    else:
+        in_longitude = {"$or": [{"longitude": {"$gte": west}}, {"longitude": {"$lte": east}}]}
+
+    pipeline = [
+        {"$match": {
+            "collection_code": collection_code.strip().upper(),
+            "location": {"$geoWithin": {"$geometry": _bbox_geometry(west, south, east, north)}},
+            "is_deleted": False
+        }},
+        {"$project": {
+            "longitude": {"$arrayElemAt": ["$location.coordinates", 0]},
+            "latitude": {"$arrayElemAt": ["$location.coordinates", 1]}
+        }},
+        {"$match": {"latitude": {"$gte": south, "$lte": north}, **in_longitude}},
+        {"$group": {
+            "_id": {
+                "x": {"$floor": {"$divide": [{"$add": ["$longitude", 180]}, cell_degrees]}},
+                "y": {"$floor": {"$divide": [{"$add": ["$latitude", 90]}, cell_degrees]}}
+            },
+            "count": {"$sum": 1},
+            "longitude": {"$avg": "$longitude"},
+            "latitude": {"$avg": "$latitude"},
+            "west": {"$min": "$longitude"},
+            "south": {"$min": "$latitude"},
+            "east": {"$max": "$longitude"},
+            "north": {"$max": "$latitude"},
+            "photo_id": {"$first": "$_id"}
+        }},
+        {"$sort": {"count": -1}},
+        {"$limit": limit}
+    ]
+
+    clusters = []
+    async for doc in Photo.get_motor_collection().aggregate(pipeline):
+        clusters.append({
+            "latitude": doc["latitude"],
+            "longitude": doc["longitude"],
+            "count": doc["count"],
+            "bounds": [doc["west"], doc["south"], doc["east"], doc["north"]],
+            "photo_id": str(doc["photo_id"]) if doc["count"] == 1 else None
+        })
+
+    return clusters
+
+
+# Sort keys of photo search -> field (ties broken by _id, both descending)
+SEARCH_SORT_FIELDS = {
+    "captured_at": "metadata.captured_at",
+    "uploaded_at": "uploaded_at",
+}
+
+# Displayed width and height: EXIF orientations 5-8 rotate by 90 degrees
+_ROTATED = {"$gte": [{"$ifNull": ["$metadata.orientation", 1]}, 5]}
+_DISPLAY_WIDTH = {"$cond": [_ROTATED, "$dimensions.height", "$dimensions.width"]}
+_DISPLAY_HEIGHT = {"$cond": [_ROTATED, "$dimensions.width", "$dimensions.height"]}
+_PIXELS = {"$multiply": ["$dimensions.width", "$dimensions.height"]}
+
+
+def build_search_query(
+    collection_code: str,
+    captured_after: Optional[datetime] = None,
+    captured_before: Optional[datetime] = None,
+    camera_make: Optional[str] = None,
+    camera_model: Optional[str] = None,
+    orientation: Optional[str] = None,
+    min_megapixels: Optional[float] = None,
+    max_megapixels: Optional[float] = None,
+    sort: str = "captured_at",
+    after: Optional[Tuple[Optional[datetime], Any]] = None
+) -> Tuple[Dict[str, Any], List[Tuple[str, int]]]:
+    """
+    Build the filter and sort of a photo search.
+
+    Collection, camera and capture time are matched by the search_* indexes.
+    Orientation and size match large shares of a collection, so they are
+    checked on the documents read while walking an index in sort order
+    rather than getting indexes of their own.
+
+    Results are ordered by the sort field, newest first, then by _id.
+    Photos without a capture time come last when sorting by capture time.
+
+    Args:
+        collection_code: Collection code (case-insensitive)
+        captured_after: Captured at or after (inclusive)
+        captured_before: Captured before (exclusive)
+        camera_make: Exact EXIF camera make
+        camera_model: Exact EXIF camera model
+        orientation: landscape, portrait or square, as displayed (EXIF orientation applied)
+        min_megapixels: Minimum pixel count in millions
+        max_megapixels: Maximum pixel count in millions
+        sort: Key of SEARCH_SORT_FIELDS
+        after: (sort value, _id) of the last photo of the previous page
+
+    Returns:
+        Tuple of (filter, sort specification)
+    """
+    field = SEARCH_SORT_FIELDS[sort]
+    query: Dict[str, Any] = {
+        "collection_code": collection_code.strip().upper(),
+        "is_deleted": False
+    }
+
+    if camera_make:
+        query["metadata.camera_make"] = camera_make
+    if camera_model:
+        query["metadata.camera_model"] = camera_model
+
+    captured: Dict[str, datetime] = {}
+    if captured_after:
+        captured["$gte"] = captured_after
+    if captured_before:
+        captured["$lt"] = captured_before
+    if captured:
+        query["metadata.captured_at"] = captured
+
+    expressions = []
+    if orientation == "landscape":
+        expressions.append({"$gt": [_DISPLAY_WIDTH, _DISPLAY_HEIGHT]})
+    elif orientation == "portrait":
+        expressions.append({"$lt": [_DISPLAY_WIDTH, _DISPLAY_HEIGHT]})
+    elif orientation == "square":
+        expressions.append({"$eq": [_DISPLAY_WIDTH, _DISPLAY_HEIGHT]})
+    if min_megapixels is not None:
+        expressions.append({"$gte": [_PIXELS, min_megapixels * 1_000_000]})
+    if max_megapixels is not None:
+        expressions.append({"$lte": [_PIXELS, max_megapixels * 1_000_000]})
+    if expressions:
+        # Photos without known dimensions never match size or orientation
+        has_dimensions = {"$gt": [{"$ifNull": ["$dimensions.width", 0]}, 0]}
+        query["$expr"] = {"$and": [has_dimensions, *expressions]}
+
+    if after is not None:
+        value, last_id = after
+        if value is None:
+            # Within the trailing photos without a value
+            query["$and"] = [{field: None}, {"_id": {"$lt": last_id}}]
+        else:
+            query["$and"] = [{"$or": [
+                {field: {"$lt": value}},
+                {field: value, "_id": {"$lt": last_id}},
+                {field: None}
+            ]}]
+
+    return query, [(field, DESCENDING), ("_id", DESCENDING)]
+
+
+async def search_photos(limit: int = 50, **criteria: Any) -> List[Photo]:
+    """
+    Search the photos of a collection.
+
+    Args:
+        limit: Maximum number of photos
+        **criteria: Arguments of build_search_query
+
+    Returns:
+        List of Photo documents in search order
+    """
+    query, sort = build_search_query(**criteria)
+    return await Photo.find(query).sort(sort).limit(limit).to_list()
@@ -0,0 +1,71 @@
+"""Raw EXIF storage, kept out of photo documents.
+
+Raw EXIF blocks (with MakerNote often tens of KB) are only stored when
+STORE_RAW_EXIF is enabled, once per content hash, so photo documents and
+listings carry just the typed fields in Photo.metadata.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from beanie import Document, Indexed
+from pydantic import Field
+from pymongo.errors import DuplicateKeyError
+
+
+class PhotoExif(Document):
+    """Raw EXIF block of a blob."""
+
+    # SHA-256 of the original's content (see Blob)
+    sha256: Indexed(str, unique=True)
+
+    data: bytes
+    size: int
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "photo_exif"
+        indexes = [
+            "sha256",
+        ]
+
+
+# Database Operations
+
+async def save_raw_exif(sha256: str, data: bytes) -> None:
+    """
+    Store the raw EXIF block of a blob (kept if already stored).
+
+    Args:
+        sha256: Content hash
+        data: Raw EXIF bytes
+    """
+    try:
+        await PhotoExif(sha256=sha256, data=data, size=len(data)).insert()
+    except DuplicateKeyError:
+        pass
+
+
+async def get_raw_exif(sha256: str) -> Optional[bytes]:
+    """
+    Get the raw EXIF block of a blob.
+
+    Args:
+        sha256: Content hash
+
+    Returns:
+        Raw EXIF bytes or None if not stored
+    """
+    record = await PhotoExif.find_one(PhotoExif.sha256 == sha256)
+    return record.data if record else None
+
+
+async def delete_raw_exif(sha256: str) -> None:
+    """
+    Delete the raw EXIF block of a blob.
+
+    Args:
+        sha256: Content hash
+    """
+    await PhotoExif.find(PhotoExif.sha256 == sha256).delete()
@@ -0,0 +1,129 @@
+"""Sprite sheet model for cached gallery pages.
+
+A sprite sheet is one JPEG holding the thumbnails of a page of photos, plus
+the coordinates of each photo on it. Sheets are keyed by a hash of the
+page's photos, so a page whose content changed gets a new sheet; sheets no
+longer requested are removed by age (see scripts/cleanup_sprite_sheets).
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from beanie import Document, Indexed
+from beanie.operators import Set
+from pydantic import BaseModel, Field
+from pymongo import ASCENDING, IndexModel
+
+
+class SpriteSheet(Document):
+    """Sprite sheet document model for MongoDB."""
+
+    # Hash of the page's photo IDs, thumbnails and layout
+    key: Indexed(str, unique=True)
+
+    collection_code: Indexed(str)
+
+    # Stored JPEG
+    file_path: str
+    width: int
+    height: int
+    cell_size: int
+    columns: int
+
+    # Photo positions: photo_id, x, y, width, height, has_thumbnail
+    cells: List[Dict[str, Any]] = Field(default_factory=list)
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Last time the sheet was served (updated at most every TOUCH_INTERVAL)
+    last_used_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        # The unique index on key is declared by Indexed()
+        name = "sprite_sheets"
+        indexes = [
+            "collection_code",
+            IndexModel([("last_used_at", ASCENDING)], name="last_used_at"),
+        ]
+
+
+class SpriteCell(BaseModel):
+    """Position of one photo on a sprite sheet."""
+    photo_id: str
+    x: int
+    y: int
+    width: int
+    height: int
+    has_thumbnail: bool
+
+
+class SpriteSheetResponse(BaseModel):
+    """Schema for sprite sheet responses."""
+    key: str
+    url: str  # Signed URL of the sheet image
+    expires_at: datetime
+    width: int
+    height: int
+    cell_size: int
+    columns: int
+    photos: List[SpriteCell]
+
+
+# Database Operations
+
+async def get_sprite_sheet(key: str) -> Optional[SpriteSheet]:
+    """
+    Get a cached sprite sheet.
+
+    Args:
+        key: Sprite sheet key
+
+    Returns:
+        SpriteSheet document or None if not cached
+    """
+    return await SpriteSheet.find_one(SpriteSheet.key == key)
+
+
+async def touch_sprite_sheet(sheet: SpriteSheet) -> None:
+    """
+    Record that a sprite sheet was served.
+
+    Args:
+        sheet: SpriteSheet document
+    """
+    now = datetime.utcnow()
+    await SpriteSheet.find_one(SpriteSheet.id == sheet.id).update(Set({SpriteSheet.last_used_at: now}))
+    sheet.last_used_at = now
+
+
+async def get_unused_sprite_sheets(before: datetime, limit: int) -> List[SpriteSheet]:
+    """
+    Get sprite sheets not served since a time.
+
+    Args:
+        before: Sheets last used before this time
+        limit: Maximum number of sheets
+
+    Returns:
+        SpriteSheet documents, least recently used first
+    """
+    return await SpriteSheet.find(
+        SpriteSheet.last_used_at < before
+    ).sort(+SpriteSheet.last_used_at).limit(limit).to_list()
+
+
+async def remove_unused_sprite_sheet(sheet: SpriteSheet, before: datetime) -> bool:
+    """
+    Remove a sprite sheet unless it was served meanwhile.
+
+    Args:
+        sheet: SpriteSheet document
+        before: Time it must still have been last used before
+
+    Returns:
+        True if removed (its file still has to be deleted)
+    """
+    result = await SpriteSheet.find_one(
+        SpriteSheet.id == sheet.id,
+        SpriteSheet.last_used_at < before
+    ).delete()
+    return bool(result and result.deleted_count)
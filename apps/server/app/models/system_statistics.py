@@ -0,0 +1,271 @@
+"""System statistics model: materialized totals for the admin dashboard.
+
+One document holds photo counts and bytes per state and collection counts
+per status. Writers move counts between states with atomic $inc updates
+when photos or collections change, so reading the totals is a single
+lookup. A reconciliation recomputes them from photos and collections to
+repair drift (e.g. a process stopped between a write and its increment).
+
+Photo states: pending, processed, failed and deleted (processed, then
+soft-deleted). Collection states: their status, or deleted.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from beanie import Document, Indexed
+from pydantic import BaseModel, Field
+from pymongo.errors import DuplicateKeyError
+
+from app.models.collection import Collection
+from app.models.photo import Photo
+
+logger = logging.getLogger(__name__)
+
+# Key of the single statistics document
+GLOBAL_KEY = "global"
+
+# Attempts of a reconciliation while counters keep changing
+RECONCILE_ATTEMPTS = 3
+
+
+class SystemStatistics(Document):
+    """Materialized system-wide totals."""
+
+    key: Indexed(str, unique=True) = GLOBAL_KEY
+
+    photos: Dict[str, int] = Field(default_factory=dict)  # state -> count
+    bytes: Dict[str, int] = Field(default_factory=dict)  # state -> bytes
+    collections: Dict[str, int] = Field(default_factory=dict)  # status -> count
+
+    # Incremented with every change, guards reconciliation writes
+    version: int = 0
+
+    updated_at: Optional[datetime] = None
+    reconciled_at: Optional[datetime] = None
+
+    # Watermark of the collection statistics reconciliation: photos uploaded
+    # or deleted before it have been checked
+    collections_reconciled_until: Optional[datetime] = None
+
+    class Settings:
+        name = "system_statistics"
+
+
+class SystemStatisticsResponse(BaseModel):
+    """Schema for system statistics."""
+
+    total_photos: int  # processed, not deleted
+    total_bytes: int
+    photos: Dict[str, int]
+    bytes: Dict[str, int]
+    collections: Dict[str, int]
+    updated_at: Optional[datetime] = None
+    reconciled_at: Optional[datetime] = None
+
+
+def photo_state(processing_status: str, is_deleted: bool) -> str:
+    """
+    Get the statistics state of a photo.
+
+    Args:
+        processing_status: Photo processing status
+        is_deleted: Photo soft-delete flag
+
+    Returns:
+        pending, processed, failed or deleted
+    """
+    if processing_status == "processed" and is_deleted:
+        return "deleted"
+    return processing_status
+
+
+# Database Operations
+
+async def get_system_statistics() -> SystemStatistics:
+    """
+    Get the statistics document.
+
+    Returns:
+        SystemStatistics (all zero if nothing was recorded yet)
+    """
+    stats = await SystemStatistics.find_one(SystemStatistics.key == GLOBAL_KEY)
+    return stats or SystemStatistics()
+
+
+async def set_collections_watermark(until: datetime) -> None:
+    """
+    Record how far collection statistics have been reconciled.
+
+    Args:
+        until: Photos uploaded or deleted before this time have been checked
+    """
+    await SystemStatistics.get_motor_collection().update_one(
+        {"key": GLOBAL_KEY},
+        {"$set": {"collections_reconciled_until": until}},
+        upsert=True
+    )
+
+
+async def _apply(increments: Dict[str, int]) -> None:
+    """Apply counter increments to the statistics document (upserted)."""
+    increments = {field: value for field, value in increments.items() if value}
+    if not increments:
+        return
+
+    await SystemStatistics.get_motor_collection().update_one(
+        {"key": GLOBAL_KEY},
+        {
+            "$inc": {**increments, "version": 1},
+            "$set": {"updated_at": datetime.utcnow()}
+        },
+        upsert=True
+    )
+
+
+async def record_photo_change(old_state: Optional[str], new_state: Optional[str], size: int) -> None:
+    """
+    Move a photo between states (None when it did not exist before).
+
+    Failures are logged, not raised: the next reconciliation repairs them.
+
+    Args:
+        old_state: State before the change
+        new_state: State after the change
+        size: File size in bytes
+    """
+    if old_state == new_state:
+        return
+
+    increments: Dict[str, int] = {}
+    if old_state:
+        increments[f"photos.{old_state}"] = -1
+        increments[f"bytes.{old_state}"] = -size
+    if new_state:
+        increments[f"photos.{new_state}"] = 1
+        increments[f"bytes.{new_state}"] = size
+
+    try:
+        await _apply(increments)
+    except Exception as e:
+        logger.warning(f"Failed to update photo statistics: {e}")
+
+
+async def record_collection_change(old_status: Optional[str], new_status: Optional[str]) -> None:
+    """
+    Move a collection between statuses (None when it did not exist before).
+
+    Args:
+        old_status: Status before the change ("deleted" for deleted collections)
+        new_status: Status after the change
+    """
+    if old_status == new_status:
+        return
+
+    increments: Dict[str, int] = {}
+    if old_status:
+        increments[f"collections.{old_status}"] = -1
+    if new_status:
+        increments[f"collections.{new_status}"] = 1
+
+    try:
+        await _apply(increments)
+    except Exception as e:
+        logger.warning(f"Failed to update collection statistics: {e}")
+
+
+async def compute_system_statistics() -> Dict[str, Dict[str, int]]:
+    """
+    Compute the statistics from photos and collections (full scan).
+
+    Returns:
+        photos, bytes and collections counters
+    """
+    photo_groups = await Photo.aggregate([
+        {"$group": {
+            "_id": {"status": "$processing_status", "deleted": "$is_deleted"},
+            "count": {"$sum": 1},
+            "bytes": {"$sum": "$file_size"}
+        }}
+    ]).to_list()
+
+    collection_groups = await Collection.aggregate([
+        {"$group": {
+            "_id": {"$cond": ["$is_deleted", "deleted", "$status"]},
+            "count": {"$sum": 1}
+        }}
+    ]).to_list()
+
+    photos: Dict[str, int] = {}
+    sizes: Dict[str, int] = {}
+    for group in photo_groups:
+        state = photo_state(group["_id"]["status"], group["_id"].get("deleted", False))
+        photos[state] = photos.get(state, 0) + group["count"]
+        sizes[state] = sizes.get(state, 0) + group["bytes"]
+
+    return {
+        "photos": photos,
+        "bytes": sizes,
+        "collections": {group["_id"]: group["count"] for group in collection_groups}
+    }
+
+
+def _drift(stored: Dict[str, int], actual: Dict[str, int]) -> Dict[str, int]:
+    """Differences between stored and actual counters (actual - stored)."""
+    keys = set(stored) | set(actual)
+    return {
+        key: actual.get(key, 0) - stored.get(key, 0)
+        for key in sorted(keys)
+        if actual.get(key, 0) != stored.get(key, 0)
+    }
+
+
+async def reconcile_system_statistics(dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Recompute the statistics and repair drift.
+
+    The write only succeeds if no increment happened while computing, so
+    concurrent uploads are not lost; it is retried RECONCILE_ATTEMPTS times.
+
+    Args:
+        dry_run: Only report the drift
+
+    Returns:
+        drift per counter group and whether the document was repaired
+    """
+    for _ in range(RECONCILE_ATTEMPTS):
+        stored = await get_system_statistics()
+        actual = await compute_system_statistics()
+
+        drift = {
+            name: _drift(getattr(stored, name), values)
+            for name, values in actual.items()
+        }
+        result = {"drift": drift, "repaired": False}
+
+        if dry_run:
+            return result
+
+        now = datetime.utcnow()
+        update = {"$set": {**actual, "reconciled_at": now, "updated_at": now}, "$inc": {"version": 1}}
+
+        if stored.id is None:
+            try:
+                await SystemStatistics(key=GLOBAL_KEY, **actual, version=1, updated_at=now, reconciled_at=now).insert()
+                result["repaired"] = True
+                return result
+            except DuplicateKeyError:
+                # Created concurrently: retry against it
+                continue
+
+        written = await SystemStatistics.get_motor_collection().update_one(
+            {"key": GLOBAL_KEY, "version": stored.version},
+            update
+        )
+        if written.modified_count:
+            result["repaired"] = any(drift.values())
+            return result
+
+    logger.warning("Statistics kept changing during reconciliation; will retry on the next run")
+    return {"drift": drift, "repaired": False}
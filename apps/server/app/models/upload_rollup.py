@@ -0,0 +1,290 @@
+"""Upload rollup model for time-bucketed upload analytics.
+
+Every stored photo increments one bucket per granularity (minute, hour,
+day) for its collection and for all collections (scope "*"), so the
+analytics endpoint reads a few hundred small documents instead of
+scanning photos. Minute and hour buckets expire after ROLLUP_RETENTION.
+
+Distinct uploaders are kept as one small document per bucket and uploader
+(UploadRollupUploader) and counted at read time, so busy buckets such as
+the global day never grow.
+"""
+
+import hashlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from beanie import Document
+from pydantic import BaseModel
+from pymongo import ASCENDING, IndexModel, UpdateOne
+
+# Scope of the buckets counting all collections
+GLOBAL_SCOPE = "*"
+
+# Bucket length per granularity
+GRANULARITIES = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+# How long buckets are kept (None = forever)
+ROLLUP_RETENTION = {
+    "minute": timedelta(days=2),
+    "hour": timedelta(days=90),
+    "day": None,
+}
+
+
+class UploadRollup(Document):
+    """Upload counters of one scope and time bucket."""
+
+    scope: str  # collection code or GLOBAL_SCOPE
+    granularity: str  # minute, hour, day
+    bucket: datetime  # start of the bucket
+
+    uploads: int = 0
+    bytes: int = 0
+
+    # Removed by the TTL index; None for buckets kept forever
+    expires_at: Optional[datetime] = None
+
+    class Settings:
+        name = "upload_rollups"
+        indexes = [
+            IndexModel(
+                [("scope", ASCENDING), ("granularity", ASCENDING), ("bucket", ASCENDING)],
+                name="scope_granularity_bucket",
+                unique=True
+            ),
+            IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+        ]
+
+
+class UploadRollupUploader(Document):
+    """One distinct uploader of a scope and time bucket."""
+
+    scope: str
+    granularity: str
+    bucket: datetime
+    uploader: str  # short hash of IP address and user agent (see uploader_key)
+
+    # Same expiry as the bucket
+    expires_at: Optional[datetime] = None
+
+    class Settings:
+        name = "upload_rollup_uploaders"
+        indexes = [
+            # Unique per bucket; counting a range is covered by the index
+            IndexModel(
+                [
+                    ("scope", ASCENDING),
+                    ("granularity", ASCENDING),
+                    ("bucket", ASCENDING),
+                    ("uploader", ASCENDING),
+                ],
+                name="scope_granularity_bucket_uploader",
+                unique=True
+            ),
+            IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+        ]
+
+
+class UploadBucket(BaseModel):
+    """Schema for one bucket of upload analytics."""
+
+    bucket: datetime
+    uploads: int
+    bytes: int
+    uploaders: int  # distinct within the bucket
+
+
+class UploadAnalyticsResponse(BaseModel):
+    """Schema for upload analytics."""
+
+    scope: str
+    granularity: str
+    start: datetime
+    end: datetime
+    total_uploads: int
+    total_bytes: int
+    buckets: List[UploadBucket]  # buckets without uploads are omitted
+
+
+def truncate(at: datetime, granularity: str) -> datetime:
+    """
+    Get the start of the bucket containing a time.
+
+    Args:
+        at: Point in time
+        granularity: minute, hour or day
+
+    Returns:
+        Bucket start
+    """
+    if granularity == "minute":
+        return at.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return at.replace(minute=0, second=0, microsecond=0)
+    return at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def uploader_key(uploader_info: Optional[Dict[str, Optional[str]]]) -> Optional[str]:
+    """
+    Identify an uploader by IP address and user agent.
+
+    Args:
+        uploader_info: Photo uploader_info ({ip_address, user_agent})
+
+    Returns:
+        12-character hash, or None without an IP address
+    """
+    if not uploader_info or not uploader_info.get("ip_address"):
+        return None
+
+    identity = f"{uploader_info['ip_address']}|{uploader_info.get('user_agent') or ''}"
+    return hashlib.sha1(identity.encode()).hexdigest()[:12]
+
+
+def expires_at(bucket: datetime, granularity: str) -> Optional[datetime]:
+    """
+    Get the expiry of a bucket.
+
+    Args:
+        bucket: Bucket start
+        granularity: minute, hour or day
+
+    Returns:
+        Time the bucket is removed, None if kept forever
+    """
+    retention = ROLLUP_RETENTION[granularity]
+    return bucket + GRANULARITIES[granularity] + retention if retention else None
+
+
+# Database Operations
+
+def rollup_update(
+    scope: str,
+    granularity: str,
+    at: datetime,
+    uploads: int,
+    size: int
+) -> UpdateOne:
+    """
+    Build the upsert adding uploads to a bucket.
+
+    Args:
+        scope: Collection code or GLOBAL_SCOPE
+        granularity: minute, hour or day
+        at: Time of the uploads
+        uploads: Number of uploads
+        size: Bytes uploaded
+
+    Returns:
+        UpdateOne operation for bulk_write
+    """
+    bucket = truncate(at, granularity)
+    return UpdateOne(
+        {"scope": scope, "granularity": granularity, "bucket": bucket},
+        {
+            "$inc": {"uploads": uploads, "bytes": size},
+            "$setOnInsert": {"expires_at": expires_at(bucket, granularity)},
+        },
+        upsert=True
+    )
+
+
+def uploader_update(scope: str, granularity: str, at: datetime, uploader: str) -> UpdateOne:
+    """
+    Build the upsert recording an uploader in a bucket.
+
+    Args:
+        scope: Collection code or GLOBAL_SCOPE
+        granularity: minute, hour or day
+        at: Time of the upload
+        uploader: Uploader key
+
+    Returns:
+        UpdateOne operation for bulk_write
+    """
+    bucket = truncate(at, granularity)
+    return UpdateOne(
+        {"scope": scope, "granularity": granularity, "bucket": bucket, "uploader": uploader},
+        {"$setOnInsert": {"expires_at": expires_at(bucket, granularity)}},
+        upsert=True
+    )
+
+
+async def record_upload(
+    collection_code: str,
+    size: int,
+    at: datetime,
+    uploader_info: Optional[Dict[str, Optional[str]]] = None
+) -> None:
+    """
+    Count an upload in the buckets of its collection and of all collections.
+
+    Args:
+        collection_code: Normalized collection code
+        size: File size in bytes
+        at: Upload time (Photo.uploaded_at)
+        uploader_info: Photo uploader_info
+    """
+    buckets = [
+        (scope, granularity)
+        for scope in (collection_code, GLOBAL_SCOPE)
+        for granularity in GRANULARITIES
+    ]
+    await UploadRollup.get_motor_collection().bulk_write(
+        [rollup_update(scope, granularity, at, 1, size) for scope, granularity in buckets],
+        ordered=False
+    )
+
+    key = uploader_key(uploader_info)
+    if key:
+        await UploadRollupUploader.get_motor_collection().bulk_write(
+            [uploader_update(scope, granularity, at, key) for scope, granularity in buckets],
+            ordered=False
+        )
+
+
+async def get_upload_rollups(
+    scope: str,
+    granularity: str,
+    start: datetime,
+    end: datetime
+) -> List[Dict[str, Any]]:
+    """
+    Read the buckets of a scope within a time range.
+
+    Args:
+        scope: Collection code or GLOBAL_SCOPE
+        granularity: minute, hour or day
+        start: Range start (inclusive, truncated to the granularity)
+        end: Range end (exclusive)
+
+    Returns:
+        Buckets with uploads, bytes and distinct uploader count, oldest first
+    """
+    match = {
+        "scope": scope,
+        "granularity": granularity,
+        "bucket": {"$gte": truncate(start, granularity), "$lt": end}
+    }
+    buckets = await UploadRollup.aggregate([
+        {"$match": match},
+        {"$sort": {"bucket": 1}},
+        {"$project": {"_id": 0, "bucket": 1, "uploads": 1, "bytes": 1}},
+    ]).to_list()
+
+    counts = {
+        row["_id"]: row["uploaders"]
+        for row in await UploadRollupUploader.aggregate([
+            {"$match": match},
+            {"$group": {"_id": "$bucket", "uploaders": {"$sum": 1}}},
+        ]).to_list()
+    }
+    for bucket in buckets:
+        bucket["uploaders"] = counts.get(bucket["bucket"], 0)
+
+    return buckets
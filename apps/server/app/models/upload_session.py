@@ -0,0 +1,131 @@
+"""Upload session model for resumable and direct uploads.
+
+Session state lives in MongoDB so an upload can continue after a dropped
+connection or a worker restart. Expired sessions are removed by a TTL index.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from beanie import Document, Indexed
+from pydantic import BaseModel, Field
+from pymongo import ASCENDING, IndexModel
+
+
+class UploadSession(Document):
+    """
+    Upload session document model for MongoDB.
+
+    Chunked sessions track how many bytes of a file have been received into
+    a temporary file. Direct sessions (storage_key set) track a file that the
+    client uploads straight to storage with a presigned URL.
+    """
+
+    # Collection reference
+    collection_code: Indexed(str)
+
+    # Target file
+    filename: str
+    total_size: int  # in bytes
+    temp_path: str  # relative to storage root (chunked uploads)
+
+    # Direct uploads: staging object the client PUTs to, declared type
+    storage_key: Optional[str] = None
+    content_type: Optional[str] = None
+
+    # Bytes received so far (next expected offset)
+    offset: int = 0
+
+    # Session status
+    status: str = "active"  # active, completing, processing, completed, failed, aborted
+
+    # Lease of a running completion: once passed, the completion is
+    # considered abandoned (process stopped) and may be retried
+    completing_until: Optional[datetime] = None
+
+    # Photo registered for a direct upload at finalization
+    photo_id: Optional[str] = None
+
+    uploader_info: Dict[str, Optional[str]] = Field(default_factory=dict)
+
+    # Upload result once completed (replayed on repeated completion requests)
+    result: Optional[Dict[str, Any]] = None
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime
+
+    class Settings:
+        name = "upload_sessions"
+        indexes = [
+            "collection_code",
+            # TTL index: MongoDB removes the session once expires_at has passed
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+        ]
+
+
+class UploadSessionCreate(BaseModel):
+    """Schema for starting a resumable upload."""
+    filename: str = Field(..., min_length=1, max_length=255, description="Original filename")
+    size: int = Field(..., gt=0, description="Total file size in bytes")
+
+
+class UploadSessionResponse(BaseModel):
+    """Schema for upload session responses."""
+    upload_id: str
+    filename: str
+    size: int
+    offset: int
+    status: str
+    chunk_size: int
+    expires_at: datetime
+    photo_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class DirectUploadFile(BaseModel):
+    """A file the client wants to upload directly to storage."""
+    filename: str = Field(..., min_length=1, max_length=255, description="Original filename")
+    size: int = Field(..., gt=0, description="File size in bytes")
+    content_type: str = Field("application/octet-stream", max_length=100, description="MIME type")
+
+
+class DirectUploadRequest(BaseModel):
+    """Schema for requesting presigned upload URLs."""
+    files: List[DirectUploadFile] = Field(..., min_length=1, max_length=100)
+
+
+class DirectUploadTarget(BaseModel):
+    """Presigned upload URL for one file, or the reason it was rejected."""
+    filename: str
+    upload_id: Optional[str] = None
+    url: Optional[str] = None
+    method: str = "PUT"
+    headers: Dict[str, str] = Field(default_factory=dict)
+    expires_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+
+# Database Operations
+
+async def get_upload_session(session_id: str, collection_code: str) -> Optional[UploadSession]:
+    """
+    Retrieve an upload session of a collection.
+
+    Args:
+        session_id: MongoDB ObjectId as string
+        collection_code: Collection code (case-insensitive)
+
+    Returns:
+        UploadSession if found and belonging to the collection, None otherwise
+    """
+    try:
+        session = await UploadSession.get(session_id)
+    except Exception:
+        # Malformed ObjectId
+        return None
+
+    if session is None or session.collection_code != collection_code.strip().upper():
+        return None
+
+    return session
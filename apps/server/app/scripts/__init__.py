@@ -0,0 +1 @@
+"""Maintenance commands, run as `python -m app.scripts.<name>`."""
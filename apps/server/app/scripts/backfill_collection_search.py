@@ -0,0 +1,67 @@
+"""Fill in the prefix search words of collections created before search.
+
+    python -m app.scripts.backfill_collection_search
+
+Collections are updated in batches of BATCH_SIZE with one bulk write each.
+The text index is built by MongoDB itself when the application starts.
+"""
+
+import asyncio
+import logging
+
+from pymongo import UpdateOne
+
+from app.core.database import close_mongo_connection, connect_to_mongo, init_db
+from app.models.collection import Collection
+from app.utils.search_terms import search_terms
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+async def backfill() -> int:
+    """
+    Set search_terms of collections that have none.
+
+    Returns:
+        Number of updated collections
+    """
+    collection = Collection.get_motor_collection()
+    cursor = collection.find(
+        {"$or": [{"search_terms": {"$exists": False}}, {"search_terms": []}]},
+        projection={"name": 1, "code": 1}
+    )
+
+    updated = 0
+    batch = []
+
+    async for doc in cursor:
+        terms = search_terms(doc.get("name"), doc.get("code"))
+        batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"search_terms": terms}}))
+
+        if len(batch) >= BATCH_SIZE:
+            updated += (await collection.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+
+    if batch:
+        updated += (await collection.bulk_write(batch, ordered=False)).modified_count
+
+    return updated
+
+
+async def main() -> None:
+    await connect_to_mongo()
+    await init_db()
+
+    try:
+        updated = await backfill()
+    finally:
+        await close_mongo_connection()
+
+    print(f"Added search words to {updated} collections.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+"""Set the GeoJSON location of photos from their typed EXIF GPS fields.
+
+Photos stored before locations existed only carry gps_latitude and
+gps_longitude in metadata. One server-side update copies them into the
+indexed location field. Run compact_photo_metadata first for photos that
+still store an EXIF dump:
+
+    python -m app.scripts.compact_photo_metadata
+    python -m app.scripts.backfill_photo_locations
+"""
+
+import asyncio
+import logging
+
+from app.core.database import close_mongo_connection, connect_to_mongo, init_db
+from app.models.photo import Photo
+
+logger = logging.getLogger(__name__)
+
+# Same rules as photo_service._gps_location
+MISSING_LOCATION_QUERY = {
+    "location": None,
+    "metadata.gps_latitude": {"$gte": -90, "$lte": 90},
+    "metadata.gps_longitude": {"$gte": -180, "$lte": 180},
+    "$nor": [{"metadata.gps_latitude": 0, "metadata.gps_longitude": 0}],
+}
+
+
+async def backfill() -> int:
+    """
+    Set missing locations from metadata.
+
+    Returns:
+        Number of updated photos
+    """
+    result = await Photo.get_motor_collection().update_many(
+        MISSING_LOCATION_QUERY,
+        [{"$set": {
+            "location": {
+                "type": "Point",
+                "coordinates": ["$metadata.gps_longitude", "$metadata.gps_latitude"]
+            }
+        }}]
+    )
+    return result.modified_count
+
+
+async def main() -> None:
+    await connect_to_mongo()
+    await init_db()
+
+    try:
+        updated = await backfill()
+    finally:
+        await close_mongo_connection()
+
+    print(f"Set the location of {updated} photos.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
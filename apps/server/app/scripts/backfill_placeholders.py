@@ -0,0 +1,79 @@
+"""Compute BlurHash and dominant color for photos processed before they existed.
+
+Placeholders are derived from the stored thumbnail, so originals are not
+read again. Photos sharing content get the values in one update.
+
+    python -m app.scripts.backfill_placeholders
+"""
+
+import asyncio
+import io
+import logging
+from typing import Dict
+
+from beanie.operators import Set
+from PIL import Image
+
+from app.core.database import close_mongo_connection, connect_to_mongo, init_db
+from app.models.photo import Photo
+from app.services.image_service import image_service
+from app.services.storage_service import storage_service
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill() -> Dict[str, int]:
+    """
+    Fill in missing placeholders from stored thumbnails.
+
+    Returns:
+        Counters: updated (photos), failed (thumbnails missing or unreadable)
+    """
+    stats = {"updated": 0, "failed": 0}
+    done = set()
+
+    query = Photo.find(Photo.blurhash == None, Photo.thumbnail_path != None, Photo.is_deleted == False)
+
+    async for photo in query:
+        if photo.content_hash in done:
+            continue
+
+        try:
+            data = b"".join([chunk async for chunk in storage_service.iter_file(photo.thumbnail_path)])
+            with Image.open(io.BytesIO(data)) as img:
+                img.load()
+                blurhash = image_service.compute_blurhash(img)
+                dominant_color = image_service.compute_dominant_color(img)
+        except Exception as e:
+            logger.warning(f"Cannot read thumbnail of photo {photo.id}: {e}")
+            stats["failed"] += 1
+            continue
+
+        changes = Set({Photo.blurhash: blurhash, Photo.dominant_color: dominant_color})
+        if photo.content_hash:
+            result = await Photo.find(Photo.content_hash == photo.content_hash).update(changes)
+            stats["updated"] += result.modified_count
+            done.add(photo.content_hash)
+        else:
+            await Photo.find_one(Photo.id == photo.id).update(changes)
+            stats["updated"] += 1
+
+    return stats
+
+
+async def main() -> None:
+    await connect_to_mongo()
+    await init_db()
+
+    try:
+        stats = await backfill()
+    finally:
+        await storage_service.close()
+        await close_mongo_connection()
+
+    print(f"Added placeholders to {stats['updated']} photos; {stats['failed']} thumbnails could not be read.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
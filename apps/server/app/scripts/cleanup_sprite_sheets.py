@@ -0,0 +1,48 @@
+"""Remove sprite sheets that were not served for a while.
+
+Sheets are keyed by the content of their page, so every upload or deletion
+leaves the sheets of changed pages behind. Run periodically (e.g. daily)
+to remove those no longer requested, with their files:
+
+    python -m app.scripts.cleanup_sprite_sheets
+    python -m app.scripts.cleanup_sprite_sheets --days 1
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import timedelta
+
+from app.core.config import settings
+from app.core.database import close_mongo_connection, connect_to_mongo, init_db
+from app.services.sprite_service import sprite_service
+from app.services.storage_service import storage_service
+
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Remove unused sprite sheets.")
+    parser.add_argument(
+        "--days",
+        type=float,
+        default=settings.sprite_unused_days,
+        help="remove sheets not served for this many days"
+    )
+    args = parser.parse_args()
+
+    await connect_to_mongo()
+    await init_db()
+
+    try:
+        removed = await sprite_service.remove_unused(timedelta(days=args.days))
+    finally:
+        await storage_service.close()
+        await close_mongo_connection()
+
+    print(f"Removed {removed} sprite sheets not served for {args.days:g} days.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,142 @@
+"""Replace stored EXIF dumps with typed fields and report document sizes.
+
+Photos processed before selective EXIF extraction carry every tag of the
+image as strings in metadata.exif_data. This command re-extracts the typed
+fields from the header of the stored original and drops the dump:
+
+    python -m app.scripts.compact_photo_metadata --dry-run   # size report only
+    python -m app.scripts.compact_photo_metadata
+
+Sizes are measured by MongoDB with $bsonSize (MongoDB 4.4+).
+"""
+
+import argparse
+import asyncio
+import io
+import logging
+from typing import Any, Dict, Optional
+
+from beanie.operators import Set
+
+from app.core.database import close_mongo_connection, connect_to_mongo, init_db
+from app.models.photo import Photo
+from app.services.image_service import image_service
+from app.services.storage_service import storage_service
+
+logger = logging.getLogger(__name__)
+
+LEGACY_QUERY = {"metadata.exif_data": {"$exists": True}}
+
+
+async def document_size_report() -> Dict[str, float]:
+    """
+    Measure photo documents.
+
+    Returns:
+        count, avg_bytes (whole document), avg_metadata_bytes, total_bytes
+    """
+    pipeline = [
+        {"$group": {
+            "_id": None,
+            "count": {"$sum": 1},
+            "avg_bytes": {"$avg": {"$bsonSize": "$$ROOT"}},
+            "avg_metadata_bytes": {"$avg": {"$bsonSize": {"$ifNull": ["$metadata", {}]}}},
+            "total_bytes": {"$sum": {"$bsonSize": "$$ROOT"}},
+        }}
+    ]
+    result = await Photo.aggregate(pipeline).to_list()
+
+    if not result:
+        return {"count": 0, "avg_bytes": 0, "avg_metadata_bytes": 0, "total_bytes": 0}
+
+    report = result[0]
+    report.pop("_id", None)
+    return report
+
+
+async def _read_original_metadata(photo: Photo) -> Optional[Dict[str, Any]]:
+    """Extract typed EXIF fields from the first chunk of a stored original."""
+    try:
+        async for chunk in storage_service.iter_file(photo.file_path):
+            # EXIF sits in the header, which the first chunk covers
+            return image_service.extract_exif(io.BytesIO(chunk))
+    except FileNotFoundError:
+        return None
+    return None
+
+
+def _legacy_fields(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep what a legacy dump already had in typed form."""
+    return {
+        key: metadata[key].replace("\x00", "").strip()
+        for key in ("camera_make", "camera_model")
+        if metadata.get(key)
+    }
+
+
+async def compact() -> Dict[str, int]:
+    """
+    Re-extract typed metadata of photos that store an EXIF dump.
+
+    Photos sharing content are updated together.
+
+    Returns:
+        Counters: updated, missing_original (kept only legacy camera fields)
+    """
+    stats = {"updated": 0, "missing_original": 0}
+    done = set()
+
+    async for photo in Photo.find(LEGACY_QUERY):
+        if photo.content_hash and photo.content_hash in done:
+            continue
+
+        metadata = await _read_original_metadata(photo)
+        if metadata is None:
+            stats["missing_original"] += 1
+            metadata = _legacy_fields(photo.metadata)
+
+        if photo.content_hash:
+            query = Photo.find(Photo.content_hash == photo.content_hash, LEGACY_QUERY)
+            done.add(photo.content_hash)
+        else:
+            query = Photo.find(Photo.id == photo.id)
+
+        result = await query.update(Set({Photo.metadata: metadata}))
+        stats["updated"] += result.modified_count
+
+    return stats
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Compact EXIF metadata of photo documents.")
+    parser.add_argument("--dry-run", action="store_true", help="only report document sizes")
+    args = parser.parse_args()
+
+    await connect_to_mongo()
+    await init_db()
+
+    try:
+        before = await document_size_report()
+        legacy = await Photo.find(LEGACY_QUERY).count()
+        print(
+            f"{before['count']} photos, {legacy} with an EXIF dump: average document "
+            f"{before['avg_bytes']:.0f} bytes (metadata {before['avg_metadata_bytes']:.0f} bytes)"
+        )
+
+        if not args.dry_run:
+            stats = await compact()
+            after = await document_size_report()
+            reduction = 1 - after["avg_bytes"] / before["avg_bytes"] if before["avg_bytes"] else 0
+            print(
+                f"Updated {stats['updated']} photos ({stats['missing_original']} originals missing): "
+                f"average document {after['avg_bytes']:.0f} bytes "
+                f"(metadata {after['avg_metadata_bytes']:.0f} bytes), {reduction:.0%} smaller"
+            )
+    finally:
+        await storage_service.close()
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,237 @@
+"""Reclaim space in the thumbnail segment store.
+
+Deleting a thumbnail only flags its record; this command rewrites the live
+records of sealed segments with enough garbage to the open segment, points
+blobs and photos at the new location and removes the old segment file.
+Records no blob or photo refers to (e.g. left by an interrupted upload)
+count as garbage as well.
+
+    python -m app.scripts.compact_thumbnail_segments --dry-run
+    python -m app.scripts.compact_thumbnail_segments --min-garbage 0.2
+
+With --pack-files, thumbnails stored as one file each are first moved into
+segments (requires THUMBNAIL_STORE=segments), which converts an existing
+installation.
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from typing import Dict
+
+from beanie.operators import Set
+
+from app.core.config import settings
+from app.core.database import close_mongo_connection, connect_to_mongo, init_db
+from app.models.blob import Blob
+from app.models.photo import Photo
+from app.services.segment_store import SegmentRecord, SegmentStore
+from app.services.storage_service import storage_service
+
+logger = logging.getLogger(__name__)
+
+# Segments sealed more recently may hold records whose blob is not saved yet
+SEALED_GRACE_SECONDS = 600
+
+
+async def _is_referenced(record: SegmentRecord) -> bool:
+    """Check whether a blob or a visible photo uses a record."""
+    blob = await Blob.find_one(Blob.sha256 == record.sha256, Blob.thumbnail_path == record.path)
+    if blob:
+        return True
+
+    photo = await Photo.find_one(
+        Photo.content_hash == record.sha256,
+        Photo.thumbnail_path == record.path,
+        Photo.is_deleted == False
+    )
+    return photo is not None
+
+
+async def _repoint(sha256: str, old_path: str, new_path: str) -> bool:
+    """
+    Replace a thumbnail path on the blob and photos still using it.
+
+    Returns:
+        True if anything still referenced the old path
+    """
+    blobs = await Blob.find(Blob.sha256 == sha256, Blob.thumbnail_path == old_path).update(
+        Set({Blob.thumbnail_path: new_path})
+    )
+    photos = await Photo.find(Photo.content_hash == sha256, Photo.thumbnail_path == old_path).update(
+        Set({Photo.thumbnail_path: new_path})
+    )
+    return bool(blobs.matched_count or photos.matched_count)
+
+
+async def compact_segment(
+    store: SegmentStore,
+    segment: int,
+    min_garbage: float,
+    dry_run: bool = False
+) -> Dict[str, int]:
+    """
+    Compact one sealed segment if enough of it is garbage.
+
+    Args:
+        store: Segment store
+        segment: Segment number
+        min_garbage: Minimum fraction of garbage bytes to compact
+        dry_run: Only measure
+
+    Returns:
+        Counters: compacted, live_records, garbage_records, bytes_reclaimed
+    """
+    stats = dict.fromkeys(("compacted", "live_records", "garbage_records", "bytes_reclaimed"), 0)
+
+    live = []
+    live_bytes = garbage_bytes = 0
+    for record in store.scan(segment):
+        if not record.deleted and await _is_referenced(record):
+            live.append(record)
+            live_bytes += record.length
+        else:
+            stats["garbage_records"] += 1
+            garbage_bytes += record.length
+
+    stats["live_records"] = len(live)
+    total = live_bytes + garbage_bytes
+    if total == 0 or garbage_bytes / total < min_garbage:
+        return stats
+
+    if dry_run:
+        stats["compacted"] = 1
+        stats["bytes_reclaimed"] = garbage_bytes
+        return stats
+
+    size_before = store.segment_file(segment).stat().st_size
+
+    for record in live:
+        try:
+            data = store.read_sync(record.path)
+        except FileNotFoundError:
+            # Deleted meanwhile
+            continue
+
+        new_path = store.append(record.sha256, data)
+        if not await _repoint(record.sha256, record.path, new_path):
+            store.delete(new_path)
+
+    if store.segment_file(segment).stat().st_size != size_before:
+        logger.warning(f"Segment {segment} changed during compaction, keeping it")
+        return stats
+
+    store.remove_segment(segment)
+    stats["compacted"] = 1
+    stats["bytes_reclaimed"] = size_before - live_bytes
+    return stats
+
+
+async def pack_thumbnail_files(store: SegmentStore, dry_run: bool = False) -> int:
+    """
+    Move thumbnails stored as single files into segments.
+
+    Args:
+        store: Segment store
+        dry_run: Only count
+
+    Returns:
+        Number of thumbnails packed
+    """
+    packed = 0
+
+    async for blob in Blob.find(Blob.thumbnail_path != None):
+        if store.owns(blob.thumbnail_path):
+            continue
+        if dry_run:
+            packed += 1
+            continue
+
+        try:
+            data = b"".join([chunk async for chunk in storage_service.iter_file(blob.thumbnail_path)])
+        except FileNotFoundError:
+            logger.warning(f"Missing thumbnail for blob {blob.sha256}: {blob.thumbnail_path}")
+            continue
+
+        new_path = store.append(blob.sha256, data)
+        if await _repoint(blob.sha256, blob.thumbnail_path, new_path):
+            await storage_service.delete_file(blob.thumbnail_path)
+            packed += 1
+        else:
+            store.delete(new_path)
+
+    return packed
+
+
+async def compact(min_garbage: float, dry_run: bool = False, pack_files: bool = False) -> Dict[str, int]:
+    """
+    Compact all sealed segments.
+
+    Args:
+        min_garbage: Minimum fraction of garbage bytes to compact a segment
+        dry_run: Only report what would be compacted
+        pack_files: Move single-file thumbnails into segments first
+
+    Returns:
+        Counters: packed, segments, compacted, live_records, garbage_records, bytes_reclaimed
+    """
+    store = storage_service.segments
+    stats = dict.fromkeys(
+        ("packed", "segments", "compacted", "live_records", "garbage_records", "bytes_reclaimed"), 0
+    )
+
+    if pack_files:
+        stats["packed"] = await pack_thumbnail_files(store, dry_run=dry_run)
+
+    for segment in store.list_segments():
+        stats["segments"] += 1
+
+        if not store.is_sealed(segment):
+            continue
+        if time.time() - store.segment_file(segment).stat().st_mtime < SEALED_GRACE_SECONDS:
+            continue
+
+        for key, value in (await compact_segment(store, segment, min_garbage, dry_run)).items():
+            stats[key] += value
+
+    return stats
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Compact the thumbnail segment store.")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be reclaimed")
+    parser.add_argument(
+        "--min-garbage", type=float, default=0.3,
+        help="compact segments with at least this fraction of garbage (default 0.3)"
+    )
+    parser.add_argument(
+        "--pack-files", action="store_true",
+        help="move thumbnails stored as single files into segments first"
+    )
+    args = parser.parse_args()
+
+    if args.pack_files and not (settings.thumbnail_store == "segments" and storage_service.backend.is_local):
+        parser.error("--pack-files requires THUMBNAIL_STORE=segments and local storage")
+
+    await connect_to_mongo()
+    await init_db()
+
+    try:
+        stats = await compact(args.min_garbage, dry_run=args.dry_run, pack_files=args.pack_files)
+    finally:
+        await storage_service.close()
+        await close_mongo_connection()
+
+    mode = "Would compact" if args.dry_run else "Compacted"
+    print(
+        f"{mode} {stats['compacted']} of {stats['segments']} segments, reclaiming "
+        f"{stats['bytes_reclaimed'] / 1024 / 1024:.1f} MB "
+        f"({stats['live_records']} live, {stats['garbage_records']} garbage records); "
+        f"packed {stats['packed']} thumbnail files."
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
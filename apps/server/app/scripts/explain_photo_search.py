@@ -0,0 +1,140 @@
+"""Check query plans and latency of photo search on a real collection.
+
+Runs typical searches against one collection, prints the index each one
+uses, keys and documents examined, whether results were sorted in memory,
+and the p95 latency over repeated runs:
+
+    python -m app.scripts.explain_photo_search ABC123 --runs 50
+
+Exits with status 1 if a search scans the whole collection or misses
+P95_TARGET_MS. Sorting in memory is reported but accepted: a camera make
+without a model, for instance, is served by search_camera with the page
+sorted afterwards, or by walking search_captured, whichever the planner
+finds faster.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from app.core.database import close_mongo_connection, connect_to_mongo, init_db
+from app.models.photo import Photo, build_search_query
+
+logger = logging.getLogger(__name__)
+
+# p95 target for one page of results
+P95_TARGET_MS = 50.0
+
+PAGE_SIZE = 50
+
+
+def _stages(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flatten a plan tree into its stages."""
+    stages = [plan]
+    for child in [plan.get("inputStage"), *plan.get("inputStages", [])]:
+        if child:
+            stages.extend(_stages(child))
+    return stages
+
+
+async def _sample_criteria(code: str) -> Dict[str, Dict[str, Any]]:
+    """Build typical searches from the values of the collection."""
+    base = {"collection_code": code}
+    searches: Dict[str, Dict[str, Any]] = {
+        "newest captured": {},
+        "newest uploaded": {"sort": "uploaded_at"},
+        "portrait": {"orientation": "portrait"},
+        "20+ megapixels": {"min_megapixels": 20},
+    }
+
+    newest = await Photo.find(build_search_query(**base)[0]).sort(
+        [("metadata.captured_at", -1)]
+    ).first_or_none()
+    captured: Optional[Any] = newest.metadata.get("captured_at") if newest else None
+    if captured:
+        searches["last 30 days"] = {"captured_after": captured - timedelta(days=30)}
+
+    cameras = await Photo.aggregate([
+        {"$match": {"collection_code": code, "is_deleted": False, "metadata.camera_make": {"$exists": True}}},
+        {"$group": {"_id": {"make": "$metadata.camera_make", "model": "$metadata.camera_model"}, "n": {"$sum": 1}}},
+        {"$sort": {"n": -1}},
+        {"$limit": 1}
+    ]).to_list()
+    if cameras:
+        camera = cameras[0]["_id"]
+        searches["camera make"] = {"camera_make": camera["make"]}
+        searches["camera model"] = {"camera_make": camera["make"], "camera_model": camera.get("model")}
+        if captured:
+            searches["camera, last year"] = {
+                "camera_make": camera["make"],
+                "captured_after": captured - timedelta(days=365)
+            }
+
+    return {name: {**base, **criteria} for name, criteria in searches.items()}
+
+
+async def check(code: str, runs: int) -> bool:
+    """
+    Explain and time the sample searches of a collection.
+
+    Returns:
+        True if every search uses an index and meets the latency target
+    """
+    collection = Photo.get_motor_collection()
+    all_ok = True
+
+    for name, criteria in (await _sample_criteria(code)).items():
+        query, sort = build_search_query(**criteria)
+
+        explain = await collection.find(query).sort(sort).limit(PAGE_SIZE).explain()
+        winning = explain["queryPlanner"]["winningPlan"]
+        stages = _stages(winning.get("queryPlan", winning))
+        indexes = [stage["indexName"] for stage in stages if stage.get("indexName")]
+        in_memory_sort = any(stage["stage"] == "SORT" for stage in stages)
+        collection_scan = any(stage["stage"] == "COLLSCAN" for stage in stages)
+        stats = explain.get("executionStats", {})
+
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            await collection.find(query).sort(sort).limit(PAGE_SIZE).to_list(PAGE_SIZE)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+
+        ok = not collection_scan and p95 <= P95_TARGET_MS
+        all_ok = all_ok and ok
+        print(
+            f"{'ok  ' if ok else 'FAIL'} {name:<20} index={','.join(indexes) or '-'} "
+            f"keys={stats.get('totalKeysExamined', '?')} docs={stats.get('totalDocsExamined', '?')} "
+            f"returned={stats.get('nReturned', '?')} sort={'memory' if in_memory_sort else 'index'} "
+            f"p95={p95:.1f}ms"
+        )
+
+    return all_ok
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Explain and time photo searches.")
+    parser.add_argument("code", help="collection code")
+    parser.add_argument("--runs", type=int, default=20, help="timed runs per search")
+    args = parser.parse_args()
+
+    await connect_to_mongo()
+    await init_db()
+
+    try:
+        ok = await check(args.code.strip().upper(), args.runs)
+    finally:
+        await close_mongo_connection()
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,136 @@
+"""Load test photo uploads at and above capacity.
+
+Sends single-photo uploads from concurrent clients, first at the given
+concurrency (the server's capacity, e.g. UPLOAD_MAX_INFLIGHT_REQUESTS),
+then at --overload times that, and reports statuses and the latency of
+accepted uploads for both phases:
+
+    python -m app.scripts.load_test_uploads http://localhost:8000 ABC123 --concurrency 32
+
+With admission control, uploads beyond capacity are rejected early with
+503/429 and the latency of accepted uploads stays stable. Exits with
+status 1 if the p95 latency of accepted uploads at overload exceeds
+MAX_P95_RATIO times the p95 at capacity. All requests come from one
+address: disable the per-IP limit (UPLOAD_RATE_PER_IP=0) to measure the
+global budget. Requires httpx (development dependency).
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import httpx
+from PIL import Image
+
+# Accepted p95 latency at overload relative to capacity
+MAX_P95_RATIO = 1.5
+
+
+def make_photo(size_kb: int) -> bytes:
+    """Create a JPEG of roughly the given size from random pixels."""
+    side = max(16, int((size_kb * 1024 / 1.5) ** 0.5))
+    image = Image.frombytes("RGB", (side, side), os.urandom(side * side * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile (0 for no values)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+async def run_phase(
+    client: httpx.AsyncClient,
+    url: str,
+    photo: bytes,
+    concurrency: int,
+    duration: float
+) -> Tuple[Counter, List[float], float]:
+    """
+    Upload from concurrent clients for a duration.
+
+    Returns:
+        Status counts, latencies of accepted uploads (ms), elapsed seconds
+    """
+    statuses: Counter = Counter()
+    latencies: List[float] = []
+    deadline = time.perf_counter() + duration
+
+    async def worker(n: int) -> None:
+        i = 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await client.post(url, files={"files": (f"load-{n}-{i}.jpg", photo, "image/jpeg")})
+                statuses[response.status_code] += 1
+                if response.status_code == 200:
+                    latencies.append((time.perf_counter() - started) * 1000)
+                else:
+                    # Back off like a client honouring Retry-After would, but briefly
+                    await asyncio.sleep(0.05)
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            i += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    return statuses, latencies, time.perf_counter() - started
+
+
+def report(name: str, statuses: Counter, latencies: List[float], elapsed: float) -> Dict[str, float]:
+    """Print and return the summary of a phase."""
+    summary = {
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "accepted_per_s": len(latencies) / elapsed,
+    }
+    print(
+        f"{name}: {dict(statuses)}  accepted {summary['accepted_per_s']:.1f}/s  "
+        f"p50 {summary['p50']:.0f} ms  p95 {summary['p95']:.0f} ms  p99 {summary['p99']:.0f} ms"
+    )
+    return summary
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test photo uploads.")
+    parser.add_argument("base_url", help="server URL, e.g. http://localhost:8000")
+    parser.add_argument("code", help="collection code to upload to")
+    parser.add_argument("--concurrency", type=int, default=32, help="clients at capacity")
+    parser.add_argument("--overload", type=float, default=3.0, help="overload factor")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per phase")
+    parser.add_argument("--size-kb", type=int, default=2048, help="photo size")
+    args = parser.parse_args()
+
+    url = f"{args.base_url.rstrip('/')}/api/v1/collections/{args.code}/photos"
+    photo = make_photo(args.size_kb)
+    overloaded = int(args.concurrency * args.overload)
+    limits = httpx.Limits(max_connections=overloaded, max_keepalive_connections=overloaded)
+
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        base = report(
+            f"{args.concurrency} clients",
+            *await run_phase(client, url, photo, args.concurrency, args.duration)
+        )
+        over = report(
+            f"{overloaded} clients",
+            *await run_phase(client, url, photo, overloaded, args.duration)
+        )
+
+    ratio = over["p95"] / base["p95"] if base["p95"] else float("inf")
+    print(f"p95 at {args.overload:g}x capacity: {ratio:.2f}x (limit {MAX_P95_RATIO}x)")
+    if ratio > MAX_P95_RATIO:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
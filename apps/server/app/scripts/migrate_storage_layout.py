@@ -0,0 +1,226 @@
+"""Move stored files into the configured fan-out layout.
+
+Handles two kinds of files:
+
+- Photos stored before content addressing as
+  uploads/{code}/{year}/{month}/{id}_{name}: they are hashed, moved to
+  their content-addressed path and registered as blobs, so identical files
+  are deduplicated on the way.
+- Blobs stored under another fan-out, after STORAGE_FANOUT_DEPTH or
+  STORAGE_FANOUT_WIDTH was changed.
+
+    python -m app.scripts.migrate_storage_layout --dry-run
+    python -m app.scripts.migrate_storage_layout
+
+Each file is copied (a hard link on local storage), the records are
+updated, and only then the old file is deleted, so the command can be
+interrupted and run again.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import mimetypes
+from pathlib import PurePosixPath
+from typing import Dict, Tuple
+
+from beanie.operators import Set
+
+from app.core.config import settings
+from app.core.database import close_mongo_connection, connect_to_mongo, init_db
+from app.models.blob import (
+    Blob,
+    acquire_blob,
+    is_blob_deleting,
+    release_blob,
+    remove_blob,
+    set_blob_thumbnail,
+    set_blob_volume,
+)
+from app.models.photo import Photo
+from app.services.storage_service import storage_service
+
+logger = logging.getLogger(__name__)
+
+
+async def _hash_stored_file(file_path: str) -> Tuple[str, int]:
+    """Compute the SHA-256 and size of a stored file."""
+    sha256 = hashlib.sha256()
+    size = 0
+
+    async for chunk in storage_service.iter_file(file_path):
+        sha256.update(chunk)
+        size += len(chunk)
+
+    return sha256.hexdigest(), size
+
+
+async def migrate_legacy_photo(photo: Photo) -> bool:
+    """
+    Move a photo stored before content addressing into its blob path.
+
+    Args:
+        photo: Photo without content_hash
+
+    Returns:
+        True if migrated, False if its file is missing
+    """
+    try:
+        content_hash, size = await _hash_stored_file(photo.file_path)
+    except FileNotFoundError:
+        return False
+
+    extension = mimetypes.guess_extension(photo.mime_type) or ''
+    blob = await acquire_blob(content_hash, size, storage_service.get_blob_path(content_hash, extension))
+
+    try:
+        volume_id = await storage_service.copy_file(photo.file_path, blob.file_path)
+    except FileNotFoundError:
+        # Deleted meanwhile
+        released = await release_blob(content_hash)
+        if released:
+            if await is_blob_deleting(released):
+                await storage_service.delete_file(released.file_path)
+            await remove_blob(released)
+        return False
+
+    thumbnail_path = blob.thumbnail_path
+    if thumbnail_path is None and photo.thumbnail_path:
+        try:
+            thumbnail_path = storage_service.get_blob_thumbnail_path(content_hash)
+            await storage_service.copy_file(photo.thumbnail_path, thumbnail_path)
+            await set_blob_thumbnail(content_hash, thumbnail_path)
+        except FileNotFoundError:
+            thumbnail_path = None
+
+    old_paths = {photo.file_path, photo.thumbnail_path} - {blob.file_path, thumbnail_path, None}
+
+    photo.file_path = blob.file_path
+    photo.thumbnail_path = thumbnail_path
+    photo.content_hash = content_hash
+    photo.volume_id = volume_id
+    await photo.save()
+
+    if volume_id != blob.volume_id:
+        await set_blob_volume(content_hash, volume_id)
+
+    for old_path in old_paths:
+        await storage_service.delete_file(old_path)
+
+    return True
+
+
+async def migrate_blob(blob: Blob) -> bool:
+    """
+    Move a blob's files to the configured fan-out layout.
+
+    Args:
+        blob: Blob document
+
+    Returns:
+        True if moved, False if already in layout or its file is missing
+    """
+    extension = PurePosixPath(blob.file_path).suffix
+    file_path = storage_service.get_blob_path(blob.sha256, extension)
+    thumbnail_path = blob.thumbnail_path
+    if thumbnail_path and not storage_service.segments.owns(thumbnail_path):
+        # Packed thumbnails have no directory layout and stay where they are
+        thumbnail_path = storage_service.get_blob_thumbnail_path(blob.sha256)
+
+    if file_path == blob.file_path and thumbnail_path == blob.thumbnail_path:
+        return False
+
+    try:
+        volume_id = await storage_service.copy_file(blob.file_path, file_path)
+    except FileNotFoundError:
+        logger.warning(f"Missing file for blob {blob.sha256}: {blob.file_path}")
+        return False
+
+    if thumbnail_path and thumbnail_path != blob.thumbnail_path:
+        try:
+            await storage_service.copy_file(blob.thumbnail_path, thumbnail_path)
+        except FileNotFoundError:
+            thumbnail_path = None
+
+    old_paths = {blob.file_path, blob.thumbnail_path} - {file_path, thumbnail_path, None}
+    changes = {
+        Blob.file_path: file_path,
+        Blob.thumbnail_path: thumbnail_path,
+        Blob.volume_id: volume_id
+    }
+
+    await Blob.find_one(Blob.sha256 == blob.sha256).update(Set(changes))
+    await Photo.find(Photo.content_hash == blob.sha256).update(Set({
+        Photo.file_path: file_path,
+        Photo.thumbnail_path: thumbnail_path,
+        Photo.volume_id: volume_id
+    }))
+
+    for old_path in old_paths:
+        await storage_service.delete_file(old_path)
+
+    return True
+
+
+async def migrate(dry_run: bool = False) -> Dict[str, int]:
+    """
+    Migrate legacy photos and blobs to the configured layout.
+
+    Args:
+        dry_run: Only count what would be migrated
+
+    Returns:
+        Counters: legacy_photos, legacy_missing, blobs_moved
+    """
+    stats = {"legacy_photos": 0, "legacy_missing": 0, "blobs_moved": 0}
+
+    legacy = Photo.find(Photo.content_hash == None, Photo.is_deleted == False)
+
+    if dry_run:
+        stats["legacy_photos"] = await legacy.count()
+        async for blob in Blob.find_all():
+            extension = PurePosixPath(blob.file_path).suffix
+            if blob.file_path != storage_service.get_blob_path(blob.sha256, extension):
+                stats["blobs_moved"] += 1
+        return stats
+
+    # Blobs first, so legacy photos deduplicated against them land in the new layout
+    async for blob in Blob.find_all():
+        if await migrate_blob(blob):
+            stats["blobs_moved"] += 1
+
+    async for photo in legacy:
+        if await migrate_legacy_photo(photo):
+            stats["legacy_photos"] += 1
+        else:
+            stats["legacy_missing"] += 1
+
+    return stats
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Migrate stored files to the fan-out layout.")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would move")
+    args = parser.parse_args()
+
+    await connect_to_mongo()
+    await init_db()
+
+    try:
+        stats = await migrate(dry_run=args.dry_run)
+    finally:
+        await storage_service.close()
+        await close_mongo_connection()
+
+    mode = "Would migrate" if args.dry_run else "Migrated"
+    print(
+        f"{mode} {stats['legacy_photos']} legacy photos and moved {stats['blobs_moved']} blobs "
+        f"(fan-out depth {settings.storage_fanout_depth}, width {settings.storage_fanout_width}); "
+        f"{stats['legacy_missing']} legacy photos had no file."
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,135 @@
+"""Move stored files to the volume the hash ring assigns them to.
+
+Run after adding a volume to STORAGE_VOLUMES:
+
+    python -m app.scripts.rebalance_volumes --dry-run
+    python -m app.scripts.rebalance_volumes
+
+Reads check every volume, so the API can keep serving while files move.
+Files whose target volume is short on free space stay where they are.
+"""
+
+import argparse
+import asyncio
+import logging
+import re
+from typing import Dict
+
+from beanie.operators import Set
+
+from app.core.database import close_mongo_connection, connect_to_mongo, init_db
+from app.models.blob import set_blob_volume
+from app.models.photo import Photo
+from app.services.storage_backends import LocalStorageBackend, move_file
+from app.services.storage_service import storage_service
+
+logger = logging.getLogger(__name__)
+
+CONTENT_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+# Directories holding stored files (incoming/ and tmp/ are transient)
+STORED_PREFIXES = ("uploads", "thumbnails")
+
+
+async def _record_volume(key: str, volume_id: str) -> None:
+    """Update the volume of the photos (and blob) stored under a key."""
+    if not key.startswith("uploads/"):
+        return
+
+    content_hash = LocalStorageBackend.placement_key(key)
+    if CONTENT_HASH_PATTERN.match(content_hash):
+        await set_blob_volume(content_hash, volume_id)
+    else:
+        # Files stored before content addressing
+        await Photo.find(Photo.file_path == key).update(Set({Photo.volume_id: volume_id}))
+
+
+async def rebalance(backend: LocalStorageBackend, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Move every stored file that is not on its ring owner.
+
+    Args:
+        backend: Local multi-volume backend
+        dry_run: Only count the files that would move
+
+    Returns:
+        Counters: scanned, moved, bytes_moved, duplicates_removed, skipped_full, failed
+    """
+    stats = dict.fromkeys(
+        ("scanned", "moved", "bytes_moved", "duplicates_removed", "skipped_full", "failed"), 0
+    )
+
+    for volume_id, root in backend.volumes.items():
+        for prefix in STORED_PREFIXES:
+            for path in (root / prefix).rglob("*"):
+                if not path.is_file() or path.name.startswith("."):
+                    continue
+
+                stats["scanned"] += 1
+                key = path.relative_to(root).as_posix()
+                target = backend.ring.get_node(backend.placement_key(key))
+                if target == volume_id:
+                    continue
+
+                destination = backend.volumes[target] / key
+                try:
+                    size = path.stat().st_size
+
+                    if destination.exists():
+                        # Content-addressed: the copy on the target is identical
+                        if not dry_run:
+                            path.unlink()
+                            await _record_volume(key, target)
+                        stats["duplicates_removed"] += 1
+                        continue
+
+                    if not backend.has_free_space(target):
+                        stats["skipped_full"] += 1
+                        continue
+
+                    if not dry_run:
+                        await asyncio.to_thread(move_file, path, destination)
+                        await _record_volume(key, target)
+
+                    stats["moved"] += 1
+                    stats["bytes_moved"] += size
+
+                except FileNotFoundError:
+                    # Deleted while rebalancing
+                    continue
+                except OSError as e:
+                    logger.error(f"Failed to move {key} from {volume_id} to {target}: {e}")
+                    stats["failed"] += 1
+
+    return stats
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebalance files across storage volumes.")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would move")
+    args = parser.parse_args()
+
+    backend = storage_service.backend
+    if not isinstance(backend, LocalStorageBackend):
+        raise SystemExit("Rebalancing applies to local storage volumes only")
+
+    await connect_to_mongo()
+    await init_db()
+
+    try:
+        stats = await rebalance(backend, dry_run=args.dry_run)
+    finally:
+        await close_mongo_connection()
+
+    mode = "Would move" if args.dry_run else "Moved"
+    print(
+        f"Scanned {stats['scanned']} files on {len(backend.volumes)} volumes. "
+        f"{mode} {stats['moved']} files ({stats['bytes_moved'] / 1024 / 1024:.1f} MB), "
+        f"removed {stats['duplicates_removed']} duplicates, "
+        f"skipped {stats['skipped_full']} (target full), failed {stats['failed']}."
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
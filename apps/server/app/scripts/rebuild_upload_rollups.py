@@ -0,0 +1,133 @@
+"""Rebuild upload rollups from stored photos.
+
+Rollups are maintained at upload time; this fills them in for photos
+uploaded before they existed, or repairs them:
+
+    python -m app.scripts.rebuild_upload_rollups
+    python -m app.scripts.rebuild_upload_rollups --before 2024-05-01
+
+Buckets before --before (truncated to the day, default: today) are
+recomputed and overwritten; later buckets, which the running application
+increments, are left alone. Photos deleted since their upload are
+counted, failed uploads are not. Buckets past their retention are skipped.
+Distinct uploaders of the rebuilt buckets are added (never removed: the
+recomputed set includes every uploader counted before).
+"""
+
+import argparse
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from pymongo import UpdateOne
+
+from app.core.database import close_mongo_connection, connect_to_mongo, init_db
+from app.models.photo import Photo
+from app.models.upload_rollup import (
+    GLOBAL_SCOPE,
+    GRANULARITIES,
+    ROLLUP_RETENTION,
+    UploadRollup,
+    UploadRollupUploader,
+    expires_at,
+    truncate,
+    uploader_key,
+    uploader_update,
+)
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+async def rebuild(before: datetime) -> int:
+    """
+    Recompute buckets from photos uploaded before a day.
+
+    Args:
+        before: Start of the first day to leave alone
+
+    Returns:
+        Number of buckets written
+    """
+    now = datetime.now()
+    oldest = {
+        granularity: (now - retention if retention else None)
+        for granularity, retention in ROLLUP_RETENTION.items()
+    }
+    counters: Dict[Tuple[str, str, datetime], List] = defaultdict(lambda: [0, 0, set()])
+
+    cursor = Photo.get_motor_collection().find(
+        {"uploaded_at": {"$lt": before}, "processing_status": "processed"},
+        projection={"collection_code": 1, "file_size": 1, "uploaded_at": 1, "uploader_info": 1}
+    )
+
+    async for doc in cursor:
+        key = uploader_key(doc.get("uploader_info"))
+        for granularity in GRANULARITIES:
+            bucket = truncate(doc["uploaded_at"], granularity)
+            if oldest[granularity] and bucket + GRANULARITIES[granularity] < oldest[granularity]:
+                continue
+            for scope in (doc["collection_code"], GLOBAL_SCOPE):
+                counter = counters[(scope, granularity, bucket)]
+                counter[0] += 1
+                counter[1] += doc.get("file_size", 0)
+                if key:
+                    counter[2].add(key)
+
+    operations = []
+    uploader_operations = []
+    for (scope, granularity, bucket), (uploads, size, uploaders) in counters.items():
+        operations.append(UpdateOne(
+            {"scope": scope, "granularity": granularity, "bucket": bucket},
+            {
+                "$set": {
+                    "uploads": uploads,
+                    "bytes": size,
+                    "expires_at": expires_at(bucket, granularity)
+                },
+                # Uploader list of older versions, now in UploadRollupUploader
+                "$unset": {"uploaders": ""}
+            },
+            upsert=True
+        ))
+        uploader_operations.extend(
+            uploader_update(scope, granularity, bucket, uploader) for uploader in sorted(uploaders)
+        )
+
+    for collection, writes in (
+        (UploadRollup.get_motor_collection(), operations),
+        (UploadRollupUploader.get_motor_collection(), uploader_operations),
+    ):
+        for i in range(0, len(writes), BATCH_SIZE):
+            await collection.bulk_write(writes[i:i + BATCH_SIZE], ordered=False)
+
+    return len(operations)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild upload rollups from photos.")
+    parser.add_argument(
+        "--before",
+        type=datetime.fromisoformat,
+        default=datetime.now(),
+        help="rebuild days before this date (default: today)"
+    )
+    args = parser.parse_args()
+
+    await connect_to_mongo()
+    await init_db()
+
+    try:
+        written = await rebuild(truncate(args.before, "day"))
+    finally:
+        await close_mongo_connection()
+
+    print(f"Wrote {written} rollup buckets.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,211 @@
+"""Reconcile per-collection photo counts and byte totals with the photos.
+
+Collection statistics are kept up to date by atomic increments; this
+repairs drift (e.g. a process stopped between storing a photo and its
+increment, or counters written by older versions):
+
+    python -m app.scripts.reconcile_collection_statistics
+    python -m app.scripts.reconcile_collection_statistics --full
+    python -m app.scripts.reconcile_collection_statistics --dry-run
+
+Incremental runs only check collections with photos uploaded or deleted
+since the previous run (its start, minus WATERMARK_LAG for writes that were
+in flight). The first run, and --full, check all collections with a single
+$group over photos. Counts are recomputed per collection from its
+processed, non-deleted photos and fixes are written with bulk_write.
+
+A fix is only applied if the stored counters did not change since they
+were read, so concurrent uploads are not lost; skipped collections are
+checked again by the next run.
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from app.core.database import close_mongo_connection, connect_to_mongo, init_db
+from app.models.collection import Collection
+from app.models.photo import Photo
+from app.models.system_statistics import get_system_statistics, set_collections_watermark
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+# Photos written shortly before the previous run started may have been
+# counted after it read them, so they are checked again
+WATERMARK_LAG = timedelta(minutes=10)
+
+
+async def count_photos(codes: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Count processed, non-deleted photos per collection.
+
+    Args:
+        codes: Collection codes to count (None: all collections)
+
+    Returns:
+        Collection code -> {photos, bytes, last_upload_at}
+    """
+    match: Dict[str, Any] = {"processing_status": "processed", "is_deleted": False}
+    if codes is not None:
+        match["collection_code"] = {"$in": codes}
+
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": "$collection_code",
+            "photos": {"$sum": 1},
+            "bytes": {"$sum": "$file_size"},
+            "last_upload_at": {"$max": "$uploaded_at"}
+        }},
+    ]
+    groups = await Photo.get_motor_collection().aggregate(pipeline, allowDiskUse=True).to_list(None)
+    return {group.pop("_id"): group for group in groups}
+
+
+async def changed_codes(since: datetime) -> List[str]:
+    """
+    Get collections with photos uploaded or deleted since a time.
+
+    Args:
+        since: Start of the window
+
+    Returns:
+        Collection codes
+    """
+    return await Photo.get_motor_collection().distinct(
+        "collection_code",
+        {"$or": [{"uploaded_at": {"$gte": since}}, {"deleted_at": {"$gte": since}}]}
+    )
+
+
+def statistics_fix(collection: Dict[str, Any], actual: Dict[str, Any]) -> Optional[UpdateOne]:
+    """
+    Build the update repairing the statistics of a collection.
+
+    Args:
+        collection: Collection document (code and statistics)
+        actual: Counted {photos, bytes, last_upload_at}
+
+    Returns:
+        UpdateOne operation, or None if the statistics are correct
+    """
+    stored = collection.get("statistics") or {}
+    stored_last = stored.get("last_upload_at")
+    actual_last = actual.get("last_upload_at")
+
+    update: Dict[str, Any] = {}
+    if stored.get("total_photos") != actual["photos"] or stored.get("total_size_bytes") != actual["bytes"]:
+        update["$set"] = {
+            "statistics.total_photos": actual["photos"],
+            "statistics.total_size_bytes": actual["bytes"]
+        }
+    if actual_last and (stored_last is None or stored_last < actual_last):
+        update["$max"] = {"statistics.last_upload_at": actual_last}
+    if "photo_count" in stored:
+        # Written by older versions instead of total_photos
+        update["$unset"] = {"statistics.photo_count": ""}
+
+    if not update:
+        return None
+
+    return UpdateOne(
+        {
+            "_id": collection["_id"],
+            "statistics.total_photos": stored.get("total_photos"),
+            "statistics.total_size_bytes": stored.get("total_size_bytes")
+        },
+        update
+    )
+
+
+async def reconcile(codes: Optional[List[str]], dry_run: bool) -> Dict[str, int]:
+    """
+    Check and repair the statistics of collections.
+
+    Args:
+        codes: Collection codes to check (None: all collections)
+        dry_run: Only count the collections that need a fix
+
+    Returns:
+        Counts of checked, drifted, fixed and skipped collections
+    """
+    counters = {"checked": 0, "drifted": 0, "fixed": 0, "skipped": 0}
+    collections = Collection.get_motor_collection()
+    projection = {"code": 1, "statistics": 1}
+
+    if codes is None:
+        actual = await count_photos()
+        batches = [collections.find({}, projection=projection)]
+    else:
+        actual = {}
+        batches = []
+        for i in range(0, len(codes), BATCH_SIZE):
+            batch = codes[i:i + BATCH_SIZE]
+            actual.update(await count_photos(batch))
+            batches.append(collections.find({"code": {"$in": batch}}, projection=projection))
+
+    empty = {"photos": 0, "bytes": 0, "last_upload_at": None}
+    operations: List[UpdateOne] = []
+
+    async def flush() -> None:
+        if not dry_run and operations:
+            result = await collections.bulk_write(operations, ordered=False)
+            counters["fixed"] += result.modified_count
+            counters["skipped"] += len(operations) - result.matched_count
+        operations.clear()
+
+    for cursor in batches:
+        async for collection in cursor:
+            counters["checked"] += 1
+            operation = statistics_fix(collection, actual.get(collection["code"], empty))
+            if operation:
+                counters["drifted"] += 1
+                operations.append(operation)
+                if len(operations) >= BATCH_SIZE:
+                    await flush()
+    await flush()
+
+    return counters
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Reconcile collection statistics with photos.")
+    parser.add_argument("--full", action="store_true", help="check all collections")
+    parser.add_argument("--dry-run", action="store_true", help="only report collections that need a fix")
+    args = parser.parse_args()
+
+    await connect_to_mongo()
+    await init_db()
+
+    try:
+        started_at = datetime.now()
+        watermark = (await get_system_statistics()).collections_reconciled_until
+
+        codes = None
+        if watermark and not args.full:
+            codes = await changed_codes(watermark - WATERMARK_LAG)
+
+        counters = await reconcile(codes, args.dry_run)
+
+        if not args.dry_run:
+            await set_collections_watermark(started_at)
+    finally:
+        await close_mongo_connection()
+
+    scope = "all" if codes is None else f"changed since {watermark - WATERMARK_LAG}"
+    print(
+        f"Checked {counters['checked']} collections ({scope}): {counters['drifted']} drifted, "
+        f"{counters['fixed']} fixed, {counters['skipped']} skipped (changed concurrently)"
+        + (" [dry run]" if args.dry_run else "")
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
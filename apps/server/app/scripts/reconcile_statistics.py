@@ -0,0 +1,40 @@
+"""Recompute system statistics and repair drift.
+
+The application does this every STATISTICS_RECONCILE_MINUTES; run it by
+hand after restoring a backup or importing photos directly:
+
+    python -m app.scripts.reconcile_statistics --dry-run   # report only
+    python -m app.scripts.reconcile_statistics
+"""
+
+import argparse
+import asyncio
+import logging
+
+from app.core.database import close_mongo_connection, connect_to_mongo, init_db
+from app.models.system_statistics import reconcile_system_statistics
+
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Reconcile system statistics.")
+    parser.add_argument("--dry-run", action="store_true", help="only report the drift")
+    args = parser.parse_args()
+
+    await connect_to_mongo()
+    await init_db()
+
+    try:
+        result = await reconcile_system_statistics(dry_run=args.dry_run)
+    finally:
+        await close_mongo_connection()
+
+    for name, drift in result["drift"].items():
+        print(f"{name}: {drift or 'no drift'}")
+    print("Repaired." if result["repaired"] else "Nothing written." if args.dry_run else "No repair needed.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
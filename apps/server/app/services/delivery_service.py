@@ -0,0 +1,223 @@
+"""Delivery service for serving stored files, optionally offloaded to the proxy."""
+
+import mimetypes
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import quote, urlencode
+
+from fastapi import Response
+from fastapi.responses import FileResponse, RedirectResponse
+
+from app.core.config import settings
+from app.core.security import sign_storage_path
+from app.services.storage_service import storage_service
+
+
+class DeliveryService:
+    """
+    Build responses for stored files.
+
+    In "direct" mode the file is streamed by the API worker. In
+    "x-accel-redirect" (nginx) and "x-sendfile" (Apache/lighttpd) modes the
+    worker only returns a header and the front proxy sends the bytes.
+    With a remote storage backend (S3) clients are sent to presigned URLs
+    and download from the object store directly.
+    """
+
+    DELIVERY_MODES = {'direct', 'x-accel-redirect', 'x-sendfile'}
+
+    def __init__(self):
+        self.mode = settings.file_delivery_mode.lower()
+        if self.mode not in self.DELIVERY_MODES:
+            raise ValueError(
+                f"Invalid file delivery mode '{settings.file_delivery_mode}'. "
+                f"Must be one of {self.DELIVERY_MODES}"
+            )
+        self.internal_prefix = settings.file_delivery_internal_prefix.rstrip('/')
+
+    def resolve_path(self, file_path: str) -> Optional[Path]:
+        """
+        Resolve a relative storage path, rejecting anything outside the storage volumes.
+
+        Args:
+            file_path: Path relative to the storage root
+
+        Returns:
+            Absolute path if it stays inside its volume, None otherwise
+        """
+        try:
+            return storage_service.backend.get_local_path(file_path)
+        except ValueError:
+            return None
+
+    async def build_response(
+        self,
+        file_path: str,
+        media_type: Optional[str] = None,
+        filename: Optional[str] = None
+    ) -> Optional[Response]:
+        """
+        Build a response delivering a stored file.
+
+        Args:
+            file_path: Path relative to the storage root
+            media_type: Content type (guessed from the path if omitted)
+            filename: Optional filename for the Content-Disposition header
+
+        Returns:
+            Response for the file, or None if the file does not exist
+        """
+        if storage_service.segments.owns(file_path):
+            return await self._build_segment_response(file_path, media_type, filename)
+
+        if not storage_service.backend.is_local:
+            # Remote backend: the object store checks existence itself
+            url = await storage_service.backend.get_presigned_url(
+                file_path,
+                settings.signed_url_expires_minutes * 60
+            )
+            return RedirectResponse(url, status_code=307)
+
+        full_path = self.resolve_path(file_path)
+        if full_path is None or not full_path.is_file():
+            return None
+
+        media_type = media_type or mimetypes.guess_type(full_path.name)[0] or 'application/octet-stream'
+
+        if self.mode == 'direct':
+            return FileResponse(
+                full_path,
+                media_type=media_type,
+                filename=filename,
+                content_disposition_type='inline'
+            )
+
+        headers = {}
+        if filename:
+            headers['Content-Disposition'] = f"inline; filename*=utf-8''{quote(filename)}"
+
+        if self.mode == 'x-accel-redirect':
+            # With several volumes nginx needs one internal location per volume:
+            # {prefix}/{volume_id}/ -> volume root
+            volumes = storage_service.backend.volumes
+            volume_id = storage_service.backend.get_volume_id(file_path)
+            relative = full_path.relative_to(volumes[volume_id]).as_posix()
+            prefix = self.internal_prefix if len(volumes) == 1 else f"{self.internal_prefix}/{volume_id}"
+            headers['X-Accel-Redirect'] = f"{prefix}/{quote(relative)}"
+        else:
+            headers['X-Sendfile'] = str(full_path)
+
+        return Response(status_code=200, media_type=media_type, headers=headers)
+
+    async def _build_segment_response(
+        self,
+        file_path: str,
+        media_type: Optional[str],
+        filename: Optional[str]
+    ) -> Optional[Response]:
+        """
+        Build a response for a record of the thumbnail segment store.
+
+        Records are small and read with a single pread, so they are always
+        sent by the API worker; the proxy cannot serve a byte range of a
+        segment file through X-Accel-Redirect/X-Sendfile.
+        """
+        try:
+            content = await storage_service.segments.read(file_path)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        headers = {}
+        if filename:
+            headers['Content-Disposition'] = f"inline; filename*=utf-8''{quote(filename)}"
+
+        return Response(
+            content=content,
+            media_type=media_type or 'image/jpeg',
+            headers=headers
+        )
+
+    async def get_signed_url(
+        self,
+        file_path: str,
+        expires_minutes: Optional[int] = None
+    ) -> Dict[str, object]:
+        """
+        Create a signed, expiring URL for a stored file.
+
+        Remote backends return their own presigned URL, so the bytes never
+        pass through the API.
+
+        Args:
+            file_path: Path relative to the storage root
+            expires_minutes: Lifetime of the URL (defaults to settings)
+
+        Returns:
+            Dictionary with url and expires_at
+        """
+        lifetime = expires_minutes or settings.signed_url_expires_minutes
+        expires = int(time.time()) + lifetime * 60
+
+        presigned = None
+        if not storage_service.segments.owns(file_path):
+            presigned = await storage_service.backend.get_presigned_url(file_path, lifetime * 60)
+        if presigned:
+            return {'url': presigned, 'expires_at': datetime.utcfromtimestamp(expires)}
+
+        signature = sign_storage_path(file_path, expires)
+
+        query = urlencode({'expires': expires, 'signature': signature})
+        return {
+            'url': f"{storage_service.get_file_url(file_path)}?{query}",
+            'expires_at': datetime.utcfromtimestamp(expires)
+        }
+
+    async def get_signed_upload_url(
+        self,
+        file_path: str,
+        size: int,
+        content_type: str,
+        expires_minutes: Optional[int] = None
+    ) -> Dict[str, object]:
+        """
+        Create a signed, expiring URL for uploading a file directly to storage.
+
+        Remote backends return a presigned object-store URL. For local storage
+        the URL points at the API storage route, which accepts a PUT of exactly
+        `size` bytes.
+
+        Args:
+            file_path: Destination path relative to the storage root
+            size: Exact file size in bytes
+            content_type: MIME type the client will send
+            expires_minutes: Lifetime of the URL (defaults to settings)
+
+        Returns:
+            Dictionary with url, method, headers and expires_at
+        """
+        lifetime = expires_minutes or settings.signed_url_expires_minutes
+        expires = int(time.time()) + lifetime * 60
+
+        presigned = await storage_service.backend.get_presigned_upload(
+            file_path, lifetime * 60, size, content_type
+        )
+        if presigned is None:
+            signature = sign_storage_path(file_path, expires, "PUT", size)
+            query = urlencode({'expires': expires, 'size': size, 'signature': signature})
+            presigned = {
+                'url': f"{storage_service.get_file_url(file_path)}?{query}",
+                'headers': {'Content-Type': content_type}
+            }
+
+        return {
+            'url': presigned['url'],
+            'method': 'PUT',
+            'headers': presigned['headers'],
+            'expires_at': datetime.utcfromtimestamp(expires)
+        }
+
+
+# Global delivery service instance
+delivery_service = DeliveryService()
@@ -0,0 +1,278 @@
+"""Event service publishing live upload events to server-sent event streams."""
+
+import asyncio
+import json
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.models.collection import Collection
+from app.models.photo import Photo
+
+logger = logging.getLogger(__name__)
+
+# Comment line sent when nothing happened, keeps proxies from closing the stream
+HEARTBEAT_SECONDS = 15
+
+# Client reconnect delay sent at the start of the stream
+RETRY_MS = 5000
+
+# Delay before watching a change stream again after an error
+WATCH_RETRY_SECONDS = 5
+
+
+def photo_event(photo: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the event data of a new photo.
+
+    Args:
+        photo: Photo document as stored
+
+    Returns:
+        Event data
+    """
+    return {
+        "photo_id": str(photo["_id"]),
+        "collection_code": photo["collection_code"],
+        "filename": photo["filename"],
+        "file_size": photo["file_size"],
+        "dimensions": photo.get("dimensions") or {},
+        "dominant_color": photo.get("dominant_color"),
+        "uploaded_at": photo["uploaded_at"]
+    }
+
+
+def _format(event: str, data: Dict[str, Any]) -> str:
+    """Format one server-sent event."""
+    payload = json.dumps(data, default=lambda v: v.isoformat() if isinstance(v, datetime) else str(v))
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+class Subscriber:
+    """
+    Pending events of one client.
+
+    Events are coalesced until the client takes them: only the latest
+    statistics of each collection are kept, and at most max_photos new
+    photos (older ones are dropped and counted). Memory per client is
+    bounded however slowly it reads.
+    """
+
+    def __init__(self, collection_code: Optional[str], max_photos: int):
+        self.collection_code = collection_code  # None = all collections
+        self.photos: deque = deque(maxlen=max_photos)
+        self.dropped = 0
+        self.statistics: Dict[str, Dict[str, Any]] = {}
+        self.pending = asyncio.Event()
+
+    def wants(self, collection_code: str) -> bool:
+        """Whether the client follows a collection."""
+        return self.collection_code is None or self.collection_code == collection_code
+
+    def add_photo(self, data: Dict[str, Any]) -> None:
+        """Queue a new photo, dropping the oldest one when full."""
+        if len(self.photos) == self.photos.maxlen:
+            self.dropped += 1
+        self.photos.append(data)
+        self.pending.set()
+
+    def set_statistics(self, collection_code: str, data: Dict[str, Any]) -> None:
+        """Replace the pending statistics of a collection."""
+        self.statistics[collection_code] = data
+        self.pending.set()
+
+    def take(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Take all pending events.
+
+        Returns:
+            (event, data) pairs: one photos event, then one statistics
+            event per changed collection
+        """
+        events: List[Tuple[str, Dict[str, Any]]] = []
+        if self.photos or self.dropped:
+            events.append(("photos", {"photos": list(self.photos), "dropped": self.dropped}))
+        events.extend(("statistics", data) for data in self.statistics.values())
+
+        self.photos.clear()
+        self.dropped = 0
+        self.statistics = {}
+        self.pending.clear()
+        return events
+
+
+class EventService:
+    """
+    Fan out new photos and collection statistics to live event streams.
+
+    With live_events_source "local", the upload path of this process
+    publishes events; with "change_stream", they are read from MongoDB
+    change streams (a replica set is required) so that uploads handled by
+    any process are seen.
+    """
+
+    def __init__(self):
+        self._subscribers: Set[Subscriber] = set()
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def _local(self) -> bool:
+        return settings.live_events_source != "change_stream"
+
+    @property
+    def client_count(self) -> int:
+        """Number of connected clients."""
+        return len(self._subscribers)
+
+    def start(self) -> None:
+        """Start watching change streams (no-op for the local source)."""
+        if self._tasks or self._local:
+            return
+
+        self._tasks = [
+            asyncio.create_task(self._watch(Photo, [
+                {"$match": {"$or": [
+                    {"operationType": "insert", "fullDocument.processing_status": "processed"},
+                    {"operationType": "update", "updateDescription.updatedFields.processing_status": "processed"},
+                ]}}
+            ], self._on_photo_change), name="live-events-photos"),
+            asyncio.create_task(self._watch(Collection, [
+                {"$match": {"operationType": "update"}}
+            ], self._on_collection_change), name="live-events-collections"),
+        ]
+
+    async def stop(self) -> None:
+        """Cancel change stream tasks."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def publish_photo(self, photo: Photo) -> None:
+        """
+        Publish a newly processed photo.
+
+        Args:
+            photo: Stored photo
+        """
+        if self._local and self._subscribers:
+            self._dispatch_photo(photo_event({**photo.model_dump(), "_id": photo.id}))
+
+    def publish_statistics(self, collection_code: str, statistics: Dict[str, Any]) -> None:
+        """
+        Publish the statistics of a collection after a change.
+
+        Args:
+            collection_code: Collection code
+            statistics: Updated collection statistics
+        """
+        if self._local and self._subscribers:
+            self._dispatch_statistics(collection_code, statistics)
+
+    def subscribe(self, collection_code: Optional[str] = None) -> Subscriber:
+        """
+        Register a client.
+
+        Args:
+            collection_code: Collection to follow (None for all)
+
+        Returns:
+            Subscriber receiving the client's events
+        """
+        subscriber = Subscriber(collection_code, settings.live_events_max_photos)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    async def stream(
+        self,
+        collection_code: Optional[str] = None,
+        initial: Optional[List[Tuple[str, Dict[str, Any]]]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Send a client's events as server-sent events until it disconnects.
+
+        Pending events are sent at most every live_events_interval_ms; the
+        next batch is only collected once the previous one was written to
+        the connection, so slow clients receive fewer, coalesced events.
+
+        Args:
+            collection_code: Collection to follow (None for all)
+            initial: Events sent first
+
+        Yields:
+            Encoded events
+        """
+        interval = settings.live_events_interval_ms / 1000
+        subscriber = self.subscribe(collection_code)
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            for event, data in initial or []:
+                yield _format(event, data)
+
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.pending.wait(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                for event, data in subscriber.take():
+                    yield _format(event, data)
+
+                await asyncio.sleep(interval)
+        finally:
+            self._subscribers.discard(subscriber)
+
+    def _dispatch_photo(self, data: Dict[str, Any]) -> None:
+        for subscriber in self._subscribers:
+            if subscriber.wants(data["collection_code"]):
+                subscriber.add_photo(data)
+
+    def _dispatch_statistics(self, collection_code: str, statistics: Dict[str, Any]) -> None:
+        data = {"collection_code": collection_code, **statistics}
+        for subscriber in self._subscribers:
+            if subscriber.wants(collection_code):
+                subscriber.set_statistics(collection_code, data)
+
+    async def _on_photo_change(self, change: Dict[str, Any]) -> None:
+        photo = change.get("fullDocument")
+        if photo and not photo.get("is_deleted"):
+            self._dispatch_photo(photo_event(photo))
+
+    async def _on_collection_change(self, change: Dict[str, Any]) -> None:
+        fields = change.get("updateDescription", {}).get("updatedFields", {})
+        if not any(field.startswith("statistics") for field in fields):
+            return
+
+        collection = change.get("fullDocument")
+        if collection:
+            self._dispatch_statistics(collection["code"], collection.get("statistics") or {})
+
+    async def _watch(self, document, pipeline: List[Dict[str, Any]], handler) -> None:
+        """Watch a collection, resuming after errors, until cancelled."""
+        resume_token = None
+        while True:
+            try:
+                async with document.get_motor_collection().watch(
+                    pipeline,
+                    full_document="updateLookup",
+                    resume_after=resume_token
+                ) as changes:
+                    async for change in changes:
+                        resume_token = changes.resume_token
+                        if self._subscribers:
+                            await handler(change)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Events missed meanwhile are not replayed: statistics are
+                # sent again with the next change
+                logger.error(f"Watching {document.__name__} changes failed: {e}")
+                resume_token = None
+                await asyncio.sleep(WATCH_RETRY_SECONDS)
+
+
+# Global event service instance
+event_service = EventService()
@@ -0,0 +1,124 @@
+"""Idempotency service running each keyed upload at most once."""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from app.models.idempotency_key import (
+    claim_idempotency_key,
+    complete_idempotency_key,
+    release_idempotency_key,
+)
+
+logger = logging.getLogger(__name__)
+
+# Polling of a key claimed by another process (seconds, doubled up to the max)
+POLL_INITIAL = 0.05
+POLL_MAX = 1.0
+
+
+class IdempotencyKeyMismatch(Exception):
+    """The key was already used for a different file."""
+
+
+class IdempotencyService:
+    """
+    Run uploads under client-supplied idempotency keys.
+
+    The first attempt with a key claims it in MongoDB and runs; a successful
+    result is recorded and replayed to later attempts. Failed attempts
+    release the key, so a retry runs again. A duplicate arriving while the
+    first attempt is still running waits for it: on an in-process future if
+    both are handled by this process, otherwise by polling the record.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    async def run(
+        self,
+        scope: str,
+        key: str,
+        fingerprint: str,
+        func: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Run func once per key, or replay the result of the first run.
+
+        Args:
+            scope: Collection code
+            key: Client-supplied key
+            fingerprint: Identity of the file sent with the key
+            func: Upload returning an UploadResult dict ('success' flag)
+
+        Returns:
+            (result, replayed)
+
+        Raises:
+            IdempotencyKeyMismatch: If the key was used for a different file
+        """
+        delay = POLL_INITIAL
+
+        while True:
+            inflight = self._inflight.get((scope, key))
+            if inflight:
+                await asyncio.wait({inflight})
+                continue
+
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[(scope, key)] = future
+            try:
+                claimed, record = await claim_idempotency_key(scope, key, fingerprint)
+                if claimed:
+                    return await self._attempt(scope, key, record.claim_token, func), False
+            finally:
+                del self._inflight[(scope, key)]
+                future.set_result(None)
+
+            if record is None:
+                # Released by a failed attempt: claim it
+                continue
+
+            if record.fingerprint != fingerprint:
+                raise IdempotencyKeyMismatch(key)
+
+            if record.status == "completed":
+                return record.result, True
+
+            # Claimed by another process: wait for its result (or for its
+            # lock to expire, when the claim is taken over)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, POLL_MAX)
+
+    async def _attempt(
+        self,
+        scope: str,
+        key: str,
+        claim_token: str,
+        func: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Run func under a claimed key and record or release it."""
+        try:
+            result = await func()
+        except Exception:
+            await release_idempotency_key(scope, key, claim_token)
+            raise
+
+        try:
+            if result.get("success"):
+                if not await complete_idempotency_key(scope, key, claim_token, result):
+                    # Ran longer than the lock: the attempt that took over
+                    # records its own result
+                    logger.warning(f"Idempotency key {key} was taken over before completion")
+            else:
+                await release_idempotency_key(scope, key, claim_token)
+        except Exception as e:
+            # The upload itself succeeded; a retry after the lock expires
+            # is processed again
+            logger.warning(f"Failed to record idempotency key {key}: {e}")
+
+        return result
+
+
+# Global idempotency service instance
+idempotency_service = IdempotencyService()
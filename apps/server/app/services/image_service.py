@@ -1,12 +1,149 @@
 """Image processing service for thumbnails and EXIF extraction."""
 
+import io
+import math
+from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any, Tuple
-from PIL import Image, ExifTags
+from typing import BinaryIO, Callable, Optional, Dict, Any, List, Tuple, Union
+from PIL import Image, ImageOps, ExifTags
 import logging
+import numpy as np
+
+from app.core.config import settings
+from app.utils.image_probe import probe_file
 
 logger = logging.getLogger(__name__)
 
+# Backstop for files the header probe cannot read: Pillow refuses to decode
+# images above twice this size (and warns above it)
+Image.MAX_IMAGE_PIXELS = settings.max_image_megapixels * 1_000_000
+
+
+# EXIF sub-IFDs
+EXIF_IFD = 0x8769
+GPS_IFD = 0x8825
+
+# Longest string kept from EXIF text fields
+EXIF_MAX_STRING = 128
+
+
+def _exif_string(value: Any) -> Optional[str]:
+    """Clean an EXIF text value."""
+    if isinstance(value, bytes):
+        value = value.decode('utf-8', errors='replace')
+    if not isinstance(value, str):
+        return None
+    value = value.replace('\x00', '').strip()
+    return value[:EXIF_MAX_STRING] or None
+
+
+def _exif_float(value: Any) -> Optional[float]:
+    """Convert an EXIF rational or number to a float (None if undefined)."""
+    if isinstance(value, tuple):
+        value = value[0] if value else None
+    try:
+        result = float(value)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    return result if math.isfinite(result) else None
+
+
+def _exif_int(value: Any) -> Optional[int]:
+    """Convert an EXIF integer (or first of several) to an int."""
+    result = _exif_float(value)
+    return int(result) if result is not None else None
+
+
+def _exif_datetime(value: Any) -> Optional[datetime]:
+    """Parse an EXIF "YYYY:MM:DD HH:MM:SS" timestamp (camera local time)."""
+    text = _exif_string(value)
+    try:
+        return datetime.strptime(text[:19], '%Y:%m:%d %H:%M:%S') if text else None
+    except ValueError:
+        # e.g. "0000:00:00 00:00:00" from cameras without a clock
+        return None
+
+
+def _exif_orientation(value: Any) -> Optional[int]:
+    """Validate an EXIF orientation (1-8)."""
+    result = _exif_int(value)
+    return result if result is not None and 1 <= result <= 8 else None
+
+
+def _gps_coordinate(dms: Any, ref: Any, negative: str) -> Optional[float]:
+    """Convert GPS degrees/minutes/seconds and a hemisphere to decimal degrees."""
+    if not isinstance(dms, tuple) or len(dms) != 3:
+        return None
+    parts = [_exif_float(part) for part in dms]
+    if None in parts:
+        return None
+
+    degrees = parts[0] + parts[1] / 60 + parts[2] / 3600
+    if _exif_string(ref) == negative:
+        degrees = -degrees
+    return round(degrees, 7)
+
+
+# Typed EXIF fields stored in Photo.metadata: name -> (IFD, tag, converter).
+# IFD None is the main image directory.
+EXIF_FIELDS: Dict[str, Tuple[Optional[int], int, Callable[[Any], Any]]] = {
+    'camera_make': (None, 0x010F, _exif_string),
+    'camera_model': (None, 0x0110, _exif_string),
+    'lens_model': (EXIF_IFD, 0xA434, _exif_string),
+    'captured_at': (EXIF_IFD, 0x9003, _exif_datetime),  # DateTimeOriginal
+    'exposure_time': (EXIF_IFD, 0x829A, _exif_float),  # seconds
+    'f_number': (EXIF_IFD, 0x829D, _exif_float),
+    'iso': (EXIF_IFD, 0x8827, _exif_int),
+    'focal_length': (EXIF_IFD, 0x920A, _exif_float),  # mm
+    'focal_length_35mm': (EXIF_IFD, 0xA405, _exif_int),
+    'orientation': (None, 0x0112, _exif_orientation),
+}
+
+# Fields computed from several GPS tags
+GPS_FIELDS = ('gps_latitude', 'gps_longitude', 'gps_altitude')
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """Orthonormal DCT-II basis matrix (rows are frequencies)."""
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    matrix = np.sqrt(2.0 / size) * np.cos(np.pi * (2 * n + 1) * k / (2 * size))
+    matrix[0, :] = np.sqrt(1.0 / size)
+    return matrix
+
+
+# Perceptual hash: 32x32 grayscale -> 2D DCT -> top-left 8x8 coefficients
+PHASH_IMAGE_SIZE = 32
+PHASH_HASH_SIZE = 8
+_PHASH_DCT = _dct_matrix(PHASH_IMAGE_SIZE)
+
+# BlurHash: components along the longer / shorter edge, sample size
+BLURHASH_COMPONENTS = (4, 3)
+BLURHASH_IMAGE_SIZE = 32
+_BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+def _encode_base83(value: int, length: int) -> str:
+    """Encode an integer as fixed-length base83 (BlurHash alphabet)."""
+    return "".join(
+        _BASE83[(value // 83 ** (length - i)) % 83]
+        for i in range(1, length + 1)
+    )
+
+
+def _srgb_to_linear(values: np.ndarray) -> np.ndarray:
+    """Convert 0-255 sRGB values to linear light (0-1)."""
+    v = values / 255.0
+    return np.where(v <= 0.04045, v / 12.92, ((v + 0.055) / 1.055) ** 2.4)
+
+
+def _linear_to_srgb(value: float) -> int:
+    """Convert a linear light value to 0-255 sRGB."""
+    v = min(1.0, max(0.0, value))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
 
 class ImageService:
     """Handle image processing operations including thumbnails and EXIF."""
@@ -29,6 +166,29 @@ class ImageService:
         Returns:
             True if successful, False otherwise
         """
+        return self.process_thumbnail(image_path, thumbnail_path)['thumbnail']
+
+    def process_thumbnail(
+        self,
+        image_path: str,
+        thumbnail_path: str
+    ) -> Dict[str, Any]:
+        """
+        Generate thumbnail and derive values from the downscaled image.
+
+        The original is decoded once; the perceptual hash and the
+        placeholders are computed from the in-memory thumbnail.
+
+        Args:
+            image_path: Path to original image
+            thumbnail_path: Path where thumbnail should be saved
+
+        Returns:
+            Dictionary with thumbnail (bool), perceptual_hash (hex), blurhash
+            and dominant_color ("#rrggbb"); values are None on failure
+        """
+        result = {'thumbnail': False, 'perceptual_hash': None, 'blurhash': None, 'dominant_color': None}
+
         try:
             with Image.open(image_path) as img:
                 # Convert RGBA to RGB if necessary
@@ -47,65 +207,312 @@ class ImageService:
 
                 # Save as JPEG
                 img.save(thumbnail_path, 'JPEG', quality=85, optimize=True)
+                result['thumbnail'] = True
+
+                result['perceptual_hash'] = self.compute_perceptual_hash(img)
+                result['blurhash'] = self.compute_blurhash(img)
+                result['dominant_color'] = self.compute_dominant_color(img)
 
-            return True
         except Exception as e:
             logger.error(f"Failed to generate thumbnail: {e}")
-            return False
 
-    def extract_exif(self, image_path: str) -> Dict[str, Any]:
+        return result
+
+    def compose_sprite(
+        self,
+        thumbnails: List[Optional[bytes]],
+        cell_size: int,
+        columns: int,
+        output_path: str
+    ) -> Tuple[int, int, List[Dict[str, int]]]:
         """
-        Extract EXIF metadata from image.
+        Compose thumbnails into a grid sprite sheet.
+
+        Each thumbnail is scaled and center-cropped to fill a square cell.
+        Missing or unreadable thumbnails leave an empty placeholder cell.
 
         Args:
-            image_path: Path to image file
+            thumbnails: JPEG bytes per cell, in grid order (None for missing)
+            cell_size: Cell edge in pixels
+            columns: Cells per row
+            output_path: Path where the sheet JPEG should be saved
+
+        Returns:
+            Tuple of (width, height, cells) where cells holds x, y and
+            has_thumbnail (0/1) per input thumbnail
+        """
+        columns = max(1, min(columns, len(thumbnails)))
+        rows = max(1, -(-len(thumbnails) // columns))
+        width, height = columns * cell_size, rows * cell_size
+
+        sheet = Image.new('RGB', (width, height), (240, 240, 240))
+        cells = []
+
+        for i, data in enumerate(thumbnails):
+            x, y = (i % columns) * cell_size, (i // columns) * cell_size
+            placed = False
+
+            if data:
+                try:
+                    with Image.open(io.BytesIO(data)) as img:
+                        tile = ImageOps.fit(img.convert('RGB'), (cell_size, cell_size), Image.Resampling.LANCZOS)
+                        sheet.paste(tile, (x, y))
+                        placed = True
+                except Exception as e:
+                    logger.warning(f"Failed to place thumbnail on sprite sheet: {e}")
+
+            cells.append({'x': x, 'y': y, 'has_thumbnail': int(placed)})
+
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        sheet.save(output_path, 'JPEG', quality=80, optimize=True, progressive=True)
+
+        return width, height, cells
+
+    def compute_blurhash(self, img: Image.Image) -> str:
+        """
+        Compute a BlurHash placeholder.
+
+        The ~20-30 character string decodes on the client into a blurred
+        preview, so a grid can be painted before any thumbnail arrives
+        (see https://blurha.sh).
+
+        Args:
+            img: Decoded image (ideally already downscaled)
 
         Returns:
-            Dictionary with EXIF data
+            BlurHash string with 4x3 (landscape) or 3x4 (portrait) components
         """
-        exif_data = {}
+        long_side, short_side = BLURHASH_COMPONENTS
+        x_components, y_components = (
+            (long_side, short_side) if img.width >= img.height else (short_side, long_side)
+        )
+
+        small = img.convert('RGB')
+        small.thumbnail((BLURHASH_IMAGE_SIZE, BLURHASH_IMAGE_SIZE), Image.Resampling.BOX)
+        pixels = _srgb_to_linear(np.asarray(small, dtype=np.float64))
+        height, width = pixels.shape[:2]
+
+        # Cosine basis per component; factors[j, i] = mean(basis * pixels)
+        basis_x = np.cos(np.pi * np.arange(x_components)[:, None] * np.arange(width)[None, :] / width)
+        basis_y = np.cos(np.pi * np.arange(y_components)[:, None] * np.arange(height)[None, :] / height)
+        factors = np.einsum('jy,yxc,ix->jic', basis_y, pixels, basis_x) / (width * height)
+        factors[1:, :] *= 2
+        factors[0, 1:] *= 2
+
+        factors = factors.reshape(-1, 3)
+        dc, ac = factors[0], factors[1:]
+
+        result = _encode_base83((x_components - 1) + (y_components - 1) * 9, 1)
+
+        if len(ac):
+            quantised_max = int(max(0, min(82, np.floor(np.abs(ac).max() * 166 - 0.5))))
+            maximum = (quantised_max + 1) / 166
+        else:
+            quantised_max, maximum = 0, 1.0
+        result += _encode_base83(quantised_max, 1)
+
+        r, g, b = (_linear_to_srgb(c) for c in dc)
+        result += _encode_base83((r << 16) + (g << 8) + b, 4)
+
+        quantised = np.clip(
+            np.floor(np.sign(ac) * np.abs(ac / maximum) ** 0.5 * 9 + 9.5), 0, 18
+        ).astype(int)
+        for qr, qg, qb in quantised:
+            result += _encode_base83(qr * 19 * 19 + qg * 19 + qb, 2)
+
+        return result
+
+    def compute_dominant_color(self, img: Image.Image) -> str:
+        """
+        Compute the dominant color of an image.
+
+        The most frequent color of a small median-cut palette, which unlike
+        the average does not turn a red object on a blue sky into purple.
+
+        Args:
+            img: Decoded image (ideally already downscaled)
+
+        Returns:
+            Color as "#rrggbb"
+        """
+        small = img.convert('RGB')
+        small.thumbnail((64, 64), Image.Resampling.BOX)
+
+        palette_image = small.quantize(colors=5, method=Image.Quantize.MEDIANCUT)
+        palette = palette_image.getpalette()
+        _, index = max(palette_image.getcolors())
+
+        r, g, b = palette[index * 3:index * 3 + 3]
+        return f"#{r:02x}{g:02x}{b:02x}"
+
+    def compute_perceptual_hash(self, img: Image.Image) -> str:
+        """
+        Compute a 64-bit DCT perceptual hash (pHash).
+
+        Visually similar images (re-compressed, resized, burst shots) have
+        hashes with a small Hamming distance.
+
+        Args:
+            img: Decoded image (ideally already downscaled)
+
+        Returns:
+            Hash as 16-character hex string
+        """
+        small = img.convert('L').resize(
+            (PHASH_IMAGE_SIZE, PHASH_IMAGE_SIZE),
+            Image.Resampling.LANCZOS
+        )
+        pixels = np.asarray(small, dtype=np.float64)
+
+        # 2D DCT as two matrix products, keep lowest frequencies
+        dct = _PHASH_DCT @ pixels @ _PHASH_DCT.T
+        low = dct[:PHASH_HASH_SIZE, :PHASH_HASH_SIZE].ravel()
+
+        # Compare against median, excluding the DC term
+        bits = low > np.median(low[1:])
+        value = int(np.packbits(bits).view('>u8')[0])
+
+        return f"{value:016x}"
+
+    def extract_exif(
+        self,
+        image: Union[str, BinaryIO],
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Extract typed EXIF fields.
+
+        Only whitelisted tags are converted (see EXIF_FIELDS and GPS_FIELDS);
+        everything else, including MakerNote blobs, is ignored. Fields the
+        image does not have are omitted.
+
+        Args:
+            image: Path to the image or file object (only the header is read)
+            fields: Field names to extract (defaults to EXIF_FIELDS setting,
+                empty meaning all supported fields)
+
+        Returns:
+            Dictionary like {camera_make, captured_at (datetime),
+            exposure_time, f_number, iso, focal_length, orientation,
+            gps_latitude, gps_longitude, ...}
+        """
+        wanted = set(fields or settings.exif_fields_list or [*EXIF_FIELDS, *GPS_FIELDS])
+        metadata: Dict[str, Any] = {}
 
         try:
-            with Image.open(image_path) as img:
+            with Image.open(image) as img:
                 exif = img.getexif()
+                if not exif:
+                    return metadata
 
-                if exif:
-                    # Extract common EXIF tags
-                    for tag_id, value in exif.items():
-                        tag = ExifTags.TAGS.get(tag_id, tag_id)
-                        exif_data[tag] = str(value) if not isinstance(value, (str, int, float)) else value
-
-                    # Extract camera info
-                    camera_make = exif_data.get('Make', '').strip()
-                    camera_model = exif_data.get('Model', '').strip()
+                directories = {None: exif}
+                for name, (ifd, tag, convert) in EXIF_FIELDS.items():
+                    if name not in wanted:
+                        continue
+                    if ifd not in directories:
+                        directories[ifd] = exif.get_ifd(ifd)
+                    value = convert(directories[ifd].get(tag))
+                    if value is not None:
+                        metadata[name] = value
 
-                    return {
-                        'camera_make': camera_make,
-                        'camera_model': camera_model,
-                        'datetime_original': exif_data.get('DateTimeOriginal'),
-                        'exif_data': exif_data
-                    }
+                if wanted.intersection(GPS_FIELDS):
+                    metadata.update(self._extract_gps(exif.get_ifd(GPS_IFD), wanted))
 
         except Exception as e:
             logger.warning(f"Failed to extract EXIF data: {e}")
 
-        return {
-            'camera_make': None,
-            'camera_model': None,
-            'datetime_original': None,
-            'exif_data': {}
-        }
+        return metadata
+
+    def _extract_gps(self, gps: Dict[int, Any], wanted: set) -> Dict[str, float]:
+        """Convert GPS tags (1-6) to decimal degrees and meters."""
+        result = {}
+
+        latitude = _gps_coordinate(gps.get(2), gps.get(1), 'S')
+        longitude = _gps_coordinate(gps.get(4), gps.get(3), 'W')
+        if (
+            latitude is not None and longitude is not None
+            and -90 <= latitude <= 90 and -180 <= longitude <= 180
+        ):
+            if 'gps_latitude' in wanted:
+                result['gps_latitude'] = latitude
+            if 'gps_longitude' in wanted:
+                result['gps_longitude'] = longitude
+
+        altitude = _exif_float(gps.get(6))
+        if altitude is not None and 'gps_altitude' in wanted:
+            # Reference 1 means below sea level
+            result['gps_altitude'] = round(-altitude if gps.get(5) in (1, b'\x01') else altitude, 2)
+
+        return result
+
+    def extract_raw_exif(self, image: Union[str, BinaryIO]) -> Optional[bytes]:
+        """
+        Get the raw EXIF block of an image.
+
+        Args:
+            image: Path to the image or file object
+
+        Returns:
+            EXIF bytes (TIFF structure) or None if the image has none
+        """
+        try:
+            with Image.open(image) as img:
+                return img.info.get('exif') or None
+        except Exception as e:
+            logger.warning(f"Failed to read EXIF data: {e}")
+            return None
+
+    def decode_raw_exif(self, data: bytes) -> Dict[str, Any]:
+        """
+        Decode all tags of a raw EXIF block for display.
+
+        Args:
+            data: Raw EXIF bytes (see extract_raw_exif)
+
+        Returns:
+            Dictionary of tag name to value; binary values are summarized
+        """
+        exif = Image.Exif()
+        exif.load(data)
+
+        directories = [
+            (exif, ExifTags.TAGS),
+            (exif.get_ifd(EXIF_IFD), ExifTags.TAGS),
+            (exif.get_ifd(GPS_IFD), ExifTags.GPSTAGS),
+        ]
+
+        tags = {}
+        for directory, names in directories:
+            for tag_id, value in directory.items():
+                if tag_id in (EXIF_IFD, GPS_IFD):
+                    continue
+                name = names.get(tag_id, str(tag_id))
+                if isinstance(value, bytes):
+                    tags[name] = f"<{len(value)} bytes>"
+                elif isinstance(value, (str, int, float)):
+                    tags[name] = value
+                else:
+                    tags[name] = str(value)
+
+        return tags
 
     def get_dimensions(self, image_path: str) -> Optional[Tuple[int, int]]:
         """
         Get image dimensions.
 
+        Read from the header without decoding (see image_probe); Pillow is
+        only used for files the probe does not recognize.
+
         Args:
             image_path: Path to image file
 
         Returns:
             Tuple of (width, height) or None if failed
         """
+        info = probe_file(Path(image_path))
+        if info:
+            return info.width, info.height
+
         try:
             with Image.open(image_path) as img:
                 return img.size
@@ -1,18 +1,58 @@
 """Photo service for orchestrating photo upload workflow."""
 
 import magic
+import mimetypes
+import time
+from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from fastapi import UploadFile, HTTPException
+import aiofiles
 import logging
-
-from app.models.photo import Photo, PhotoCreate
-from app.models.collection import Collection
+from beanie import UpdateResponse
+from beanie.operators import Set
+
+from app.models.photo import Photo, PhotoCreate, get_photo_by_content_hash
+from app.models.blob import (
+    Blob,
+    acquire_blob,
+    is_blob_deleting,
+    release_blob,
+    remove_blob,
+    set_blob_thumbnail,
+    set_blob_volume,
+)
+from app.models.collection import Collection, update_statistics
+from app.models.photo_exif import delete_raw_exif, save_raw_exif
+from app.models.system_statistics import photo_state, record_photo_change
+from app.models.upload_rollup import record_upload
+from app.services.event_service import event_service
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, Histogram, registry
 from app.services.storage_service import storage_service
 from app.services.image_service import image_service
+from app.services.similarity_service import similarity_service
+from app.utils.image_probe import ImageInfo, probe_file, probe_image
 
 logger = logging.getLogger(__name__)
 
+# Upload pipeline metrics
+UPLOAD_STAGE_SECONDS = registry.register(Histogram(
+    "photo_upload_stage_seconds", "Time spent in each stage of photo uploads", ["stage"]
+))
+UPLOAD_SECONDS = registry.register(Histogram(
+    "photo_upload_seconds", "Total time of photo uploads", ["outcome"]
+))
+UPLOADS_TOTAL = registry.register(Counter(
+    "photo_uploads_total", "Photo uploads by outcome and reason", ["outcome", "reason"]
+))
+UPLOADS_IN_FLIGHT = registry.register(Gauge(
+    "photo_uploads_in_flight", "Photo uploads being processed"
+))
+
+# Reasons of successful uploads (all others are failures)
+SUCCESS_REASONS = {'stored', 'deduplicated'}
+
 
 class PhotoService:
     """Orchestrate photo upload workflow with validation and processing."""
@@ -48,103 +88,543 @@ class PhotoService:
         Returns:
             Dictionary with upload result
         """
+        started = time.perf_counter()
+        UPLOADS_IN_FLIGHT.inc()
+        reason = 'error'
         try:
             # Validate collection
-            collection = await Collection.find_one(Collection.code == collection_code.upper())
-            if not collection:
+            with UPLOAD_STAGE_SECONDS.time('collection'):
+                collection, collection_error = await self.get_upload_collection(collection_code)
+            if collection_error:
+                reason = self._collection_reason(collection)
                 return {
                     'success': False,
                     'filename': file.filename,
-                    'error': 'Collection not found'
+                    'error': collection_error
                 }
 
-            if collection.status != 'active':
+            # Validate file
+            with UPLOAD_STAGE_SECONDS.time('validate'):
+                validation_error = await self._validate_file(file, collection)
+            if validation_error:
+                reason = 'invalid_file'
                 return {
                     'success': False,
                     'filename': file.filename,
-                    'error': f'Collection is {collection.status}'
+                    'error': validation_error
+                }
+
+            # Stream original to a temporary file while hashing it
+            with UPLOAD_STAGE_SECONDS.time('save_temp'):
+                temp_path, content_hash, file_size = await storage_service.save_temp_file(file)
+
+            result = await self._store_photo(
+                temp_path=temp_path,
+                content_hash=content_hash,
+                file_size=file_size,
+                filename=file.filename,
+                collection=collection,
+                uploader_info=uploader_info
+            )
+            reason = 'deduplicated' if result['deduplicated'] else 'stored'
+            return result
+
+        except Exception as e:
+            logger.error(f"Failed to upload photo {file.filename}: {e}")
+            return {
+                'success': False,
+                'filename': file.filename,
+                'error': str(e)
+            }
+        finally:
+            self._record_upload_metrics(reason, started)
+
+    async def upload_local_file(
+        self,
+        temp_path: Path,
+        filename: str,
+        collection_code: str,
+        uploader_info: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Upload a photo whose bytes are already in a local temporary file.
+
+        Used by resumable uploads once all chunks have been assembled. The
+        temporary file is consumed (moved or deleted) in every case.
+
+        Args:
+            temp_path: Path to the assembled file
+            filename: Original filename
+            collection_code: Collection code
+            uploader_info: Optional uploader information (ip, user_agent)
+
+        Returns:
+            Dictionary with upload result
+        """
+        started = time.perf_counter()
+        UPLOADS_IN_FLIGHT.inc()
+        reason = 'error'
+        try:
+            with UPLOAD_STAGE_SECONDS.time('collection'):
+                collection, collection_error = await self.get_upload_collection(collection_code)
+            if collection_error:
+                reason = self._collection_reason(collection)
+                return {
+                    'success': False,
+                    'filename': filename,
+                    'error': collection_error
                 }
 
             # Validate file
-            validation_error = await self._validate_file(file, collection)
+            with UPLOAD_STAGE_SECONDS.time('validate'):
+                async with aiofiles.open(temp_path, 'rb') as f:
+                    header = await f.read(2048)
+                file_size = temp_path.stat().st_size
+
+                validation_error = self._validate_content(
+                    filename, header, file_size, collection, probe_file(temp_path)
+                )
             if validation_error:
+                reason = 'invalid_file'
                 return {
                     'success': False,
-                    'filename': file.filename,
+                    'filename': filename,
                     'error': validation_error
                 }
 
-            # Reset file pointer after validation
-            await file.seek(0)
+            with UPLOAD_STAGE_SECONDS.time('hash'):
+                content_hash = await storage_service.hash_file(temp_path)
 
-            # Save original file
-            file_path, filename = await storage_service.save_file(
-                file,
-                collection_code.upper(),
-                'photo'
+            result = await self._store_photo(
+                temp_path=temp_path,
+                content_hash=content_hash,
+                file_size=file_size,
+                filename=filename,
+                collection=collection,
+                uploader_info=uploader_info
             )
+            reason = 'deduplicated' if result['deduplicated'] else 'stored'
+            return result
+
+        except Exception as e:
+            logger.error(f"Failed to upload photo {filename}: {e}")
+            return {
+                'success': False,
+                'filename': filename,
+                'error': str(e)
+            }
+        finally:
+            temp_path.unlink(missing_ok=True)
+            self._record_upload_metrics(reason, started)
+
+    async def process_pending_photo(self, photo: Photo, temp_path: Path) -> Dict[str, Any]:
+        """
+        Validate and process a photo registered before its bytes were checked.
+
+        Used for direct uploads: the photo record is created in "pending"
+        state at finalization and completed here from a local copy of the
+        uploaded object. On failure the photo is marked "failed" and hidden.
+        The temporary file is consumed in every case.
 
-            # Get full path for processing
-            full_path = Path(storage_service.base_path) / file_path
+        Args:
+            photo: Pending Photo document
+            temp_path: Local copy of the uploaded file
 
-            # Get file size
-            file_size = full_path.stat().st_size
+        Returns:
+            Dictionary with upload result
+        """
+        result = None
+        started = time.perf_counter()
+        UPLOADS_IN_FLIGHT.inc()
+        reason = 'error'
+        try:
+            with UPLOAD_STAGE_SECONDS.time('collection'):
+                collection, error = await self.get_upload_collection(photo.collection_code)
+
+            if error is not None:
+                reason = self._collection_reason(collection)
+            else:
+                with UPLOAD_STAGE_SECONDS.time('validate'):
+                    async with aiofiles.open(temp_path, 'rb') as f:
+                        header = await f.read(2048)
+                    file_size = temp_path.stat().st_size
+
+                    if file_size != photo.file_size:
+                        error = f'Uploaded size {file_size} does not match declared size {photo.file_size}'
+                    else:
+                        error = self._validate_content(
+                            photo.filename, header, file_size, collection, probe_file(temp_path)
+                        )
+                if error:
+                    reason = 'invalid_file'
+
+            if error:
+                result = {'success': False, 'filename': photo.filename, 'error': error}
+            else:
+                with UPLOAD_STAGE_SECONDS.time('hash'):
+                    content_hash = await storage_service.hash_file(temp_path)
+                result = await self._store_photo(
+                    temp_path=temp_path,
+                    content_hash=content_hash,
+                    file_size=file_size,
+                    filename=photo.filename,
+                    collection=collection,
+                    uploader_info=photo.uploader_info,
+                    photo=photo
+                )
+                reason = 'deduplicated' if result['deduplicated'] else 'stored'
 
+        except Exception as e:
+            logger.error(f"Failed to process photo {photo.id}: {e}")
+            result = {'success': False, 'filename': photo.filename, 'error': str(e)}
+        finally:
+            temp_path.unlink(missing_ok=True)
+            self._record_upload_metrics(reason, started)
+
+            if not result or not result['success']:
+                # Only while pending: a photo stored before a later step
+                # failed keeps its blob reference and stays visible
+                failed = await Photo.find_one(
+                    Photo.id == photo.id,
+                    Photo.processing_status == 'pending'
+                ).update(Set({Photo.processing_status: 'failed', Photo.is_deleted: True}))
+                if failed and failed.modified_count:
+                    photo.processing_status = 'failed'
+                    photo.is_deleted = True
+                    await record_photo_change('pending', 'failed', photo.file_size)
+
+        return result
+
+    async def get_upload_collection(
+        self,
+        collection_code: str
+    ) -> Tuple[Optional[Collection], Optional[str]]:
+        """
+        Look up a collection and check that it accepts uploads.
+
+        Args:
+            collection_code: Collection code
+
+        Returns:
+            Tuple of (collection, error message); error is None if uploads are allowed
+        """
+        collection = await Collection.find_one(Collection.code == collection_code.upper())
+        if not collection:
+            return None, 'Collection not found'
+
+        if collection.status != 'active':
+            return collection, f'Collection is {collection.status}'
+
+        return collection, None
+
+    async def _store_photo(
+        self,
+        temp_path: Path,
+        content_hash: str,
+        file_size: int,
+        filename: Optional[str],
+        collection: Collection,
+        uploader_info: Optional[Dict[str, str]] = None,
+        photo: Optional[Photo] = None
+    ) -> Dict[str, Any]:
+        """
+        Process a validated temporary file, move it into storage and register the photo.
+
+        The image is decoded from the local temporary file, so the stored
+        original is never read back (which matters for remote backends).
+
+        Args:
+            temp_path: Temporary file holding the content (consumed)
+            content_hash: SHA-256 hex digest of the content
+            file_size: Size in bytes
+            filename: Original filename
+            collection: Target collection
+            uploader_info: Optional uploader information (ip, user_agent)
+            photo: Pending photo to complete instead of inserting a new one
+
+        Returns:
+            Dictionary with upload result
+        """
+        try:
             # Get MIME type
-            mime = magic.Magic(mime=True)
-            mime_type = mime.from_file(str(full_path))
+            with UPLOAD_STAGE_SECONDS.time('mime'):
+                mime = magic.Magic(mime=True)
+                mime_type = mime.from_file(str(temp_path))
+
+            # Take a reference on the content-addressed blob
+            extension = mimetypes.guess_extension(mime_type) or ''
+            file_path = storage_service.get_blob_path(content_hash, extension)
+            with UPLOAD_STAGE_SECONDS.time('blob'):
+                blob = await acquire_blob(content_hash, file_size, file_path)
+
+            try:
+                details = await self._get_image_details(blob, temp_path)
+
+                # Store the original before the record that points to it
+                with UPLOAD_STAGE_SECONDS.time('store_original'):
+                    volume_id = await storage_service.commit_temp_file(temp_path, blob.file_path, mime_type)
+                    if volume_id != blob.volume_id:
+                        await set_blob_volume(blob.sha256, volume_id)
+                        blob.volume_id = volume_id
+
+                with UPLOAD_STAGE_SECONDS.time('db_write'):
+                    photo = await self._create_photo_record(
+                        blob=blob,
+                        details=details,
+                        collection_code=collection.code,
+                        filename=storage_service.sanitize_filename(filename or 'unknown'),
+                        mime_type=mime_type,
+                        uploader_info=uploader_info,
+                        pending=photo
+                    )
+            except Exception:
+                await self._release_blob_files(content_hash)
+                raise
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+        with UPLOAD_STAGE_SECONDS.time('statistics'):
+            # Update collection statistics
+            photos_version = await self._update_collection_stats(collection, file_size)
+
+            try:
+                await record_upload(photo.collection_code, file_size, photo.uploaded_at, photo.uploader_info)
+            except Exception as e:
+                # Analytics only: the photo is stored
+                logger.warning(f"Failed to record upload rollups of photo {photo.id}: {e}")
+
+        if photo.perceptual_hash and photos_version:
+            similarity_service.add_photo(
+                photo.collection_code, str(photo.id), photo.perceptual_hash, photos_version
+            )
+
+        event_service.publish_photo(photo)
+
+        return {
+            'success': True,
+            'filename': filename,
+            'photo_id': str(photo.id),
+            'file_size': file_size,
+            'deduplicated': blob.ref_count > 1
+        }
+
+    async def _get_image_details(self, blob: Blob, local_path: Path) -> Dict[str, Any]:
+        """
+        Get dimensions, metadata, thumbnail and perceptual hash of a blob.
+
+        If the same content was already processed, the values of an existing
+        photo are reused instead of decoding the image again. Otherwise the
+        image is processed from the local file and the thumbnail is stored
+        (once per blob).
+
+        Args:
+            blob: Blob the photo references
+            local_path: Local file with the blob's content
+
+        Returns:
+            Dictionary with dimensions, metadata, thumbnail_path, perceptual_hash,
+            blurhash and dominant_color
+        """
+        with UPLOAD_STAGE_SECONDS.time('source_lookup'):
+            source = await get_photo_by_content_hash(blob.sha256) if blob.ref_count > 1 else None
+
+        if source and blob.thumbnail_path:
+            return {
+                'dimensions': source.dimensions,
+                'metadata': source.metadata,
+                'thumbnail_path': blob.thumbnail_path,
+                'perceptual_hash': source.perceptual_hash,
+                'blurhash': source.blurhash,
+                'dominant_color': source.dominant_color
+            }
 
+        with UPLOAD_STAGE_SECONDS.time('exif'):
             # Get dimensions
-            dimensions = image_service.get_dimensions(str(full_path))
+            dimensions = image_service.get_dimensions(str(local_path))
             dimensions_dict = {'width': dimensions[0], 'height': dimensions[1]} if dimensions else {}
 
-            # Extract EXIF metadata
-            metadata = image_service.extract_exif(str(full_path))
+            # Extract typed EXIF fields; the raw block only if configured
+            metadata = image_service.extract_exif(str(local_path))
+            if settings.store_raw_exif:
+                raw_exif = image_service.extract_raw_exif(str(local_path))
+                if raw_exif:
+                    await save_raw_exif(blob.sha256, raw_exif)
 
-            # Generate thumbnail
-            thumbnail_path = None
-            # Calculate thumbnail path using Path operations
-            relative_file_path = Path(file_path)
-            thumbnail_relative = Path('thumbnails') / relative_file_path.relative_to('uploads')
-            thumbnail_full_path = storage_service.base_path / thumbnail_relative
+        # Generate thumbnail into a temporary file and perceptual hash
+        thumbnail_temp = storage_service.tmp_path / f"{local_path.stem}.thumb.jpg"
 
-            if image_service.generate_thumbnail(str(full_path), str(thumbnail_full_path)):
-                thumbnail_path = str(thumbnail_relative)
+        try:
+            with UPLOAD_STAGE_SECONDS.time('thumbnail'):
+                processed = image_service.process_thumbnail(str(local_path), str(thumbnail_temp))
+
+            thumbnail_path = blob.thumbnail_path
+            if thumbnail_path is None and processed['thumbnail']:
+                with UPLOAD_STAGE_SECONDS.time('store_thumbnail'):
+                    thumbnail_path = await storage_service.commit_thumbnail(thumbnail_temp, blob.sha256)
+                    await set_blob_thumbnail(blob.sha256, thumbnail_path)
+        finally:
+            thumbnail_temp.unlink(missing_ok=True)
+
+        return {
+            'dimensions': dimensions_dict,
+            'metadata': metadata,
+            'thumbnail_path': thumbnail_path,
+            'perceptual_hash': processed['perceptual_hash'],
+            'blurhash': processed['blurhash'],
+            'dominant_color': processed['dominant_color']
+        }
+
+    async def _create_photo_record(
+        self,
+        blob: Blob,
+        details: Dict[str, Any],
+        collection_code: str,
+        filename: str,
+        mime_type: str,
+        uploader_info: Optional[Dict[str, str]] = None,
+        pending: Optional[Photo] = None
+    ) -> Photo:
+        """
+        Create the photo record for a stored blob.
 
-            # Create photo record
-            photo_data = PhotoCreate(
-                collection_code=collection_code.upper(),
-                filename=filename,
-                file_path=file_path,
-                thumbnail_path=thumbnail_path,
-                file_size=file_size,
-                mime_type=mime_type,
-                dimensions=dimensions_dict,
-                uploader_info=uploader_info or {},
-                metadata=metadata
+        Args:
+            blob: Blob the photo references
+            details: Image details (see _get_image_details)
+            collection_code: Normalized collection code
+            filename: Sanitized original filename
+            mime_type: Detected MIME type
+            uploader_info: Optional uploader information (ip, user_agent)
+            pending: Pending photo to update instead of inserting a new one
+
+        Returns:
+            Inserted or updated Photo document
+        """
+        photo_data = PhotoCreate(
+            collection_code=collection_code,
+            filename=filename,
+            file_path=blob.file_path,
+            thumbnail_path=details['thumbnail_path'],
+            file_size=blob.size,
+            mime_type=mime_type,
+            content_hash=blob.sha256,
+            volume_id=blob.volume_id,
+            perceptual_hash=details['perceptual_hash'],
+            blurhash=details['blurhash'],
+            dominant_color=details['dominant_color'],
+            dimensions=details['dimensions'],
+            uploader_info=uploader_info or {},
+            metadata=details['metadata'],
+            location=self._gps_location(details['metadata'])
+        )
+
+        if pending is not None:
+            # Conditional, so a photo deleted while pending is not brought
+            # back (the caller then releases the blob reference)
+            photo = await Photo.find_one(
+                Photo.id == pending.id,
+                Photo.processing_status == 'pending',
+                Photo.is_deleted == False
+            ).update(
+                {'$set': {**photo_data.model_dump(), 'processing_status': 'processed'}},
+                response_type=UpdateResponse.NEW_DOCUMENT
             )
+            if photo is None:
+                raise ValueError('Photo was deleted during processing')
 
-            photo = Photo(**photo_data.model_dump())
-            photo.processing_status = 'processed'
-            await photo.insert()
+            # Same size: process_pending_photo checked it against the declared one
+            await record_photo_change('pending', 'processed', photo.file_size)
+            return photo
 
-            # Update collection statistics
-            await self._update_collection_stats(collection, file_size)
+        photo = Photo(**photo_data.model_dump())
+        photo.processing_status = 'processed'
+        await photo.insert()
+        await record_photo_change(None, 'processed', photo.file_size)
 
-            return {
-                'success': True,
-                'filename': file.filename,
-                'photo_id': str(photo.id),
-                'file_size': file_size
-            }
+        return photo
 
-        except Exception as e:
-            logger.error(f"Failed to upload photo {file.filename}: {e}")
-            return {
-                'success': False,
-                'filename': file.filename,
-                'error': str(e)
-            }
+    def _gps_location(self, metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Build the GeoJSON point of a photo from its EXIF GPS fields.
+
+        Args:
+            metadata: Typed EXIF fields
+
+        Returns:
+            GeoJSON Point, or None without a valid position
+        """
+        latitude = metadata.get('gps_latitude')
+        longitude = metadata.get('gps_longitude')
+
+        if latitude is None or longitude is None:
+            return None
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return None
+        if latitude == 0 and longitude == 0:
+            # Written by cameras without a GPS fix
+            return None
+
+        return {'type': 'Point', 'coordinates': [longitude, latitude]}
+
+    async def delete_photo(self, photo: Photo) -> None:
+        """
+        Soft delete a photo and release its stored content.
+
+        The file and thumbnail are removed once no other photo references
+        the same content.
+
+        Args:
+            photo: Photo document
+        """
+        # Atomic, so the state it was deleted in is known even while the
+        # photo is being processed
+        deleted_at = datetime.now()
+        previous = await Photo.find_one(Photo.id == photo.id, Photo.is_deleted == False).update(
+            Set({Photo.is_deleted: True, Photo.deleted_at: deleted_at}),
+            response_type=UpdateResponse.OLD_DOCUMENT
+        )
+        photo.is_deleted = True
+        photo.deleted_at = deleted_at
+        if previous is None:
+            # Already deleted
+            return
+
+        state = photo_state(previous.processing_status, False)
+        await record_photo_change(state, photo_state(previous.processing_status, True), previous.file_size)
+
+        if state != 'processed':
+            # Pending: processing sees the deletion and releases its blob
+            # reference; it was not counted in the collection statistics
+            return
+
+        if previous.content_hash:
+            await self._release_blob_files(previous.content_hash)
+
+        collection = await Collection.find_one(Collection.code == previous.collection_code)
+        if collection:
+            await self._update_collection_stats(collection, -previous.file_size, photo_delta=-1)
+
+    async def _release_blob_files(self, content_hash: str) -> None:
+        """
+        Release a blob reference and delete its files if it was the last one.
+
+        Args:
+            content_hash: SHA-256 hex digest
+        """
+        blob = await release_blob(content_hash)
+        if not blob:
+            return
+
+        # Uploads of the same content wait while the blob is a tombstone;
+        # one that was abandoned too long may be taken over, so check before
+        # each deletion
+        try:
+            for path in (blob.file_path, blob.thumbnail_path):
+                if path and await is_blob_deleting(blob):
+                    await storage_service.delete_file(path)
+            if await is_blob_deleting(blob):
+                await delete_raw_exif(content_hash)
+        finally:
+            await remove_blob(blob)
 
     async def _validate_file(
         self,
@@ -161,53 +641,142 @@ class PhotoService:
         Returns:
             Error message if validation fails, None otherwise
         """
-        # Check file extension
-        if file.filename:
-            ext = Path(file.filename).suffix.lower()
-            if ext not in self.ALLOWED_EXTENSIONS:
-                return f'File type {ext} not allowed'
-
         # Read first chunk for magic number validation
         content = await file.read(2048)
         await file.seek(0)  # Reset file pointer
 
+        # Get file size
+        file.file.seek(0, 2)  # Seek to end
+        file_size = file.file.tell()
+
+        # Read dimensions from the header
+        image_info = probe_image(file.file)
+        file.file.seek(0)  # Reset
+
+        return self._validate_content(file.filename, content, file_size, collection, image_info)
+
+    def _validate_content(
+        self,
+        filename: Optional[str],
+        header: bytes,
+        file_size: int,
+        collection: Collection,
+        image_info: Optional[ImageInfo] = None
+    ) -> Optional[str]:
+        """
+        Validate file name, leading bytes, size and pixel count.
+
+        Args:
+            filename: Original filename
+            header: First bytes of the file (at least 2 KB if available)
+            file_size: File size in bytes
+            collection: Collection document
+            image_info: Header probe of the file (see image_probe)
+
+        Returns:
+            Error message if validation fails, None otherwise
+        """
+        # Check file extension
+        error = self.validate_filename(filename)
+        if error:
+            return error
+
         # Validate MIME type by magic number
         mime = magic.Magic(mime=True)
-        detected_mime = mime.from_buffer(content)
+        detected_mime = mime.from_buffer(header)
 
         if detected_mime not in self.ALLOWED_MIME_TYPES:
             return f'Invalid file type: {detected_mime}'
 
         # Check file size limit
+        error = self.validate_file_size(file_size, collection)
+        if error:
+            return error
+
+        # Reject decompression bombs before anything decodes them
+        if image_info and image_info.megapixels > settings.max_image_megapixels:
+            return (
+                f'Image too large: {image_info.width}x{image_info.height} pixels '
+                f'(maximum {settings.max_image_megapixels} megapixels)'
+            )
+
+        return None
+
+    def validate_filename(self, filename: Optional[str]) -> Optional[str]:
+        """
+        Check that a filename has an allowed extension.
+
+        Args:
+            filename: Original filename
+
+        Returns:
+            Error message if not allowed, None otherwise
+        """
+        if filename:
+            ext = Path(filename).suffix.lower()
+            if ext not in self.ALLOWED_EXTENSIONS:
+                return f'File type {ext} not allowed'
+
+        return None
+
+    def validate_file_size(self, file_size: int, collection: Collection) -> Optional[str]:
+        """
+        Check a file size against the collection limit.
+
+        Args:
+            file_size: File size in bytes
+            collection: Collection document
+
+        Returns:
+            Error message if the limit is exceeded, None otherwise
+        """
         max_size = collection.settings.get('max_file_size_mb', 50) * 1024 * 1024
-        file.file.seek(0, 2)  # Seek to end
-        file_size = file.file.tell()
-        file.file.seek(0)  # Reset
 
         if file_size > max_size:
             return f'File size exceeds limit of {max_size / 1024 / 1024}MB'
 
         return None
 
+    def _collection_reason(self, collection: Optional[Collection]) -> str:
+        """Failure reason of an upload to a missing or inactive collection."""
+        return 'collection_not_found' if collection is None else 'collection_inactive'
+
+    def _record_upload_metrics(self, reason: str, started: float) -> None:
+        """
+        Record the outcome and duration of a finished upload.
+
+        Args:
+            reason: stored, deduplicated or the failure reason
+            started: time.perf_counter() at the start of the upload
+        """
+        outcome = 'success' if reason in SUCCESS_REASONS else 'failure'
+        UPLOADS_IN_FLIGHT.dec()
+        UPLOADS_TOTAL.inc(outcome, reason)
+        UPLOAD_SECONDS.observe(time.perf_counter() - started, outcome)
+
     async def _update_collection_stats(
         self,
         collection: Collection,
-        file_size: int
-    ) -> None:
+        file_size: int,
+        photo_delta: int = 1
+    ) -> Optional[int]:
         """
-        Update collection statistics after upload.
+        Update collection statistics after upload or deletion.
 
         Args:
             collection: Collection document
-            file_size: Size of uploaded file in bytes
-        """
-        from datetime import datetime
+            file_size: Size of uploaded file in bytes (negative on deletion)
+            photo_delta: Change in photo count (-1 on deletion)
 
-        collection.statistics['photo_count'] += 1
-        collection.statistics['total_size_bytes'] += file_size
-        collection.statistics['last_upload_at'] = datetime.now()
+        Returns:
+            New photos_version of the collection, None if it was not found
+        """
+        updated = await update_statistics(collection.code, file_size, photo_delta)
+        if not updated:
+            return None
 
-        await collection.save()
+        event_service.publish_statistics(collection.code, updated["statistics"])
+        return updated.get("photos_version")
 
 
 # Global photo service instance
@@ -0,0 +1,89 @@
+"""Processing service running background jobs on an in-process queue."""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import Gauge, registry
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessingService:
+    """
+    Run queued jobs with a fixed number of worker tasks.
+
+    Jobs are not persisted: callers keep their own state in MongoDB and
+    re-enqueue unfinished work on startup.
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    def start(self, workers: Optional[int] = None) -> None:
+        """
+        Start worker tasks.
+
+        Args:
+            workers: Number of workers (defaults to settings.processing_workers)
+        """
+        if self._workers:
+            return
+
+        self._queue = asyncio.Queue()
+        count = workers or settings.processing_workers
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"processing-worker-{i}")
+            for i in range(count)
+        ]
+
+    async def stop(self) -> None:
+        """Cancel worker tasks; queued jobs are dropped."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    def enqueue(self, func: Callable[..., Awaitable[Any]], *args: Any) -> None:
+        """
+        Queue a coroutine function to be run by a worker.
+
+        Args:
+            func: Coroutine function
+            *args: Positional arguments for func
+
+        Raises:
+            RuntimeError: If the service has not been started
+        """
+        if self._queue is None:
+            raise RuntimeError("Processing service is not started")
+
+        self._queue.put_nowait((func, args))
+
+    @property
+    def queue_size(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return self._queue.qsize() if self._queue else 0
+
+    async def _worker(self) -> None:
+        """Run jobs until cancelled."""
+        while True:
+            func, args = await self._queue.get()
+            try:
+                await func(*args)
+            except Exception as e:
+                logger.error(f"Processing job {func.__qualname__} failed: {e}")
+            finally:
+                self._queue.task_done()
+
+
+# Global processing service instance
+processing_service = ProcessingService()
+
+registry.register(Gauge(
+    "processing_queue_jobs", "Background processing jobs waiting for a worker",
+    callback=lambda: processing_service.queue_size
+))
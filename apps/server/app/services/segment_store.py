@@ -0,0 +1,297 @@
+"""Append-only segment store for small files (thumbnails).
+
+Instead of one file per thumbnail, thumbnails are appended as records to
+large segment files. The location of a record is encoded in its path,
+
+    segments/{segment:08d}/{offset}/{length}/{sha256}.jpg
+
+so the Blob/Photo documents that already hold the thumbnail path act as the
+offset index: serving a thumbnail is one `os.pread` on a cached descriptor,
+with no per-file open, no directory lookups and one inode per segment.
+
+Record layout (little-endian):
+
+    magic "TSEG" | flags u8 | 3 reserved | sha256 (32 bytes) | length u32 | data | crc32 u32
+
+Deleting sets the deleted flag in place; space is reclaimed by
+`python -m app.scripts.compact_thumbnail_segments`.
+"""
+
+import asyncio
+import errno
+import os
+import re
+import struct
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+MAGIC = b"TSEG"
+HEADER = struct.Struct("<4sB3x32sI")
+FOOTER = struct.Struct("<I")
+FLAG_DELETED = 0x01
+
+PATH_PREFIX = "segments/"
+PATH_PATTERN = re.compile(r"^segments/(\d{8})/(\d+)/(\d+)/([0-9a-f]{64})\.jpg$")
+
+
+class SegmentRecord(NamedTuple):
+    """A record found while scanning a segment."""
+    path: str
+    sha256: str
+    length: int
+    deleted: bool
+
+
+class SegmentStore:
+    """
+    Store small files as records in append-only segment files.
+
+    Appends use O_APPEND with a single write per record, so several worker
+    processes can append to the same segment safely.
+    """
+
+    def __init__(self, root: Path, max_segment_bytes: int):
+        """
+        Args:
+            root: Directory holding the segment files
+            max_segment_bytes: Size after which a new segment is started
+        """
+        self.root = root
+        self.max_segment_bytes = max_segment_bytes
+        self._read_fds: Dict[int, int] = {}
+        self._append_segment: Optional[int] = None
+        self._append_fd: Optional[int] = None
+
+    @staticmethod
+    def owns(path: Optional[str]) -> bool:
+        """Check whether a storage path points into the segment store."""
+        return bool(path) and path.startswith(PATH_PREFIX)
+
+    @staticmethod
+    def make_path(segment: int, offset: int, length: int, sha256: str) -> str:
+        """Build the storage path of a record."""
+        return f"{PATH_PREFIX}{segment:08d}/{offset}/{length}/{sha256}.jpg"
+
+    @staticmethod
+    def parse_path(path: str) -> tuple:
+        """
+        Parse a storage path into (segment, offset, length, sha256).
+
+        Raises:
+            ValueError: If the path is not a segment path
+        """
+        match = PATH_PATTERN.match(path)
+        if not match:
+            raise ValueError(f"Invalid segment path: {path}")
+
+        segment, offset, length, sha256 = match.groups()
+        return int(segment), int(offset), int(length), sha256
+
+    def segment_file(self, segment: int) -> Path:
+        """Path of a segment file."""
+        return self.root / f"{segment:08d}.seg"
+
+    def list_segments(self) -> List[int]:
+        """Numbers of all segment files, ascending."""
+        if not self.root.exists():
+            return []
+        return sorted(int(p.stem) for p in self.root.glob("*.seg") if p.stem.isdigit())
+
+    def _open_append(self) -> int:
+        """Get a descriptor for the segment currently being appended to."""
+        if self._append_fd is not None:
+            if os.fstat(self._append_fd).st_size < self.max_segment_bytes:
+                return self._append_fd
+            os.close(self._append_fd)
+            self._append_fd = None
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        segments = self.list_segments()
+        segment = segments[-1] if segments else 0
+
+        while True:
+            path = self.segment_file(segment)
+            if path.exists() and path.stat().st_size >= self.max_segment_bytes:
+                segment += 1
+                continue
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+                continue
+            break
+
+        self._append_segment = segment
+        self._append_fd = fd
+        return fd
+
+    def append(self, sha256: str, data: bytes) -> str:
+        """
+        Append a record.
+
+        Args:
+            sha256: Content hash the record belongs to (hex)
+            data: File content
+
+        Returns:
+            Storage path of the record
+        """
+        record = (
+            HEADER.pack(MAGIC, 0, bytes.fromhex(sha256), len(data))
+            + data
+            + FOOTER.pack(zlib.crc32(data))
+        )
+
+        fd = self._open_append()
+        written = os.write(fd, record)
+        if written != len(record):
+            raise OSError(errno.EIO, "Short write to segment")
+
+        # With O_APPEND the descriptor offset is the end of our own write
+        end = os.lseek(fd, 0, os.SEEK_CUR)
+        data_offset = end - len(record) + HEADER.size
+
+        return self.make_path(self._append_segment, data_offset, len(data), sha256)
+
+    def _read_fd(self, segment: int) -> int:
+        """Get a cached read descriptor for a segment."""
+        fd = self._read_fds.get(segment)
+        if fd is not None and os.fstat(fd).st_nlink == 0:
+            # Removed by compaction in another process
+            os.close(fd)
+            del self._read_fds[segment]
+            fd = None
+        if fd is None:
+            fd = os.open(self.segment_file(segment), os.O_RDONLY)
+            self._read_fds[segment] = fd
+        return fd
+
+    def read_sync(self, path: str) -> bytes:
+        """
+        Read a record's data.
+
+        Raises:
+            FileNotFoundError: If the segment or record does not exist or was deleted
+            ValueError: If the path is not a segment path
+        """
+        segment, offset, length, sha256 = self.parse_path(path)
+        fd = self._read_fd(segment)
+
+        header = os.pread(fd, HEADER.size, offset - HEADER.size)
+        if len(header) != HEADER.size:
+            raise FileNotFoundError(path)
+
+        magic, flags, record_hash, record_length = HEADER.unpack(header)
+        if magic != MAGIC or record_hash.hex() != sha256 or record_length != length:
+            raise FileNotFoundError(path)
+        if flags & FLAG_DELETED:
+            raise FileNotFoundError(path)
+
+        data = os.pread(fd, length, offset)
+        if len(data) != length:
+            raise FileNotFoundError(path)
+
+        return data
+
+    async def read(self, path: str) -> bytes:
+        """Read a record's data without blocking the event loop on cold reads."""
+        return await asyncio.to_thread(self.read_sync, path)
+
+    def exists(self, path: str) -> bool:
+        """Check whether a record exists and is not deleted."""
+        try:
+            self.read_sync(path)
+            return True
+        except (FileNotFoundError, ValueError):
+            return False
+
+    def delete(self, path: str) -> bool:
+        """
+        Mark a record as deleted (space is reclaimed by compaction).
+
+        Returns:
+            True if the record was marked, False if it did not exist
+        """
+        try:
+            segment, offset, length, sha256 = self.parse_path(path)
+            record_offset = offset - HEADER.size
+
+            fd = os.open(self.segment_file(segment), os.O_RDWR)
+            try:
+                header = os.pread(fd, HEADER.size, record_offset)
+                if len(header) != HEADER.size:
+                    return False
+                magic, flags, record_hash, _ = HEADER.unpack(header)
+                if magic != MAGIC or record_hash.hex() != sha256:
+                    return False
+                os.pwrite(fd, bytes([flags | FLAG_DELETED]), record_offset + len(MAGIC))
+            finally:
+                os.close(fd)
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def scan(self, segment: int) -> Iterator[SegmentRecord]:
+        """
+        Iterate the records of a segment in order.
+
+        Scanning stops at the first incomplete or corrupt record (e.g. a
+        write interrupted by a crash).
+        """
+        with open(self.segment_file(segment), "rb") as f:
+            offset = 0
+            while True:
+                header = f.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    return
+
+                magic, flags, record_hash, length = HEADER.unpack(header)
+                if magic != MAGIC:
+                    return
+
+                data = f.read(length)
+                footer = f.read(FOOTER.size)
+                if len(data) < length or len(footer) < FOOTER.size:
+                    return
+                if FOOTER.unpack(footer)[0] != zlib.crc32(data):
+                    return
+
+                yield SegmentRecord(
+                    path=self.make_path(segment, offset + HEADER.size, length, record_hash.hex()),
+                    sha256=record_hash.hex(),
+                    length=length,
+                    deleted=bool(flags & FLAG_DELETED)
+                )
+                offset += HEADER.size + length + FOOTER.size
+
+    def remove_segment(self, segment: int) -> None:
+        """Delete a segment file (after compaction)."""
+        fd = self._read_fds.pop(segment, None)
+        if fd is not None:
+            os.close(fd)
+        if segment == self._append_segment and self._append_fd is not None:
+            os.close(self._append_fd)
+            self._append_fd = None
+        self.segment_file(segment).unlink(missing_ok=True)
+
+    def is_sealed(self, segment: int) -> bool:
+        """
+        Check whether a segment is full.
+
+        Only sealed segments take no more appends and may be compacted.
+        """
+        try:
+            return self.segment_file(segment).stat().st_size >= self.max_segment_bytes
+        except FileNotFoundError:
+            return False
+
+    def close(self) -> None:
+        """Close cached descriptors."""
+        for fd in self._read_fds.values():
+            os.close(fd)
+        self._read_fds.clear()
+        if self._append_fd is not None:
+            os.close(self._append_fd)
+            self._append_fd = None
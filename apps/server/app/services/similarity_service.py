@@ -0,0 +1,189 @@
+"""Similarity service for near-duplicate photo detection."""
+
+import asyncio
+import logging
+from typing import Dict, List, Any
+
+from app.models.collection import get_photos_version
+from app.models.photo import Photo
+from app.utils.bk_tree import BKTree
+
+logger = logging.getLogger(__name__)
+
+
+class _CollectionIndex:
+    """In-memory perceptual hash index of one collection."""
+
+    def __init__(self, version: int):
+        self.tree = BKTree()
+        self.photo_hashes: Dict[str, int] = {}  # photo_id -> hash
+        self.version = version  # photos_version of the collection when built
+
+
+class SimilarityService:
+    """
+    Answer "photos within Hamming distance k" queries per collection.
+
+    Each collection's perceptual hashes are loaded into a BK-tree on first
+    use and extended incrementally as photos are uploaded. The index is
+    rebuilt when the collection's photos_version moved past it (deletions,
+    or uploads handled by another worker).
+    """
+
+    def __init__(self):
+        self._indexes: Dict[str, _CollectionIndex] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _lock(self, collection_code: str) -> asyncio.Lock:
+        """Lock of a collection's index."""
+        return self._locks.setdefault(collection_code, asyncio.Lock())
+
+    async def _get_index(self, collection_code: str) -> _CollectionIndex:
+        """
+        Get the index of a collection, building it if missing or stale.
+
+        Must be called with the collection's lock held.
+
+        Args:
+            collection_code: Normalized collection code
+
+        Returns:
+            Up-to-date collection index
+        """
+        # Read before the photos: changes made while loading move the
+        # version past the index, which is then rebuilt on the next query
+        version = await get_photos_version(collection_code)
+        index = self._indexes.get(collection_code)
+
+        if index is not None and index.version == version:
+            return index
+
+        index = _CollectionIndex(version)
+        cursor = Photo.get_motor_collection().find(
+            {
+                "collection_code": collection_code,
+                "is_deleted": False,
+                "perceptual_hash": {"$ne": None}
+            },
+            projection={"_id": 1, "perceptual_hash": 1}
+        )
+        async for doc in cursor:
+            photo_id = str(doc["_id"])
+            value = int(doc["perceptual_hash"], 16)
+            index.tree.add(value, photo_id)
+            index.photo_hashes[photo_id] = value
+
+        self._indexes[collection_code] = index
+        logger.info(f"Built similarity index for {collection_code} ({len(index.photo_hashes)} photos)")
+        return index
+
+    def add_photo(self, collection_code: str, photo_id: str, perceptual_hash: str, version: int) -> None:
+        """
+        Add a newly uploaded photo to the collection index if it is loaded.
+
+        The photo is only added if it is the single change since the index
+        was built; otherwise the index is left to be rebuilt. It is not
+        added while the index is in use by a query.
+
+        Args:
+            collection_code: Normalized collection code
+            photo_id: Photo ID
+            perceptual_hash: Hash as hex string
+            version: photos_version after the photo was counted
+        """
+        index = self._indexes.get(collection_code)
+        if index is None or index.version != version - 1:
+            return
+
+        lock = self._locks.get(collection_code)
+        if lock and lock.locked():
+            return
+
+        value = int(perceptual_hash, 16)
+        index.tree.add(value, photo_id)
+        index.photo_hashes[photo_id] = value
+        index.version = version
+
+    async def find_similar(
+        self,
+        photo: Photo,
+        max_distance: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Find photos in the same collection similar to a photo.
+
+        Args:
+            photo: Photo document with a perceptual hash
+            max_distance: Maximum Hamming distance (0-64)
+
+        Returns:
+            List of {photo_id, distance}, closest first, excluding the photo itself
+        """
+        if not photo.perceptual_hash:
+            return []
+
+        async with self._lock(photo.collection_code):
+            index = await self._get_index(photo.collection_code)
+            matches = index.tree.search(int(photo.perceptual_hash, 16), max_distance)
+
+        photo_id = str(photo.id)
+        return [
+            {'photo_id': match_id, 'distance': distance}
+            for distance, match_id in sorted(matches)
+            if match_id != photo_id
+        ]
+
+    async def find_duplicate_groups(
+        self,
+        collection_code: str,
+        max_distance: int
+    ) -> List[List[str]]:
+        """
+        Group near-duplicate photos of a collection.
+
+        Photos are linked when within max_distance of each other; groups are
+        the connected components (union-find), so chains of similar photos
+        such as burst shots end up in one group.
+
+        Args:
+            collection_code: Normalized collection code
+            max_distance: Maximum Hamming distance (0-64)
+
+        Returns:
+            Groups of photo IDs with at least two members, largest first
+        """
+        # The search visits every photo: run it off the event loop, with the
+        # lock keeping uploads from extending the tree meanwhile
+        async with self._lock(collection_code):
+            index = await self._get_index(collection_code)
+            return await asyncio.to_thread(self._group_duplicates, index, max_distance)
+
+    @staticmethod
+    def _group_duplicates(index: _CollectionIndex, max_distance: int) -> List[List[str]]:
+        """Connected components of photos within max_distance (blocking)."""
+        parent: Dict[str, str] = {}
+
+        def find(x: str) -> str:
+            while parent.get(x, x) != x:
+                parent[x] = parent.get(parent[x], parent[x])
+                x = parent[x]
+            return x
+
+        for photo_id, value in index.photo_hashes.items():
+            for _, match_id in index.tree.search(value, max_distance):
+                root_a, root_b = find(photo_id), find(match_id)
+                if root_a != root_b:
+                    parent[root_b] = root_a
+
+        groups: Dict[str, List[str]] = {}
+        for photo_id in index.photo_hashes:
+            groups.setdefault(find(photo_id), []).append(photo_id)
+
+        return sorted(
+            (members for members in groups.values() if len(members) > 1),
+            key=len,
+            reverse=True
+        )
+
+# Global similarity service instance
+similarity_service = SimilarityService()
@@ -0,0 +1,192 @@
+"""Sprite service for gallery pages composed into a single image."""
+
+import asyncio
+import hashlib
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import settings
+from app.models.photo import Photo
+from app.models.sprite_sheet import (
+    SpriteSheet,
+    get_sprite_sheet,
+    get_unused_sprite_sheets,
+    remove_unused_sprite_sheet,
+    touch_sprite_sheet,
+)
+from app.services.image_service import image_service
+from app.services.storage_service import storage_service
+from app.utils.keyed_locks import KeyedLocks
+
+logger = logging.getLogger(__name__)
+
+# Serving a sheet updates its last_used_at at most this often
+TOUCH_INTERVAL = timedelta(hours=1)
+
+
+class SpriteService:
+    """
+    Build and cache sprite sheets of gallery pages.
+
+    A grid view loads one sheet image and positions each photo with the
+    returned coordinates instead of requesting every thumbnail. Sheets are
+    built from the stored thumbnails, stored like any other file and
+    recorded with their coordinates, so repeated requests for an unchanged
+    page cost one query. Keys hash the page's photos and thumbnails, so
+    uploads and deletions need no invalidation: the changed pages get new
+    sheets and the old ones are removed once unused (remove_unused).
+    """
+
+    def __init__(self):
+        # Builds per sheet key in this process
+        self._locks = KeyedLocks()
+
+    def get_sheet_key(self, photos: List[Photo], cell_size: int, columns: int) -> str:
+        """
+        Compute the cache key of a page.
+
+        Args:
+            photos: Photos of the page, in display order
+            cell_size: Cell edge in pixels
+            columns: Cells per row
+
+        Returns:
+            SHA-256 hex digest over layout, photo IDs and thumbnail paths
+        """
+        digest = hashlib.sha256(f"{cell_size}:{columns}".encode())
+        for photo in photos:
+            digest.update(f"|{photo.id}:{photo.thumbnail_path or ''}".encode())
+        return digest.hexdigest()
+
+    async def get_sheet(self, collection_code: str, photos: List[Photo]) -> SpriteSheet:
+        """
+        Get the sprite sheet of a page, building it on first request.
+
+        Concurrent requests for the same page wait for a single build.
+
+        Args:
+            collection_code: Collection code
+            photos: Photos of the page, in display order (not empty)
+
+        Returns:
+            SpriteSheet document
+        """
+        cell_size, columns = settings.sprite_cell_size, settings.sprite_columns
+        key = self.get_sheet_key(photos, cell_size, columns)
+
+        sheet = await get_sprite_sheet(key)
+        if sheet:
+            if sheet.last_used_at < datetime.utcnow() - TOUCH_INTERVAL:
+                await touch_sprite_sheet(sheet)
+            return sheet
+
+        async with self._locks.hold(key):
+            sheet = await get_sprite_sheet(key)
+            if sheet is None:
+                sheet = await self._build_sheet(key, collection_code, photos, cell_size, columns)
+
+        return sheet
+
+    async def _read_thumbnail(self, thumbnail_path: Optional[str]) -> Optional[bytes]:
+        """Read a stored thumbnail, None if it has none or it is missing."""
+        if not thumbnail_path:
+            return None
+
+        try:
+            return b"".join([chunk async for chunk in storage_service.iter_file(thumbnail_path)])
+        except FileNotFoundError:
+            return None
+
+    async def _build_sheet(
+        self,
+        key: str,
+        collection_code: str,
+        photos: List[Photo],
+        cell_size: int,
+        columns: int
+    ) -> SpriteSheet:
+        """Compose, store and record a sprite sheet."""
+        thumbnails = await asyncio.gather(*(self._read_thumbnail(p.thumbnail_path) for p in photos))
+
+        storage_service.tmp_path.mkdir(parents=True, exist_ok=True)
+        temp_path = storage_service.tmp_path / f"{uuid.uuid4().hex}.sprite.jpg"
+        # A file per build: a sheet removed by remove_unused and rebuilt
+        # meanwhile must not share the file that is about to be deleted
+        file_path = f"sprites/{collection_code}/{key}-{uuid.uuid4().hex[:12]}.jpg"
+
+        try:
+            # Decoding a few hundred thumbnails takes a while; keep the loop free
+            width, height, cells = await asyncio.to_thread(
+                image_service.compose_sprite, list(thumbnails), cell_size, columns, str(temp_path)
+            )
+            await storage_service.commit_temp_file(temp_path, file_path, 'image/jpeg')
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+        sheet = SpriteSheet(
+            key=key,
+            collection_code=collection_code,
+            file_path=file_path,
+            width=width,
+            height=height,
+            cell_size=cell_size,
+            columns=columns,
+            cells=[
+                {
+                    'photo_id': str(photo.id),
+                    'x': cell['x'],
+                    'y': cell['y'],
+                    'width': cell_size,
+                    'height': cell_size,
+                    'has_thumbnail': bool(cell['has_thumbnail'])
+                }
+                for photo, cell in zip(photos, cells)
+            ]
+        )
+
+        try:
+            await sheet.insert()
+        except DuplicateKeyError:
+            # Built by another worker at the same time: use its sheet
+            existing = await get_sprite_sheet(key)
+            if existing:
+                await storage_service.delete_file(file_path)
+                return existing
+
+        logger.info(f"Built sprite sheet of {len(photos)} photos for {collection_code}")
+        return sheet
+
+    async def remove_unused(self, idle: timedelta, batch_size: int = 1000) -> int:
+        """
+        Remove sprite sheets not served for a while, with their files.
+
+        Args:
+            idle: Minimum time since a sheet was last served
+            batch_size: Sheets read per query
+
+        Returns:
+            Number of sheets removed
+        """
+        before = datetime.utcnow() - idle
+        removed = 0
+
+        while True:
+            sheets = await get_unused_sprite_sheets(before, batch_size)
+            batch_removed = 0
+            for sheet in sheets:
+                if await remove_unused_sprite_sheet(sheet, before):
+                    await storage_service.delete_file(sheet.file_path)
+                    batch_removed += 1
+            removed += batch_removed
+
+            # A full batch with nothing removed would be read again
+            if len(sheets) < batch_size or not batch_removed:
+                return removed
+
+
+# Global sprite service instance
+sprite_service = SpriteService()
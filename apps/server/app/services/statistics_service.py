@@ -0,0 +1,52 @@
+"""Statistics service running periodic reconciliation of system statistics."""
+
+import asyncio
+import logging
+from typing import Optional
+
+from app.core.config import settings
+from app.models.system_statistics import reconcile_system_statistics
+
+logger = logging.getLogger(__name__)
+
+
+class StatisticsService:
+    """
+    Reconcile materialized statistics every STATISTICS_RECONCILE_MINUTES.
+
+    Counters are kept up to date by atomic increments; the reconciliation
+    only catches drift, so it runs rarely and the first run waits one
+    interval after startup.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the reconciliation task (no-op if disabled or running)."""
+        if self._task or settings.statistics_reconcile_minutes <= 0:
+            return
+
+        self._task = asyncio.create_task(self._run(), name="statistics-reconcile")
+
+    async def stop(self) -> None:
+        """Cancel the reconciliation task."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        """Reconcile periodically until cancelled."""
+        while True:
+            await asyncio.sleep(settings.statistics_reconcile_minutes * 60)
+            try:
+                result = await reconcile_system_statistics()
+                if result["repaired"]:
+                    logger.warning(f"Repaired drift of system statistics: {result['drift']}")
+            except Exception as e:
+                logger.error(f"Statistics reconciliation failed: {e}")
+
+
+# Global statistics service instance
+statistics_service = StatisticsService()
@@ -0,0 +1,579 @@
+"""Storage backends for original and thumbnail files.
+
+Files are addressed by keys (relative paths such as "uploads/ab/cd/<hash>.jpg").
+Uploads are always received and processed in local temporary files first;
+a backend only stores finished files and serves them back.
+"""
+
+import asyncio
+import errno
+import logging
+import os
+import shutil
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path, PurePosixPath
+from typing import AsyncIterator, Dict, List, Optional
+
+import aiofiles
+
+from app.core.config import settings
+from app.utils.hash_ring import HashRing
+
+logger = logging.getLogger(__name__)
+
+
+def move_file(source: Path, destination: Path) -> None:
+    """
+    Move a file, also across filesystems (volumes).
+
+    Across devices the file is copied next to the destination first and
+    then renamed, so a partially copied file is never visible under the
+    destination name. Blocking (copies across devices): run it with
+    asyncio.to_thread from async code.
+
+    Args:
+        source: File to move
+        destination: Target path (parent directories are created)
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        os.replace(source, destination)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+        partial = destination.with_name(f".{destination.name}.{uuid.uuid4().hex}.part")
+        try:
+            shutil.copyfile(source, partial)
+            os.replace(partial, destination)
+        finally:
+            partial.unlink(missing_ok=True)
+        source.unlink()
+
+
+def copy_file(source: Path, destination: Path) -> None:
+    """
+    Copy a file without exposing a partial copy under the destination name.
+
+    On the same filesystem a hard link is used, so no data is copied.
+    Blocking: run it with asyncio.to_thread from async code.
+
+    Args:
+        source: File to copy
+        destination: Target path (parent directories are created)
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    partial = destination.with_name(f".{destination.name}.{uuid.uuid4().hex}.part")
+
+    try:
+        try:
+            os.link(source, partial)
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                raise
+            shutil.copyfile(source, partial)
+        os.replace(partial, destination)
+    finally:
+        partial.unlink(missing_ok=True)
+
+
+class StorageBackend(ABC):
+    """Interface implemented by every storage backend."""
+
+    # Whether files are on the local filesystem (see get_local_path)
+    is_local = False
+
+    @abstractmethod
+    async def put_file(
+        self,
+        local_path: Path,
+        key: str,
+        content_type: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Store a local file under a key, taking ownership of the local file.
+
+        Keys are content-addressed, so if the key already exists the stored
+        copy is identical and the local file is simply discarded.
+
+        Args:
+            local_path: Local file to store (removed afterwards)
+            key: Destination key
+            content_type: Optional MIME type
+
+        Returns:
+            ID of the volume holding the file, or None if the backend has no volumes
+        """
+
+    @abstractmethod
+    async def copy(self, key: str, new_key: str) -> Optional[str]:
+        """
+        Copy a key to another key, keeping the original.
+
+        Keys are content-addressed, so an existing destination is kept.
+
+        Returns:
+            ID of the volume holding the copy, or None if the backend has no volumes
+
+        Raises:
+            FileNotFoundError: If the key does not exist
+        """
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        """Check whether a key exists."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> bool:
+        """
+        Delete a key.
+
+        Returns:
+            True if deleted, False if it did not exist or deletion failed
+        """
+
+    @abstractmethod
+    def iter_chunks(self, key: str, chunk_size: int) -> AsyncIterator[bytes]:
+        """
+        Stream the content of a key.
+
+        Raises:
+            FileNotFoundError: If the key does not exist
+        """
+
+    def get_local_path(self, key: str) -> Optional[Path]:
+        """
+        Get the filesystem path of a key, if the backend stores files locally.
+
+        Returns:
+            Absolute path, or None for remote backends
+        """
+        return None
+
+    def get_volume_id(self, key: str) -> Optional[str]:
+        """
+        Get the ID of the volume holding a key.
+
+        Returns:
+            Volume ID, or None if missing or the backend has no volumes
+        """
+        return None
+
+    def get_volume_stats(self) -> List[Dict[str, object]]:
+        """
+        Get disk usage per volume.
+
+        Returns:
+            List of volume statistics (empty if the backend has no volumes)
+        """
+        return []
+
+    async def get_presigned_url(self, key: str, expires_seconds: int) -> Optional[str]:
+        """
+        Get a URL that gives direct, time-limited access to a key.
+
+        Returns:
+            URL, or None if the backend cannot serve files directly
+        """
+        return None
+
+    async def get_presigned_upload(
+        self,
+        key: str,
+        expires_seconds: int,
+        size: int,
+        content_type: str
+    ) -> Optional[Dict[str, object]]:
+        """
+        Get a URL that lets a client PUT exactly `size` bytes to a key.
+
+        Returns:
+            Dictionary with url and headers the client must send, or None if
+            the backend cannot accept uploads directly
+        """
+        return None
+
+    async def close(self) -> None:
+        """Release connections held by the backend."""
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Store files on one or more local volumes (mount points).
+
+    Keys are placed by consistent hashing of their content hash, so an
+    original and its thumbnail share a volume and adding a volume moves
+    only a fraction of the files (see app.scripts.rebalance_volumes). A
+    volume with less than the configured free space is skipped in favour
+    of the next one on the ring; reads therefore check the owner first and
+    then the other volumes.
+    """
+
+    is_local = True
+
+    def __init__(self, volumes: Dict[str, Path], min_free_bytes: int = 0):
+        """
+        Args:
+            volumes: Mapping of volume ID to root directory
+            min_free_bytes: Free space a volume must keep to accept new files
+        """
+        self.volumes = volumes
+        self.min_free_bytes = min_free_bytes
+        self.ring = HashRing({volume_id: 1 for volume_id in volumes})
+
+    @staticmethod
+    def placement_key(key: str) -> str:
+        """Part of a key that determines its volume (the content hash)."""
+        return PurePosixPath(key).name.split('.', 1)[0]
+
+    def _path(self, volume_id: str, key: str) -> Path:
+        """Full path of a key on a volume, rejecting keys outside the volume."""
+        root = self.volumes[volume_id]
+        full_path = root / key
+
+        if not full_path.resolve().is_relative_to(root.resolve()):
+            raise ValueError(f"Invalid storage key: {key}")
+
+        return full_path
+
+    def _locate(self, key: str) -> Optional[str]:
+        """Find the volume holding a key, owner first."""
+        for volume_id in self.ring.iter_nodes(self.placement_key(key)):
+            if self._path(volume_id, key).is_file():
+                return volume_id
+        return None
+
+    def has_free_space(self, volume_id: str) -> bool:
+        """Check whether a volume can accept new files."""
+        root = self.volumes[volume_id]
+        root.mkdir(parents=True, exist_ok=True)
+        return shutil.disk_usage(root).free >= self.min_free_bytes
+
+    def choose_volume(self, key: str) -> str:
+        """
+        Choose the volume for a new key.
+
+        Returns:
+            The key's owner on the ring, or the next volume with free space
+
+        Raises:
+            OSError: If no volume has enough free space
+        """
+        for volume_id in self.ring.iter_nodes(self.placement_key(key)):
+            if self.has_free_space(volume_id):
+                return volume_id
+
+        raise OSError(errno.ENOSPC, "No storage volume has enough free space")
+
+    def get_volume_stats(self) -> List[Dict[str, object]]:
+        """
+        Get disk usage of every volume.
+
+        Returns:
+            List of dictionaries with volume_id, path, total, used, free and accepting
+        """
+        stats = []
+        for volume_id, root in self.volumes.items():
+            root.mkdir(parents=True, exist_ok=True)
+            usage = shutil.disk_usage(root)
+            stats.append({
+                'volume_id': volume_id,
+                'path': str(root),
+                'total_bytes': usage.total,
+                'used_bytes': usage.used,
+                'free_bytes': usage.free,
+                'accepting': usage.free >= self.min_free_bytes
+            })
+        return stats
+
+    def get_local_path(self, key: str) -> Optional[Path]:
+        volume_id = self._locate(key) or self.ring.get_node(self.placement_key(key))
+        return self._path(volume_id, key)
+
+    def get_volume_id(self, key: str) -> Optional[str]:
+        return self._locate(key)
+
+    async def put_file(
+        self,
+        local_path: Path,
+        key: str,
+        content_type: Optional[str] = None
+    ) -> Optional[str]:
+        volume_id = self._locate(key)
+        if volume_id is not None:
+            local_path.unlink(missing_ok=True)
+            return volume_id
+
+        volume_id = self.choose_volume(key)
+        await asyncio.to_thread(move_file, local_path, self._path(volume_id, key))
+        return volume_id
+
+    async def copy(self, key: str, new_key: str) -> Optional[str]:
+        source_volume = self._locate(key)
+        if source_volume is None:
+            raise FileNotFoundError(key)
+
+        volume_id = self._locate(new_key)
+        if volume_id is not None:
+            return volume_id
+
+        volume_id = self.choose_volume(new_key)
+        await asyncio.to_thread(copy_file, self._path(source_volume, key), self._path(volume_id, new_key))
+        return volume_id
+
+    async def exists(self, key: str) -> bool:
+        return self._locate(key) is not None
+
+    async def delete(self, key: str) -> bool:
+        try:
+            volume_id = self._locate(key)
+            if volume_id is not None:
+                self._path(volume_id, key).unlink()
+                return True
+            return False
+        except Exception:
+            return False
+
+    async def iter_chunks(self, key: str, chunk_size: int) -> AsyncIterator[bytes]:
+        volume_id = self._locate(key)
+        if volume_id is None:
+            raise FileNotFoundError(key)
+
+        async with aiofiles.open(self._path(volume_id, key), 'rb') as f:
+            while chunk := await f.read(chunk_size):
+                yield chunk
+
+
+class S3StorageBackend(StorageBackend):
+    """
+    Store files in an S3-compatible object store (AWS S3, MinIO, ...).
+
+    One client is kept open for the lifetime of the process so HTTP
+    connections are pooled. Files above the multipart threshold are uploaded
+    in parts, several in parallel, each read from the local file on demand.
+    Requires the optional `s3` dependencies (aiobotocore).
+    """
+
+    def __init__(self):
+        try:
+            from aiobotocore.config import AioConfig
+            from aiobotocore.session import get_session
+        except ImportError:
+            raise RuntimeError(
+                "STORAGE_TYPE=s3 requires aiobotocore. "
+                "Install with: uv pip install -e '.[s3]'"
+            )
+
+        self.bucket = settings.s3_bucket
+        self.part_size = settings.s3_multipart_chunk_size
+        self.multipart_threshold = settings.s3_multipart_threshold
+        self.max_concurrency = settings.s3_max_concurrency
+
+        self._session = get_session()
+        self._config = AioConfig(
+            max_pool_connections=settings.s3_max_pool_connections,
+            signature_version='s3v4',
+            s3={'addressing_style': 'path' if settings.s3_endpoint_url else 'auto'}
+        )
+        self._client = None
+        self._client_context = None
+        self._client_lock = asyncio.Lock()
+
+    async def _get_client(self):
+        """Create the pooled S3 client on first use."""
+        if self._client is None:
+            async with self._client_lock:
+                if self._client is None:
+                    self._client_context = self._session.create_client(
+                        's3',
+                        endpoint_url=settings.s3_endpoint_url,
+                        region_name=settings.s3_region,
+                        aws_access_key_id=settings.s3_access_key_id,
+                        aws_secret_access_key=settings.s3_secret_access_key,
+                        config=self._config
+                    )
+                    self._client = await self._client_context.__aenter__()
+        return self._client
+
+    @staticmethod
+    def _is_not_found(error: Exception) -> bool:
+        """Check whether a botocore ClientError means the key is missing."""
+        code = getattr(error, 'response', {}).get('Error', {}).get('Code')
+        return code in ('404', 'NoSuchKey', 'NotFound')
+
+    async def put_file(
+        self,
+        local_path: Path,
+        key: str,
+        content_type: Optional[str] = None
+    ) -> Optional[str]:
+        try:
+            if await self.exists(key):
+                return None
+
+            size = local_path.stat().st_size
+            extra = {'ContentType': content_type} if content_type else {}
+
+            if size < self.multipart_threshold:
+                client = await self._get_client()
+                async with aiofiles.open(local_path, 'rb') as f:
+                    body = await f.read()
+                await client.put_object(Bucket=self.bucket, Key=key, Body=body, **extra)
+            else:
+                await self._put_multipart(local_path, key, size, extra)
+        finally:
+            local_path.unlink(missing_ok=True)
+
+    async def _put_multipart(self, local_path: Path, key: str, size: int, extra: dict) -> None:
+        """
+        Upload a large file as a multipart upload with parallel parts.
+
+        At most max_concurrency parts are in memory at a time.
+        """
+        client = await self._get_client()
+        upload = await client.create_multipart_upload(Bucket=self.bucket, Key=key, **extra)
+        upload_id = upload['UploadId']
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def upload_part(part_number: int, offset: int) -> dict:
+            async with semaphore:
+                async with aiofiles.open(local_path, 'rb') as f:
+                    await f.seek(offset)
+                    body = await f.read(self.part_size)
+                response = await client.upload_part(
+                    Bucket=self.bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=body
+                )
+                return {'PartNumber': part_number, 'ETag': response['ETag']}
+
+        try:
+            parts = await asyncio.gather(*(
+                upload_part(number, offset)
+                for number, offset in enumerate(range(0, size, self.part_size), start=1)
+            ))
+            await client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': list(parts)}
+            )
+        except Exception:
+            await client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+
+    async def copy(self, key: str, new_key: str) -> Optional[str]:
+        if await self.exists(new_key):
+            return None
+
+        client = await self._get_client()
+        try:
+            await client.copy_object(
+                Bucket=self.bucket,
+                Key=new_key,
+                CopySource={'Bucket': self.bucket, 'Key': key}
+            )
+        except Exception as e:
+            if self._is_not_found(e):
+                raise FileNotFoundError(key)
+            raise
+        return None
+
+    async def exists(self, key: str) -> bool:
+        client = await self._get_client()
+        try:
+            await client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except Exception as e:
+            if self._is_not_found(e):
+                return False
+            raise
+
+    async def delete(self, key: str) -> bool:
+        client = await self._get_client()
+        try:
+            await client.delete_object(Bucket=self.bucket, Key=key)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to delete s3://{self.bucket}/{key}: {e}")
+            return False
+
+    async def iter_chunks(self, key: str, chunk_size: int) -> AsyncIterator[bytes]:
+        client = await self._get_client()
+        try:
+            response = await client.get_object(Bucket=self.bucket, Key=key)
+        except Exception as e:
+            if self._is_not_found(e):
+                raise FileNotFoundError(key)
+            raise
+
+        async with response['Body'] as stream:
+            while chunk := await stream.read(chunk_size):
+                yield chunk
+
+    async def get_presigned_url(self, key: str, expires_seconds: int) -> Optional[str]:
+        client = await self._get_client()
+        return await client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket, 'Key': key},
+            ExpiresIn=expires_seconds
+        )
+
+    async def get_presigned_upload(
+        self,
+        key: str,
+        expires_seconds: int,
+        size: int,
+        content_type: str
+    ) -> Optional[Dict[str, object]]:
+        # Content-Length and Content-Type are part of the signature, so the
+        # store rejects bodies of any other size
+        client = await self._get_client()
+        url = await client.generate_presigned_url(
+            'put_object',
+            Params={
+                'Bucket': self.bucket,
+                'Key': key,
+                'ContentLength': size,
+                'ContentType': content_type
+            },
+            ExpiresIn=expires_seconds
+        )
+        return {'url': url, 'headers': {'Content-Type': content_type}}
+
+    async def close(self) -> None:
+        if self._client_context is not None:
+            await self._client_context.__aexit__(None, None, None)
+            self._client = None
+            self._client_context = None
+
+
+def create_storage_backend(base_path: Path) -> StorageBackend:
+    """
+    Create the backend selected by settings.storage_type.
+
+    Args:
+        base_path: Local storage root (the only volume unless STORAGE_VOLUMES is set)
+
+    Returns:
+        Storage backend instance
+
+    Raises:
+        ValueError: If the storage type is unknown
+    """
+    storage_type = settings.storage_type.lower()
+
+    if storage_type == 'local':
+        volumes = {
+            volume_id: Path(path)
+            for volume_id, path in settings.storage_volumes_map.items()
+        } or {'default': base_path}
+        return LocalStorageBackend(volumes, settings.storage_volume_min_free_mb * 1024 * 1024)
+    if storage_type == 's3':
+        return S3StorageBackend()
+
+    raise ValueError(f"Invalid storage type '{settings.storage_type}'. Must be 'local' or 's3'")
@@ -1,73 +1,183 @@
-"""Storage service for file operations with local filesystem support."""
+"""Storage service for file operations on local or S3-compatible storage."""
 
+import asyncio
+import hashlib
 import os
 import uuid
 from pathlib import Path
-from datetime import datetime
-from typing import Optional
+from typing import AsyncIterator, Dict, List, Optional
+from urllib.parse import quote
 import aiofiles
 from fastapi import UploadFile
 
 from app.core.config import settings
+from app.services.segment_store import SegmentStore
+from app.services.storage_backends import create_storage_backend, move_file
 
 
 class StorageService:
-    """Handle file storage operations with support for local filesystem."""
+    """
+    Handle file storage operations.
+
+    Uploads are written and processed in local temporary files under
+    storage_path; finished originals and thumbnails are handed to the
+    configured backend (see storage_backends). With THUMBNAIL_STORE=segments
+    new thumbnails of local storage are packed into segment files instead
+    (see segment_store); paths under segments/ are routed there.
+    """
+
+    # Read/write chunk size for streaming uploads
+    CHUNK_SIZE = 1024 * 1024
 
     def __init__(self):
         self.base_path = Path(settings.storage_path)
-        self.uploads_path = self.base_path / "uploads"
-        self.thumbnails_path = self.base_path / "thumbnails"
+        self.tmp_path = self.base_path / "tmp"
+        self.backend = create_storage_backend(self.base_path)
+        self.segments = SegmentStore(
+            self.base_path / "segments",
+            settings.thumbnail_segment_max_mb * 1024 * 1024
+        )
 
-    async def save_file(
-        self,
-        file: UploadFile,
-        collection_code: str,
-        file_type: str = "photo"
-    ) -> tuple[str, str]:
+    async def save_temp_file(self, file: UploadFile) -> tuple[Path, str, int]:
         """
-        Save uploaded file to storage.
+        Stream uploaded file to a temporary file while hashing its content.
 
         Args:
             file: The uploaded file
-            collection_code: Collection code for organizing files
-            file_type: Type of file (photo or thumbnail)
 
         Returns:
-            Tuple of (file_path, filename)
+            Tuple of (temp_path, sha256 hex digest, size in bytes)
         """
-        # Sanitize filename
-        original_filename = self._sanitize_filename(file.filename or "unknown")
+        self.tmp_path.mkdir(parents=True, exist_ok=True)
+        temp_path = self.tmp_path / f"{uuid.uuid4().hex}.part"
 
-        # Generate unique filename
-        file_uuid = uuid.uuid4().hex[:12]
-        filename = f"{file_uuid}_{original_filename}"
+        sha256 = hashlib.sha256()
+        size = 0
 
-        # Create directory structure: storage/uploads/{code}/{year}/{month}/
-        now = datetime.now()
-        year_month_path = Path(collection_code) / str(now.year) / f"{now.month:02d}"
+        await file.seek(0)
 
-        if file_type == "thumbnail":
-            full_dir = self.thumbnails_path / year_month_path
-        else:
-            full_dir = self.uploads_path / year_month_path
+        async with aiofiles.open(temp_path, 'wb') as f:
+            while chunk := await file.read(self.CHUNK_SIZE):
+                sha256.update(chunk)
+                size += len(chunk)
+                await f.write(chunk)
 
-        full_dir.mkdir(parents=True, exist_ok=True)
+        return temp_path, sha256.hexdigest(), size
 
-        # Full file path
-        file_path = full_dir / filename
+    async def hash_file(self, path: Path) -> str:
+        """
+        Compute the SHA-256 of a local file in chunks.
 
-        # Reset file pointer before reading
-        await file.seek(0)
+        Args:
+            path: Absolute path to the file
+
+        Returns:
+            SHA-256 hex digest
+        """
+        sha256 = hashlib.sha256()
+
+        async with aiofiles.open(path, 'rb') as f:
+            while chunk := await f.read(self.CHUNK_SIZE):
+                sha256.update(chunk)
+
+        return sha256.hexdigest()
+
+    async def commit_temp_file(
+        self,
+        temp_path: Path,
+        file_path: str,
+        content_type: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Move a temporary file to its final content-addressed location.
+
+        Content-addressed paths are determined by the bytes, so if the target
+        already exists the temporary copy is identical and is discarded.
+
+        Args:
+            temp_path: Local temporary file (consumed)
+            file_path: Relative destination path
+            content_type: Optional MIME type stored with the file
+
+        Returns:
+            ID of the volume holding the file (None for object storage)
+        """
+        return await self.backend.put_file(temp_path, file_path, content_type)
+
+    async def commit_thumbnail(self, temp_path: Path, content_hash: str) -> str:
+        """
+        Store a generated thumbnail.
+
+        Args:
+            temp_path: Local temporary JPEG file (consumed)
+            content_hash: SHA-256 hex digest of the original's content
+
+        Returns:
+            Relative path of the stored thumbnail
+        """
+        if settings.thumbnail_store == "segments" and self.backend.is_local:
+            try:
+                async with aiofiles.open(temp_path, 'rb') as f:
+                    data = await f.read()
+                return self.segments.append(content_hash, data)
+            finally:
+                temp_path.unlink(missing_ok=True)
+
+        thumbnail_path = self.get_blob_thumbnail_path(content_hash)
+        await self.commit_temp_file(temp_path, thumbnail_path, 'image/jpeg')
+        return thumbnail_path
+
+    def get_fanout_path(self, prefix: str, file_id: str, suffix: str = "") -> str:
+        """
+        Get the fanned-out path of a file.
+
+        Files are spread over nested directories named after leading hex
+        characters of their ID, so no directory grows beyond about
+        files / 16^(width * depth) entries.
+
+        Args:
+            prefix: Top-level directory ("uploads" or "thumbnails")
+            file_id: Hex file ID (content hash)
+            suffix: Appended to the file name (e.g. ".jpg")
+
+        Returns:
+            Relative path, e.g. uploads/3a/7b/3a7b...{suffix} for depth 2, width 2
 
-        # Save file asynchronously
-        async with aiofiles.open(file_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
+        Example:
+            >>> storage_service.get_fanout_path("uploads", "3a7bd3e2", ".jpg")
+            'uploads/3a/7b/3a7bd3e2.jpg'
+        """
+        width = settings.storage_fanout_width
+        levels = [
+            file_id[i * width:(i + 1) * width]
+            for i in range(settings.storage_fanout_depth)
+        ]
+        return "/".join([prefix, *levels, f"{file_id}{suffix}"])
+
+    def get_blob_path(self, content_hash: str, extension: str = "") -> str:
+        """
+        Get the content-addressed path of an original.
+
+        Args:
+            content_hash: SHA-256 hex digest of the content
+            extension: File extension including the dot (e.g. ".jpg")
+
+        Returns:
+            Relative path under uploads/ (see get_fanout_path)
+        """
+        return self.get_fanout_path("uploads", content_hash, extension)
+
+    def get_blob_thumbnail_path(self, content_hash: str) -> str:
+        """
+        Get the content-addressed path of a thumbnail.
 
-        # Return relative path for database storage
-        relative_path = str(file_path.relative_to(self.base_path))
-        return relative_path, filename
+        Args:
+            content_hash: SHA-256 hex digest of the original's content
+
+        Returns:
+            Relative path under thumbnails/ (see get_fanout_path)
+        """
+        return self.get_fanout_path("thumbnails", content_hash, ".jpg")
 
     async def delete_file(self, file_path: str) -> bool:
         """
@@ -79,14 +189,104 @@ class StorageService:
         Returns:
             True if deleted successfully
         """
+        if self.segments.owns(file_path):
+            return self.segments.delete(file_path)
+        return await self.backend.delete(file_path)
+
+    async def copy_file(self, file_path: str, new_path: str) -> Optional[str]:
+        """
+        Copy a stored file to another path, keeping the original.
+
+        Args:
+            file_path: Relative path of the existing file
+            new_path: Relative destination path
+
+        Returns:
+            ID of the volume holding the copy (None for object storage)
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+        """
+        return await self.backend.copy(file_path, new_path)
+
+    async def file_exists(self, file_path: str) -> bool:
+        """
+        Check whether a stored file exists.
+
+        Args:
+            file_path: Relative path to file
+
+        Returns:
+            True if the file exists
+        """
+        if self.segments.owns(file_path):
+            return self.segments.exists(file_path)
+        return await self.backend.exists(file_path)
+
+    def iter_file(self, file_path: str) -> AsyncIterator[bytes]:
+        """
+        Stream a stored file in chunks.
+
+        Args:
+            file_path: Relative path to file
+
+        Returns:
+            Async iterator of chunks (raises FileNotFoundError if missing)
+        """
+        if self.segments.owns(file_path):
+            return self._iter_segment_file(file_path)
+        return self.backend.iter_chunks(file_path, self.CHUNK_SIZE)
+
+    async def _iter_segment_file(self, file_path: str) -> AsyncIterator[bytes]:
+        """Yield a segment record as a single chunk."""
         try:
-            full_path = self.base_path / file_path
-            if full_path.exists():
-                full_path.unlink()
-                return True
-            return False
-        except Exception:
-            return False
+            yield await self.segments.read(file_path)
+        except ValueError:
+            raise FileNotFoundError(file_path)
+
+    async def move_to_temp(self, file_path: str) -> Path:
+        """
+        Move a stored file into a local temporary file.
+
+        Used for objects that clients uploaded directly to storage. Local
+        files are renamed; remote objects are downloaded and then deleted.
+
+        Args:
+            file_path: Relative path to file
+
+        Returns:
+            Path of the temporary file (owned by the caller)
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+        """
+        self.tmp_path.mkdir(parents=True, exist_ok=True)
+        temp_path = self.tmp_path / f"{uuid.uuid4().hex}.part"
+
+        local_path = self.backend.get_local_path(file_path)
+        if local_path is not None:
+            await asyncio.to_thread(move_file, local_path, temp_path)
+            return temp_path
+
+        try:
+            async with aiofiles.open(temp_path, 'wb') as f:
+                async for chunk in self.iter_file(file_path):
+                    await f.write(chunk)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+        await self.backend.delete(file_path)
+        return temp_path
+
+    def get_volume_stats(self) -> List[Dict[str, object]]:
+        """
+        Get disk usage per storage volume.
+
+        Returns:
+            List of volume statistics (empty for object storage)
+        """
+        return self.backend.get_volume_stats()
 
     def get_file_url(self, file_path: str) -> str:
         """
@@ -98,11 +298,11 @@ class StorageService:
         Returns:
             URL string for file access
         """
-        # For local storage, return path relative to storage root
-        # In production, this would return CDN/S3 URL
-        return f"/storage/{file_path}"
+        # API storage route (see api/v1/storage.py); for S3 it redirects
+        # to a presigned URL
+        return f"/api/v1/storage/{quote(file_path)}"
 
-    def _sanitize_filename(self, filename: str) -> str:
+    def sanitize_filename(self, filename: str) -> str:
         """
         Sanitize filename to prevent path traversal and invalid characters.
 
@@ -127,6 +327,11 @@ class StorageService:
 
         return filename
 
+    async def close(self) -> None:
+        """Release connections held by the storage backend."""
+        self.segments.close()
+        await self.backend.close()
+
 
 # Global storage service instance
 storage_service = StorageService()
@@ -0,0 +1,555 @@
+"""Upload session service for resumable chunked uploads and direct uploads.
+
+Chunked protocol:
+    1. POST   /collections/{code}/uploads                 create session
+    2. PATCH  /collections/{code}/uploads/{id}            append bytes at Upload-Offset
+    3. GET    /collections/{code}/uploads/{id}            query offset after a failure
+    4. POST   /collections/{code}/uploads/{id}/complete   validate and process the file
+
+Direct protocol (bytes never pass through the API with an object store):
+    1. POST   /collections/{code}/uploads/presign         get signed PUT URLs per file
+    2. PUT    <url>                                       upload to storage
+    3. POST   /collections/{code}/uploads/{id}/finalize   register photo, queue processing
+    4. GET    /collections/{code}/uploads/{id}            poll until completed/failed
+"""
+
+import logging
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import aiofiles
+from beanie import UpdateResponse
+from beanie.operators import And, Or, Set
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.models.photo import Photo
+from app.models.system_statistics import photo_state, record_photo_change
+from app.models.upload_session import DirectUploadFile, UploadSession
+from app.services.delivery_service import delivery_service
+from app.services.photo_service import photo_service
+from app.services.processing_service import processing_service
+from app.services.storage_service import storage_service
+from app.utils.keyed_locks import KeyedLocks
+
+logger = logging.getLogger(__name__)
+
+
+class UploadSessionService:
+    """Manage resumable upload sessions and their temporary files."""
+
+    def __init__(self):
+        self.sessions_path = storage_service.tmp_path / "sessions"
+        # Serializes chunk appends per session within this process only:
+        # clients send a session's chunks one after another, and a request
+        # on another worker is caught by the offset check
+        self._locks = KeyedLocks()
+
+    def _expires_at(self) -> datetime:
+        """Expiry for a session touched now."""
+        return datetime.utcnow() + timedelta(hours=settings.upload_session_expires_hours)
+
+    def _full_path(self, session: UploadSession) -> Path:
+        """Absolute path of a session's temporary file."""
+        return storage_service.base_path / session.temp_path
+
+    def _require_chunked(self, session: UploadSession) -> None:
+        """Reject chunk operations on direct upload sessions."""
+        if session.storage_key is not None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Upload session is a direct upload"
+            )
+
+    async def create_session(
+        self,
+        collection_code: str,
+        filename: str,
+        size: int,
+        uploader_info: Optional[Dict[str, Optional[str]]] = None
+    ) -> UploadSession:
+        """
+        Start a resumable upload.
+
+        Filename and size are checked up front so that clients do not send
+        bytes that would be rejected at completion.
+
+        Args:
+            collection_code: Collection code
+            filename: Original filename
+            size: Total file size in bytes
+            uploader_info: Optional uploader information (ip, user_agent)
+
+        Returns:
+            Created UploadSession
+
+        Raises:
+            HTTPException: If the collection does not accept the file
+        """
+        collection, error = await photo_service.get_upload_collection(collection_code)
+        if collection is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error)
+
+        if error is None:
+            error = photo_service.validate_filename(filename) or \
+                photo_service.validate_file_size(size, collection)
+        if error:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
+
+        session = UploadSession(
+            collection_code=collection.code,
+            filename=storage_service.sanitize_filename(filename),
+            total_size=size,
+            temp_path="",
+            uploader_info=uploader_info or {},
+            expires_at=self._expires_at()
+        )
+        await session.insert()
+
+        # Temporary file named after the session
+        self.sessions_path.mkdir(parents=True, exist_ok=True)
+        full_path = self.sessions_path / f"{session.id}.part"
+        full_path.touch()
+
+        session.temp_path = str(full_path.relative_to(storage_service.base_path))
+        await session.save()
+
+        return session
+
+    async def append_chunk(
+        self,
+        session: UploadSession,
+        offset: int,
+        chunks: AsyncIterator[bytes]
+    ) -> UploadSession:
+        """
+        Append bytes to a session's temporary file at the given offset.
+
+        Bytes received before a dropped connection are kept and recorded, so
+        the client can resume from the offset reported by the server.
+
+        Args:
+            session: Upload session
+            offset: Offset the client claims to write at (Upload-Offset header)
+            chunks: Request body stream
+
+        Returns:
+            Updated UploadSession
+
+        Raises:
+            HTTPException: 409 on offset mismatch or inactive session,
+                413 if data exceeds the declared size
+        """
+        async with self._locks.hold(str(session.id)):
+            # Reload: another request may have advanced the session
+            session = await UploadSession.get(session.id)
+            if session is None or session.status != "active":
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Upload session is not active"
+                )
+            self._require_chunked(session)
+
+            full_path = self._full_path(session)
+            on_disk = full_path.stat().st_size if full_path.exists() else 0
+
+            # Temporary file lost or shorter than recorded (e.g. crash before fsync)
+            if on_disk < session.offset:
+                session.offset = on_disk
+                await session.save()
+
+            if offset != session.offset:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Offset mismatch, expected {session.offset}",
+                    headers={"Upload-Offset": str(session.offset)}
+                )
+
+            new_offset = offset
+            try:
+                async with aiofiles.open(full_path, 'r+b' if full_path.exists() else 'wb') as f:
+                    # Drop bytes written after the recorded offset (unacknowledged)
+                    await f.seek(offset)
+                    await f.truncate()
+
+                    async for chunk in chunks:
+                        remaining = session.total_size - new_offset
+                        if len(chunk) > remaining:
+                            await f.write(chunk[:remaining])
+                            new_offset += remaining
+                            raise HTTPException(
+                                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                detail="Data exceeds declared upload size"
+                            )
+
+                        await f.write(chunk)
+                        new_offset += len(chunk)
+            finally:
+                # Record whatever reached the disk, even if the client disconnected
+                session.offset = new_offset
+                session.updated_at = datetime.utcnow()
+                session.expires_at = self._expires_at()
+                await session.save()
+
+            return session
+
+    async def complete_session(self, session: UploadSession) -> Dict[str, Any]:
+        """
+        Validate and process a fully received file.
+
+        Repeated calls return the stored result of the first completion.
+        The completion holds a lease (completing_until): if its process stops
+        before storing a result, a retry after the lease takes it over.
+
+        Args:
+            session: Upload session
+
+        Returns:
+            Upload result dictionary (see PhotoService.upload_photo)
+
+        Raises:
+            HTTPException: 409 if the upload is incomplete or already being completed
+        """
+        if session.result is not None:
+            return session.result
+
+        self._require_chunked(session)
+
+        if session.offset != session.total_size:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Upload incomplete: {session.offset}/{session.total_size} bytes received",
+                headers={"Upload-Offset": str(session.offset)}
+            )
+
+        # Claim the session so concurrent completions process it only once
+        now = datetime.utcnow()
+        lease = now + timedelta(seconds=settings.upload_complete_lease_seconds)
+        claimed = await UploadSession.find_one(
+            UploadSession.id == session.id,
+            Or(
+                UploadSession.status == "active",
+                And(UploadSession.status == "completing", UploadSession.completing_until < now)
+            )
+        ).update(
+            Set({UploadSession.status: "completing", UploadSession.completing_until: lease}),
+            response_type=UpdateResponse.NEW_DOCUMENT
+        )
+
+        if claimed is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Upload session is not active"
+            )
+
+        # Our claim: the lease as stored (MongoDB keeps milliseconds)
+        lease_filter = (
+            UploadSession.id == session.id,
+            UploadSession.status == "completing",
+            UploadSession.completing_until == claimed.completing_until
+        )
+
+        full_path = self._full_path(session)
+        try:
+            if full_path.exists():
+                result = await photo_service.upload_local_file(
+                    temp_path=full_path,
+                    filename=session.filename,
+                    collection_code=session.collection_code,
+                    uploader_info=session.uploader_info
+                )
+            else:
+                # Consumed by an earlier completion that stopped
+                result = {
+                    'success': False,
+                    'filename': session.filename,
+                    'error': 'Uploaded file is no longer available'
+                }
+        except BaseException:
+            # Let a retry complete it right away
+            await UploadSession.find_one(*lease_filter).update(
+                Set({UploadSession.status: "active", UploadSession.completing_until: None})
+            )
+            raise
+
+        # Unless the lease expired and another completion took over
+        await UploadSession.find_one(*lease_filter).update(
+            Set({
+                UploadSession.status: "completed" if result['success'] else "failed",
+                UploadSession.result: result,
+                UploadSession.updated_at: datetime.utcnow()
+            })
+        )
+
+        return result
+
+    async def create_direct_uploads(
+        self,
+        collection_code: str,
+        files: List[DirectUploadFile],
+        uploader_info: Optional[Dict[str, Optional[str]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Create direct upload sessions with presigned PUT URLs.
+
+        Each accepted file gets a staging key under "incoming/"; the client
+        uploads exactly the declared number of bytes to its URL. Files that
+        the collection would reject get an error instead of a URL.
+
+        Args:
+            collection_code: Collection code
+            files: Files the client wants to upload
+            uploader_info: Optional uploader information (ip, user_agent)
+
+        Returns:
+            List of dictionaries (see DirectUploadTarget)
+
+        Raises:
+            HTTPException: If the collection does not accept uploads
+        """
+        collection, error = await photo_service.get_upload_collection(collection_code)
+        if collection is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error)
+        if error:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
+
+        targets = []
+        for file in files:
+            error = photo_service.validate_filename(file.filename) or \
+                photo_service.validate_file_size(file.size, collection)
+            if not error and file.content_type not in photo_service.ALLOWED_MIME_TYPES:
+                error = f'Invalid file type: {file.content_type}'
+            if error:
+                targets.append({'filename': file.filename, 'error': error})
+                continue
+
+            session = UploadSession(
+                collection_code=collection.code,
+                filename=storage_service.sanitize_filename(file.filename),
+                total_size=file.size,
+                temp_path="",
+                content_type=file.content_type,
+                uploader_info=uploader_info or {},
+                expires_at=self._expires_at()
+            )
+            await session.insert()
+
+            session.storage_key = f"incoming/{session.id}"
+            await session.save()
+
+            upload = await delivery_service.get_signed_upload_url(
+                session.storage_key,
+                size=file.size,
+                content_type=file.content_type
+            )
+            targets.append({
+                'filename': file.filename,
+                'upload_id': str(session.id),
+                **upload
+            })
+
+        return targets
+
+    async def finalize_direct_upload(self, session: UploadSession) -> UploadSession:
+        """
+        Register the photo of a direct upload and queue its processing.
+
+        The photo is created in "pending" state right away; validation,
+        hashing, deduplication and thumbnails run in the background. Repeated
+        calls return the session unchanged.
+
+        Args:
+            session: Direct upload session
+
+        Returns:
+            Updated UploadSession (status "processing", photo_id set)
+
+        Raises:
+            HTTPException: 409 if not a direct upload, not uploaded yet or not active
+        """
+        if session.storage_key is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Upload session is not a direct upload"
+            )
+
+        if session.photo_id is not None:
+            return session
+
+        if not await storage_service.file_exists(session.storage_key):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="File has not been uploaded yet"
+            )
+
+        # Claim the session so concurrent finalizations register one photo
+        claim = await UploadSession.find_one(
+            UploadSession.id == session.id,
+            UploadSession.status == "active"
+        ).update(Set({UploadSession.status: "processing"}))
+
+        if claim.modified_count == 0:
+            session = await UploadSession.get(session.id)
+            if session and session.photo_id is not None:
+                return session
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Upload session is not active"
+            )
+
+        photo = Photo(
+            collection_code=session.collection_code,
+            filename=session.filename,
+            file_path=session.storage_key,
+            file_size=session.total_size,
+            mime_type=session.content_type or 'application/octet-stream',
+            uploader_info=session.uploader_info,
+            processing_status='pending'
+        )
+        await photo.insert()
+        await record_photo_change(None, 'pending', photo.file_size)
+
+        session.status = "processing"
+        session.photo_id = str(photo.id)
+        session.updated_at = datetime.utcnow()
+        session.expires_at = self._expires_at()
+        await session.save()
+
+        processing_service.enqueue(self._process_direct_upload, str(session.id))
+        return session
+
+    async def _process_direct_upload(self, session_id: str) -> None:
+        """
+        Process a finalized direct upload (processing job).
+
+        Args:
+            session_id: Upload session ID
+        """
+        session = await UploadSession.get(session_id)
+        if session is None or session.status != "processing":
+            return
+
+        photo = await Photo.get(session.photo_id)
+
+        try:
+            temp_path = await storage_service.move_to_temp(session.storage_key)
+        except FileNotFoundError:
+            temp_path = None
+
+        if photo is not None and temp_path is not None:
+            result = await photo_service.process_pending_photo(photo, temp_path)
+        else:
+            result = {
+                'success': False,
+                'filename': session.filename,
+                'error': 'Uploaded file is no longer available'
+            }
+            if temp_path:
+                temp_path.unlink(missing_ok=True)
+            if photo:
+                state = photo_state(photo.processing_status, photo.is_deleted)
+                photo.processing_status = 'failed'
+                photo.is_deleted = True
+                await photo.save()
+                await record_photo_change(state, 'failed', photo.file_size)
+
+        session.status = "completed" if result['success'] else "failed"
+        session.result = result
+        session.updated_at = datetime.utcnow()
+        await session.save()
+
+    async def requeue_direct_uploads(self) -> int:
+        """
+        Queue processing of direct uploads interrupted by a restart.
+
+        Returns:
+            Number of sessions queued
+        """
+        sessions = await UploadSession.find(
+            UploadSession.status == "processing",
+            UploadSession.storage_key != None
+        ).to_list()
+
+        for session in sessions:
+            processing_service.enqueue(self._process_direct_upload, str(session.id))
+
+        return len(sessions)
+
+    async def abort_session(self, session: UploadSession) -> None:
+        """
+        Abort an upload and delete its temporary file.
+
+        Only sessions still receiving bytes can be aborted, or one whose
+        completion was abandoned (lease expired, see complete_session):
+        completing, processing and finished sessions keep their files and
+        results.
+
+        Args:
+            session: Upload session
+
+        Raises:
+            HTTPException: 409 if the session is not active
+        """
+        async with self._locks.hold(str(session.id)):
+            now = datetime.utcnow()
+            aborted = await UploadSession.find_one(
+                UploadSession.id == session.id,
+                Or(
+                    UploadSession.status == "active",
+                    And(UploadSession.status == "completing", UploadSession.completing_until < now)
+                )
+            ).update(
+                Set({
+                    UploadSession.status: "aborted",
+                    UploadSession.completing_until: None,
+                    UploadSession.updated_at: now
+                }),
+                response_type=UpdateResponse.NEW_DOCUMENT
+            )
+
+            if aborted is None:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Upload session is not active"
+                )
+
+            if aborted.storage_key:
+                await storage_service.delete_file(aborted.storage_key)
+            else:
+                self._full_path(aborted).unlink(missing_ok=True)
+
+    def cleanup_stale_files(self) -> int:
+        """
+        Delete temporary files of sessions that have expired.
+
+        Session documents are removed by the TTL index; their files are
+        removed here based on modification time. Staging objects of direct
+        uploads are covered for local storage; object stores should expire
+        the "incoming/" prefix with a lifecycle rule.
+
+        Returns:
+            Number of files deleted
+        """
+        cutoff = time.time() - settings.upload_session_expires_hours * 3600
+        deleted = 0
+
+        paths = list(self.sessions_path.glob("*.part"))
+        if storage_service.backend.is_local:
+            for root in storage_service.backend.volumes.values():
+                paths.extend((root / "incoming").glob("*"))
+
+        for path in paths:
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    deleted += 1
+            except OSError as e:
+                logger.warning(f"Failed to delete stale upload file {path}: {e}")
+
+        return deleted
+
+
+# Global upload session service instance
+upload_session_service = UploadSessionService()
@@ -0,0 +1,121 @@
+"""BK-tree for Hamming-distance queries over 64-bit perceptual hashes.
+
+A BK-tree stores each hash as a node whose children are keyed by their
+distance to it. By the triangle inequality, a query for all hashes within
+distance k of q only needs to descend into children with key in
+[d(q, node) - k, d(q, node) + k], which prunes most of the tree for small k.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """
+    Count differing bits between two hashes.
+
+    Example:
+        >>> hamming_distance(0b1011, 0b0001)
+        2
+    """
+    return (a ^ b).bit_count()
+
+
+class _Node:
+    """Tree node holding one hash and every item with that hash."""
+
+    __slots__ = ("value", "items", "children")
+
+    def __init__(self, value: int, item: Any):
+        self.value = value
+        self.items: List[Any] = [item]
+        self.children: Dict[int, "_Node"] = {}
+
+
+class BKTree:
+    """
+    BK-tree keyed by integer hashes under Hamming distance.
+
+    Example:
+        >>> tree = BKTree()
+        >>> tree.add(0b1111, "a")
+        >>> tree.add(0b1110, "b")
+        >>> sorted(tree.search(0b1111, 1))
+        [(0, 'a'), (1, 'b')]
+    """
+
+    def __init__(self):
+        self._root: Optional[_Node] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int, item: Any) -> None:
+        """
+        Insert an item under its hash.
+
+        Args:
+            value: Hash value
+            item: Payload (e.g. photo ID)
+        """
+        self._size += 1
+
+        if self._root is None:
+            self._root = _Node(value, item)
+            return
+
+        node = self._root
+        while True:
+            distance = hamming_distance(value, node.value)
+            if distance == 0:
+                node.items.append(item)
+                return
+
+            child = node.children.get(distance)
+            if child is None:
+                node.children[distance] = _Node(value, item)
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, Any]]:
+        """
+        Find all items within a Hamming distance of a hash.
+
+        Args:
+            value: Query hash
+            max_distance: Maximum Hamming distance (inclusive)
+
+        Returns:
+            List of (distance, item) tuples
+        """
+        results: List[Tuple[int, Any]] = []
+        if self._root is None:
+            return results
+
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(value, node.value)
+
+            if distance <= max_distance:
+                results.extend((distance, item) for item in node.items)
+
+            low = distance - max_distance
+            high = distance + max_distance
+            for key, child in node.children.items():
+                if low <= key <= high:
+                    stack.append(child)
+
+        return results
+
+    def __iter__(self) -> Iterator[Tuple[int, Any]]:
+        """Iterate over all (hash, item) pairs."""
+        if self._root is None:
+            return
+
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            for item in node.items:
+                yield node.value, item
+            stack.extend(node.children.values())
@@ -0,0 +1,82 @@
+"""Consistent hash ring for placing keys on storage volumes."""
+
+import bisect
+import hashlib
+from typing import Dict, Iterator, List
+
+
+def _hash(value: str) -> int:
+    """64-bit position on the ring."""
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Consistent hash ring with virtual nodes.
+
+    Each node is placed on the ring `replicas * weight` times, so adding a
+    node moves only about 1/N of the keys, and larger volumes can take a
+    proportionally larger share.
+
+    Example:
+        >>> ring = HashRing({"disk1": 1, "disk2": 1})
+        >>> ring.get_node("3a7bd3e2360a3d29eea436fcfb7e44c7")
+        'disk1'
+    """
+
+    def __init__(self, nodes: Dict[str, int], replicas: int = 100):
+        """
+        Build the ring.
+
+        Args:
+            nodes: Mapping of node ID to weight (>= 1)
+            replicas: Virtual nodes per unit of weight
+        """
+        if not nodes:
+            raise ValueError("Hash ring needs at least one node")
+
+        points = []
+        for node, weight in nodes.items():
+            for i in range(replicas * max(1, weight)):
+                points.append((_hash(f"{node}#{i}"), node))
+
+        points.sort()
+        self._positions: List[int] = [position for position, _ in points]
+        self._nodes: List[str] = [node for _, node in points]
+        self.node_count = len(nodes)
+
+    def get_node(self, key: str) -> str:
+        """
+        Get the node responsible for a key.
+
+        Args:
+            key: Placement key (e.g. a content hash)
+
+        Returns:
+            Node ID
+        """
+        return next(self.iter_nodes(key))
+
+    def iter_nodes(self, key: str) -> Iterator[str]:
+        """
+        Iterate distinct nodes in ring order starting at a key's position.
+
+        The first node is the key's owner; the following ones are the
+        fallbacks to use when the owner cannot take the key.
+
+        Args:
+            key: Placement key
+
+        Yields:
+            Node IDs, each once
+        """
+        start = bisect.bisect(self._positions, _hash(key)) % len(self._positions)
+        seen = set()
+
+        for i in range(len(self._nodes)):
+            node = self._nodes[(start + i) % len(self._nodes)]
+            if node not in seen:
+                seen.add(node)
+                yield node
+                if len(seen) == self.node_count:
+                    return
@@ -0,0 +1,361 @@
+"""Read image format, dimensions and orientation from file headers.
+
+Only headers are parsed, nothing is decoded, so the size of an upload can
+be checked against a megapixel limit before a decompression bomb (e.g. a
+small file declaring 30000x30000 pixels) reaches an image decoder.
+
+JPEG markers, WebP chunks and HEIC boxes are walked by seeking over their
+payloads, so large EXIF blocks or image data in front of the wanted header
+cost a seek, not a read. JPEG headers beyond MAX_SCAN_BYTES and more than
+MAX_BOXES chunks or boxes are not looked at.
+
+Example:
+    >>> with open("photo.jpg", "rb") as f:
+    ...     probe_image(f)
+    ImageInfo(format='jpeg', width=4032, height=3024, orientation=6)
+"""
+
+import struct
+from pathlib import Path
+from typing import BinaryIO, Dict, List, NamedTuple, Optional, Tuple
+
+# JPEG headers further into the file than this are not searched
+MAX_SCAN_BYTES = 1024 * 1024
+
+# WebP chunks / HEIF top-level boxes visited at most
+MAX_BOXES = 32
+
+# Largest HEIF meta box read into memory
+MAX_META_BYTES = 1024 * 1024
+
+# JPEG start-of-frame markers (baseline, progressive, lossless, arithmetic)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+_HEIF_BRANDS = {b"heic", b"heix", b"heim", b"heis", b"hevc", b"hevx", b"mif1", b"msf1"}
+
+# HEIF irot (counter-clockwise quarter turns) -> EXIF orientation
+_IROT_ORIENTATION = {0: 1, 1: 8, 2: 3, 3: 6}
+
+
+class ImageInfo(NamedTuple):
+    """Header information of an image."""
+    format: str  # jpeg, png, gif, webp, heic
+    width: int  # stored width, before applying orientation
+    height: int
+    orientation: int = 1  # EXIF orientation (1-8)
+
+    @property
+    def megapixels(self) -> float:
+        """Pixel count in millions."""
+        return self.width * self.height / 1_000_000
+
+
+def probe_image(f: BinaryIO) -> Optional[ImageInfo]:
+    """
+    Probe an image from a seekable binary file.
+
+    Reads from the start of the file; the position afterwards is undefined.
+
+    Args:
+        f: File opened in binary mode
+
+    Returns:
+        ImageInfo, or None if the format is not recognized or the header is broken
+    """
+    f.seek(0)
+    head = f.read(32)
+
+    try:
+        if head[:3] == b"\xff\xd8\xff":
+            return _probe_jpeg(f)
+        if head[:8] == b"\x89PNG\r\n\x1a\n":
+            return _probe_png(head)
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return _probe_gif(head)
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return _probe_webp(f)
+        if head[4:8] == b"ftyp" and head[8:12] in _HEIF_BRANDS:
+            return _probe_heif(f)
+    except (struct.error, IndexError, ValueError):
+        return None
+
+    return None
+
+
+def probe_file(path: Path) -> Optional[ImageInfo]:
+    """
+    Probe an image file.
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        ImageInfo, or None if not recognized (see probe_image)
+    """
+    try:
+        with open(path, "rb") as f:
+            return probe_image(f)
+    except OSError:
+        return None
+
+
+def _exif_orientation(tiff: bytes) -> int:
+    """Read the orientation tag from IFD0 of a TIFF-structured EXIF block."""
+    try:
+        if tiff[:2] == b"II":
+            endian = "<"
+        elif tiff[:2] == b"MM":
+            endian = ">"
+        else:
+            return 1
+
+        (ifd_offset,) = struct.unpack_from(endian + "I", tiff, 4)
+        (count,) = struct.unpack_from(endian + "H", tiff, ifd_offset)
+
+        for i in range(count):
+            entry = ifd_offset + 2 + i * 12
+            tag, _, _ = struct.unpack_from(endian + "HHI", tiff, entry)
+            if tag == 0x0112:
+                (value,) = struct.unpack_from(endian + "H", tiff, entry + 8)
+                return value if 1 <= value <= 8 else 1
+    except struct.error:
+        pass
+
+    return 1
+
+
+def _probe_jpeg(f: BinaryIO) -> Optional[ImageInfo]:
+    """Walk JPEG markers up to the start-of-frame header."""
+    f.seek(2)
+    orientation = 1
+    exif_seen = False
+
+    while f.tell() < MAX_SCAN_BYTES:
+        byte = f.read(1)
+        if byte != b"\xff":
+            return None
+
+        # Markers may be preceded by fill bytes
+        marker = f.read(1)
+        while marker == b"\xff":
+            marker = f.read(1)
+        if not marker:
+            return None
+
+        code = marker[0]
+        if code == 0x01 or 0xD0 <= code <= 0xD8:
+            # Standalone markers without a length
+            continue
+        if code in (0xD9, 0xDA):
+            # End of image or start of scan before any frame header
+            return None
+
+        (length,) = struct.unpack(">H", f.read(2))
+        if length < 2:
+            return None
+
+        if code in _JPEG_SOF_MARKERS:
+            _, height, width = struct.unpack(">BHH", f.read(5))
+            if not width or not height:
+                return None
+            return ImageInfo("jpeg", width, height, orientation)
+
+        if code == 0xE1 and not exif_seen:
+            segment = f.read(length - 2)
+            if segment[:6] == b"Exif\x00\x00":
+                orientation = _exif_orientation(segment[6:])
+                exif_seen = True
+            continue
+
+        f.seek(length - 2, 1)
+
+    return None
+
+
+def _probe_png(head: bytes) -> Optional[ImageInfo]:
+    """Read the IHDR chunk, which always comes first."""
+    if head[12:16] != b"IHDR":
+        return None
+    width, height = struct.unpack(">II", head[16:24])
+    return ImageInfo("png", width, height)
+
+
+def _probe_gif(head: bytes) -> Optional[ImageInfo]:
+    """Read the logical screen size."""
+    width, height = struct.unpack("<HH", head[6:10])
+    return ImageInfo("gif", width, height)
+
+
+def _probe_webp(f: BinaryIO) -> Optional[ImageInfo]:
+    """Read the first chunk (VP8, VP8L or VP8X) and the EXIF chunk if flagged."""
+    f.seek(12)
+    fourcc, size = struct.unpack("<4sI", f.read(8))
+    payload = f.read(min(size, 30))
+
+    if fourcc == b"VP8 ":
+        if payload[3:6] != b"\x9d\x01\x2a":
+            return None
+        width, height = struct.unpack("<HH", payload[6:10])
+        return ImageInfo("webp", width & 0x3FFF, height & 0x3FFF)
+
+    if fourcc == b"VP8L":
+        if payload[0] != 0x2F:
+            return None
+        (bits,) = struct.unpack("<I", payload[1:5])
+        return ImageInfo("webp", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+
+    if fourcc != b"VP8X":
+        return None
+
+    width = int.from_bytes(payload[4:7], "little") + 1
+    height = int.from_bytes(payload[7:10], "little") + 1
+    orientation = 1
+
+    if payload[0] & 0x08:
+        # EXIF flag: find the EXIF chunk (stored after the image data)
+        position = 20 + size + (size & 1)
+        for _ in range(MAX_BOXES):
+            f.seek(position)
+            header = f.read(8)
+            if len(header) < 8:
+                break
+            fourcc, size = struct.unpack("<4sI", header)
+            if fourcc == b"EXIF":
+                exif = f.read(min(size, 64 * 1024))
+                if exif[:6] == b"Exif\x00\x00":
+                    exif = exif[6:]
+                orientation = _exif_orientation(exif)
+                break
+            position += 8 + size + (size & 1)
+
+    return ImageInfo("webp", width, height, orientation)
+
+
+def _iter_boxes(data: bytes, start: int = 0, end: Optional[int] = None):
+    """Iterate ISO BMFF boxes in a buffer as (type, payload start, payload end)."""
+    end = len(data) if end is None else end
+    position = start
+
+    while position + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, position)
+        header = 8
+        if size == 1:
+            (size,) = struct.unpack_from(">Q", data, position + 8)
+            header = 16
+        elif size == 0:
+            size = end - position
+        if size < header or position + size > end:
+            return
+
+        yield box_type, position + header, position + size
+        position += size
+
+
+def _probe_heif(f: BinaryIO) -> Optional[ImageInfo]:
+    """Find the primary item's ispe (size) and irot (rotation) properties."""
+    # Locate the top-level meta box by seeking over the others (e.g. mdat)
+    f.seek(0)
+    position = 0
+    meta = None
+
+    for _ in range(MAX_BOXES):
+        f.seek(position)
+        header = f.read(16)
+        if len(header) < 8:
+            return None
+        size, box_type = struct.unpack(">I4s", header[:8])
+        header_size = 8
+        if size == 1:
+            (size,) = struct.unpack(">Q", header[8:16])
+            header_size = 16
+        if size < header_size:
+            return None
+
+        if box_type == b"meta":
+            if size > MAX_META_BYTES:
+                return None
+            f.seek(position + header_size)
+            meta = f.read(size - header_size)
+            break
+        position += size
+
+    if meta is None:
+        return None
+
+    # meta is a full box: skip version and flags
+    primary_item = None
+    properties: List[Tuple[bytes, bytes]] = []
+    associations: Dict[int, List[int]] = {}
+
+    for box_type, start, end in _iter_boxes(meta, 4):
+        if box_type == b"pitm":
+            version = meta[start]
+            fmt = ">H" if version == 0 else ">I"
+            (primary_item,) = struct.unpack_from(fmt, meta, start + 4)
+
+        elif box_type == b"iprp":
+            for child, child_start, child_end in _iter_boxes(meta, start, end):
+                if child == b"ipco":
+                    properties = [
+                        (prop, meta[prop_start:prop_end])
+                        for prop, prop_start, prop_end in _iter_boxes(meta, child_start, child_end)
+                    ]
+                elif child == b"ipma":
+                    associations.update(_parse_ipma(meta[child_start:child_end]))
+
+    item_properties = [
+        properties[index - 1]
+        for index in associations.get(primary_item, [])
+        if 0 < index <= len(properties)
+    ]
+    if not item_properties:
+        # No usable association: fall back to the largest declared size
+        item_properties = properties
+
+    sizes = [
+        struct.unpack_from(">II", payload, 4)
+        for prop, payload in item_properties
+        if prop == b"ispe" and len(payload) >= 12
+    ]
+    if not sizes:
+        return None
+    width, height = max(sizes, key=lambda s: s[0] * s[1])
+
+    orientation = 1
+    for prop, payload in item_properties:
+        if prop == b"irot" and payload:
+            orientation = _IROT_ORIENTATION[payload[0] & 0x03]
+
+    return ImageInfo("heic", width, height, orientation)
+
+
+def _parse_ipma(payload: bytes) -> Dict[int, List[int]]:
+    """Parse item property associations: item ID -> 1-based property indexes."""
+    version, flags = payload[0], int.from_bytes(payload[1:4], "big")
+    (count,) = struct.unpack_from(">I", payload, 4)
+    position = 8
+    result = {}
+
+    for _ in range(count):
+        if version < 1:
+            (item_id,) = struct.unpack_from(">H", payload, position)
+            position += 2
+        else:
+            (item_id,) = struct.unpack_from(">I", payload, position)
+            position += 4
+
+        associations = payload[position]
+        position += 1
+
+        indexes = []
+        for _ in range(associations):
+            if flags & 1:
+                (value,) = struct.unpack_from(">H", payload, position)
+                indexes.append(value & 0x7FFF)
+                position += 2
+            else:
+                indexes.append(payload[position] & 0x7F)
+                position += 1
+        result[item_id] = indexes
+
+    return result
@@ -0,0 +1,43 @@
+"""asyncio locks by key that are dropped once unused."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List
+
+
+class KeyedLocks:
+    """
+    One asyncio lock per key (e.g. an upload session ID).
+
+    A lock is dropped as soon as no task holds or waits for it, so keys
+    that are never used again (expired sessions, replaced sheets) do not
+    accumulate. Locks only serialize tasks of this process.
+
+    Example:
+        >>> locks = KeyedLocks()
+        >>> async with locks.hold("session-1"):
+        ...     await append()
+    """
+
+    def __init__(self):
+        # key -> [lock, number of tasks holding or waiting for it]
+        self._locks: Dict[str, List] = {}
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def hold(self, key: str) -> AsyncIterator[None]:
+        """Hold the lock of a key."""
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
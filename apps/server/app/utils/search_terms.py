@@ -0,0 +1,79 @@
+"""Normalized words for prefix search.
+
+Words are case-folded and stripped of accents, so "Café Ünterberg" is
+found by typing "cafe unt". Stored as an indexed array, a prefix query
+is an anchored, case-sensitive regex, which MongoDB answers with a range
+scan of the index instead of a collection scan.
+
+Example:
+    >>> search_terms("Hochzeit Müller & Søn", "ABC123")
+    ['hochzeit', 'muller', 'søn', 'abc123']
+"""
+
+import re
+import unicodedata
+from typing import List, Optional
+
+_WORD = re.compile(r"\w+")
+
+# Words kept per document
+MAX_TERMS = 32
+
+
+def normalize(text: str) -> str:
+    """
+    Case-fold text and remove accents.
+
+    Args:
+        text: Any text
+
+    Returns:
+        Normalized text
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return stripped.casefold()
+
+
+def words(text: str) -> List[str]:
+    """
+    Split text into normalized words.
+
+    Args:
+        text: Any text
+
+    Returns:
+        Words in order of appearance
+    """
+    return _WORD.findall(normalize(text))
+
+
+def search_terms(*texts: Optional[str]) -> List[str]:
+    """
+    Build the distinct normalized words of some texts.
+
+    Args:
+        *texts: Texts to index (None is skipped)
+
+    Returns:
+        Up to MAX_TERMS words, first occurrence first
+    """
+    terms = []
+    for text in texts:
+        for word in words(text or ""):
+            if word not in terms:
+                terms.append(word)
+    return terms[:MAX_TERMS]
+
+
+def prefix_pattern(prefix: str) -> str:
+    """
+    Build an anchored regex matching words that start with a prefix.
+
+    Args:
+        prefix: Normalized word prefix
+
+    Returns:
+        Regex pattern
+    """
+    return "^" + re.escape(prefix)
@@ -0,0 +1,8 @@
+"""Test configuration: settings are read when app modules are imported."""
+
+import os
+import tempfile
+
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("STORAGE_PATH", tempfile.mkdtemp(prefix="photo-server-tests-"))
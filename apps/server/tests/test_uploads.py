@@ -0,0 +1,103 @@
+"""Tests of the resumable upload routes against an in-memory MongoDB."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from app.main import app
+from app.models.collection import Collection
+from app.models.upload_session import UploadSession
+from app.services.upload_session_service import upload_session_service
+
+CODE = "ABC123"
+BASE = f"/api/v1/collections/{CODE}/uploads"
+
+
+async def _client() -> httpx.AsyncClient:
+    """Client of the app with a fresh database holding one collection."""
+    await init_beanie(
+        database=AsyncMongoMockClient()["photo_system_test"],
+        document_models=[Collection, UploadSession]
+    )
+    await Collection(code=CODE, name="Test collection", created_by="admin").insert()
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+async def _start_upload(client: httpx.AsyncClient, chunk: bytes, size: int) -> str:
+    """Create a session and send its first chunk, returning its ID."""
+    response = await client.post(BASE, json={"filename": "photo.jpg", "size": size})
+    assert response.status_code == 201
+    upload_id = response.json()["upload_id"]
+
+    response = await client.patch(
+        f"{BASE}/{upload_id}",
+        content=chunk,
+        headers={"Upload-Offset": "0", "Content-Type": "application/offset+octet-stream"}
+    )
+    assert response.status_code == 200
+    assert response.json()["offset"] == len(chunk)
+    return upload_id
+
+
+def test_abort_upload_deletes_received_bytes():
+    async def scenario():
+        async with await _client() as client:
+            upload_id = await _start_upload(client, b"x" * 10, 100)
+            session = await UploadSession.get(upload_id)
+            temp_file = upload_session_service._full_path(session)
+            assert temp_file.exists()
+
+            response = await client.delete(f"{BASE}/{upload_id}")
+            assert response.status_code == 204
+            assert not temp_file.exists()
+            assert (await UploadSession.get(upload_id)).status == "aborted"
+
+            # Already aborted
+            response = await client.delete(f"{BASE}/{upload_id}")
+            assert response.status_code == 409
+
+    asyncio.run(scenario())
+
+
+def test_abort_upload_keeps_completing_and_finished_sessions():
+    async def scenario():
+        async with await _client() as client:
+            upload_id = await _start_upload(client, b"x" * 10, 100)
+            session = await UploadSession.get(upload_id)
+            temp_file = upload_session_service._full_path(session)
+
+            # Completion in progress under a valid lease
+            lease = datetime.utcnow() + timedelta(minutes=5)
+            await session.set({UploadSession.status: "completing", UploadSession.completing_until: lease})
+            response = await client.delete(f"{BASE}/{upload_id}")
+            assert response.status_code == 409
+            assert temp_file.exists()
+
+            # Completed: the result is kept for replays
+            result = {"success": True, "filename": "photo.jpg", "photo_id": "p1"}
+            await session.set({UploadSession.status: "completed", UploadSession.result: result})
+            response = await client.delete(f"{BASE}/{upload_id}")
+            assert response.status_code == 409
+            session = await UploadSession.get(upload_id)
+            assert session.status == "completed"
+            assert session.result == result
+
+    asyncio.run(scenario())
+
+
+def test_abort_upload_takes_over_abandoned_completion():
+    async def scenario():
+        async with await _client() as client:
+            upload_id = await _start_upload(client, b"x" * 10, 100)
+            session = await UploadSession.get(upload_id)
+            expired = datetime.utcnow() - timedelta(minutes=1)
+            await session.set({UploadSession.status: "completing", UploadSession.completing_until: expired})
+
+            response = await client.delete(f"{BASE}/{upload_id}")
+            assert response.status_code == 204
+            assert (await UploadSession.get(upload_id)).status == "aborted"
+
+    asyncio.run(scenario())